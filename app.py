@@ -1,10 +1,22 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-import numpy as np
 from datetime import datetime
-import chardet
+from types import MappingProxyType
+import cProfile
+import io
+import json
+import os
+import pstats
+import threading
+import time
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+from elecciones import (
+    AGREGADOS, ARCHIVOS_VUELTA, DEPARTAMENTOS_OFICIALES, DIAGNOSTICO, FIGURAS, FIGURAS_CON_GEOMETRIA, MESAS_POR_PAGINA, METRICAS_VARIACION, PARTIDOS_PRIMERA, PARTIDOS_SEGUNDA,
+    ErrorIngesta, cargar_datos_en_vivo, cargar_vuelta, cargar_vueltas, consultar_mesas, firma_archivos, firma_geometria, medir_etapa,
+    metricas, niveles_con_geometria, ranking_variaciones, recintos_de_departamento, registrar_cache, registrar_evento, registrar_snapshot,
+    ultima_actualizacion
+)
 
 # Configurar la página
 st.set_page_config(
@@ -49,199 +61,175 @@ st.markdown("""
 st.markdown('<h1 class="main-header">🇧🇴 Plataforma de Visualización Electoral Bolivia 2025</h1>', unsafe_allow_html=True)
 st.markdown("### Sistema Interactivo de Resultados - Primera y Segunda Vuelta")
 
-# Datos geográficos de departamentos de Bolivia
-BOLIVIA_DEPARTAMENTOS = {
-    'La Paz': {'lat': -16.5, 'lon': -68.15, 'color': '#1f77b4'},
-    'Santa Cruz': {'lat': -17.8, 'lon': -63.18, 'color': '#ff7f0e'},
-    'Cochabamba': {'lat': -17.4, 'lon': -66.16, 'color': '#2ca02c'},
-    'Oruro': {'lat': -17.97, 'lon': -67.12, 'color': '#d62728'},
-    'Potosí': {'lat': -19.58, 'lon': -65.75, 'color': '#9467bd'},
-    'Chuquisaca': {'lat': -19.0, 'lon': -65.0, 'color': '#8c564b'},
-    'Tarija': {'lat': -21.53, 'lon': -64.73, 'color': '#e377c2'},
-    'Beni': {'lat': -14.83, 'lon': -64.9, 'color': '#7f7f7f'},
-    'Pando': {'lat': -11.03, 'lon': -68.75, 'color': '#bcbd22'}
-}
+# Almacén compartido de resultados: vida máxima de un snapshot en la caché de la interfaz
+TTL_RESULTADOS = 600
 
-# Lista de los 9 departamentos oficiales
-DEPARTAMENTOS_OFICIALES = ['Beni', 'Chuquisaca', 'Cochabamba', 'La Paz', 'Oruro', 'Pando', 'Potosí', 'Santa Cruz', 'Tarija']
+# Filas de mesas marcadas que se muestran en la auditoría (el resto se descarga en CSV)
+MAX_FILAS_AUDITORIA = 500
 
-def detectar_codificacion(archivo):
-    """Detectar automáticamente la codificación del archivo"""
+@st.cache_resource(ttl=TTL_RESULTADOS, max_entries=4, show_spinner=False)
+def _construir_vuelta(vuelta, firma):
+    """Construir el snapshot inmutable de una vuelta para una firma de archivos"""
+    registrar_cache(f'vuelta_{vuelta}', fallo=True)
     try:
-        with open(archivo, 'rb') as f:
-            resultado = chardet.detect(f.read())
-            return resultado['encoding']
-    except:
-        return 'latin-1'
+        resultados, df, departamentos = cargar_vuelta(vuelta)
+    except ErrorIngesta as e:
+        st.error(f"Error cargando {vuelta} vuelta: {e}")
+        resultados, df, departamentos = {}, pd.DataFrame(), pd.DataFrame()
+    # Solo al construir un snapshot nuevo: las demás ejecuciones reutilizan uno ya registrado
+    registrar_snapshot(vuelta, firma, (resultados, df, departamentos))
+    # Vista de solo lectura: las sesiones comparten el mismo objeto sin copiarlo
+    return MappingProxyType(resultados), df, departamentos
 
-@st.cache_data
-def cargar_datos_primera_vuelta():
-    """Cargar y procesar datos de la primera vuelta"""
-    try:
-        codificacion = detectar_codificacion('primera_vuelta.csv')
-        codificaciones = [codificacion, 'latin-1', 'iso-8859-1', 'cp1252', 'utf-8']
-        
-        for cod in codificaciones:
-            try:
-                df_primera = pd.read_csv('primera_vuelta.csv', encoding=cod)
-                
-                # Procesar datos de primera vuelta
-                partidos_primera = ['AP', 'APB-SUMATE', 'FP', 'LIBRE', 'LYP-ADN', 'MAS-IPSP', 'PDC', 'UNIDAD']
-                resultados_primera = {}
-                
-                for partido in partidos_primera:
-                    if partido in df_primera.columns:
-                        resultados_primera[partido] = df_primera[partido].sum()
-                
-                # Análisis por departamento - solo los 9 departamentos oficiales
-                departamentos_primera = {}
-                for depto in DEPARTAMENTOS_OFICIALES:
-                    # Simulación - en producción se haría el mapeo real
-                    departamentos_primera[depto] = {
-                        'AP': resultados_primera.get('AP', 0) // 9,
-                        'PDC': resultados_primera.get('PDC', 0) // 9,
-                        'LIBRE': resultados_primera.get('LIBRE', 0) // 9,
-                        'MAS-IPSP': resultados_primera.get('MAS-IPSP', 0) // 9
-                    }
-                
-                return resultados_primera, df_primera, departamentos_primera
-                
-            except Exception:
-                continue
-        
-        return {}, pd.DataFrame(), {}
-        
-    except Exception as e:
-        st.error(f"Error cargando primera vuelta: {e}")
-        return {}, pd.DataFrame(), {}
+@st.cache_resource(max_entries=4, show_spinner=False)
+def _registrar_en_vivo(vuelta, firma, _datos):
+    """Registrar en el historial cada versión nueva del conteo en vivo, una sola vez por firma"""
+    return registrar_snapshot(vuelta, firma, _datos)
 
-@st.cache_data
-def cargar_datos_segunda_vuelta():
-    """Cargar y procesar datos de la segunda vuelta"""
-    try:
-        codificacion = detectar_codificacion('segunda_vuelta.csv')
-        codificaciones = [codificacion, 'latin-1', 'iso-8859-1', 'cp1252', 'utf-8']
-        
-        for cod in codificaciones:
-            try:
-                df_segunda = pd.read_csv('segunda_vuelta.csv', encoding=cod)
-                
-                resultados_segunda = {
-                    'PDC': df_segunda['PDC'].sum() if 'PDC' in df_segunda.columns else 0,
-                    'LIBRE': df_segunda['LIBRE'].sum() if 'LIBRE' in df_segunda.columns else 0
-                }
-                
-                # Análisis por departamento para segunda vuelta - solo los 9 departamentos oficiales
-                departamentos_segunda = {}
-                if 'NombreDepartamento' in df_segunda.columns:
-                    for depto in df_segunda['NombreDepartamento'].unique():
-                        if depto in DEPARTAMENTOS_OFICIALES:  # Solo incluir departamentos oficiales
-                            depto_data = df_segunda[df_segunda['NombreDepartamento'] == depto]
-                            departamentos_segunda[depto] = {
-                                'PDC': depto_data['PDC'].sum() if 'PDC' in depto_data.columns else 0,
-                                'LIBRE': depto_data['LIBRE'].sum() if 'LIBRE' in depto_data.columns else 0
-                            }
-                    # Asegurar que todos los departamentos estén presentes
-                    for depto in DEPARTAMENTOS_OFICIALES:
-                        if depto not in departamentos_segunda:
-                            departamentos_segunda[depto] = {
-                                'PDC': 0,
-                                'LIBRE': 0
-                            }
-                else:
-                    # Simulación si no hay datos de departamento - solo los 9 departamentos
-                    for depto in DEPARTAMENTOS_OFICIALES:
-                        departamentos_segunda[depto] = {
-                            'PDC': resultados_segunda.get('PDC', 0) // 9,
-                            'LIBRE': resultados_segunda.get('LIBRE', 0) // 9
-                        }
-                
-                return resultados_segunda, df_segunda, departamentos_segunda
-                
-            except Exception:
-                continue
-        
-        return {}, pd.DataFrame(), {}
-        
-    except Exception as e:
-        st.error(f"Error cargando segunda vuelta: {e}")
-        return {}, pd.DataFrame(), {}
+def obtener_vuelta(vuelta, en_vivo=False):
+    """Datos de una vuelta junto con la firma del snapshot del que provienen"""
+    if en_vivo:
+        archivo = ARCHIVOS_VUELTA[vuelta][0]
+        partidos = PARTIDOS_PRIMERA if vuelta == 'primera' else PARTIDOS_SEGUNDA
+        errores = []
+        # La versión sale del mismo lock que los datos: nunca se guardan datos viejos bajo una firma nueva
+        version, datos = cargar_datos_en_vivo(archivo, partidos, errores)
+        for error in errores:
+            st.error(f"Error en conteo en vivo: {error}")
+        firma = ('vivo', archivo, version)
+        # Las versiones solo avanzan: la caché llama al historial únicamente cuando aparece una nueva
+        _registrar_en_vivo(vuelta, firma, datos)
+    else:
+        firma = firma_archivos(ARCHIVOS_VUELTA[vuelta])
+        registrar_cache(f'vuelta_{vuelta}')
+        datos = _construir_vuelta(vuelta, firma)
+    return firma, datos
+
+# Bandera servida desde el repositorio: la app no depende de servidores externos
+BANDERA = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'assets', 'bandera_bolivia.svg')
+
+# Agregados y figuras que declara cada página; solo esos se cargan y calculan al visitarla
+PAGINAS = {
+    "🏠 Dashboard Principal": [
+        'total_mesas', 'resultados_primera', 'resultados_segunda', 'pie_primera', 'pie_segunda', 'mapa_segunda',
+        'proyeccion', 'proyeccion_barras'
+    ],
+    "📊 Análisis Comparativo": ['resultados_primera', 'resultados_segunda', 'cambios', 'comparativo', 'transferencias', 'transferencias_nacional'],
+    "🗺️ Mapa de Resultados": ['mapa_segunda', 'tabla_departamentos', 'patrones', 'deptos_primera', 'cobertura_primera'],
+    "📈 Evolución Temporal": ['resultados_primera', 'resultados_segunda', 'evolucion'],
+    # El explorador y la auditoría piden los datos de la vuelta elegida dentro de la propia página
+    "🔎 Explorador de Mesas": [],
+    "🚨 Auditoría de Actas": [],
+    "🔀 Variaciones entre Vueltas": ['variaciones', 'variaciones_departamentos']
+}
 
-def crear_mapa_departamental(departamentos_data, titulo):
-    """Crear mapa cloroplético de Bolivia"""
-    deptos = []
-    lat = []
-    lon = []
-    votos_ganador = []
-    colores = []
-    ganadores = []
+# Página oculta: solo aparece con el diagnóstico activo
+if DIAGNOSTICO:
+    PAGINAS["🩺 Diagnóstico"] = []
+
+@st.cache_resource(max_entries=64, show_spinner=False)
+def _calcular_agregado(nombre, firmas, _vueltas):
+    """Calcular un agregado una sola vez por snapshot de datos"""
+    registrar_cache('agregados', fallo=True)
+    with medir_etapa('agregados'):
+        return AGREGADOS[nombre][1](_vueltas)
+
+@st.cache_resource(max_entries=64, show_spinner=False)
+def _figura_json(nombre, firmas, parametros, _vueltas):
+    """Construir una figura y serializarla a JSON una sola vez por snapshot y parámetros"""
+    registrar_cache('figuras', fallo=True)
+    with medir_etapa('figuras'):
+        fig = FIGURAS[nombre][1](_vueltas, **dict(parametros))
+        return fig.to_json() if fig is not None else None
+
+def _figura_desde_json(figura):
+    """Reconstruir una figura desde su JSON; plotly se importa recién aquí"""
+    if figura is None:
+        return None
+    import plotly.io as pio
+
+    return pio.from_json(figura)
+
+def aviso_por_bloques(seccion):
+    """Aviso de las secciones que necesitan las actas mesa a mesa, que no se conservan en modo por bloques"""
+    st.info(f"🧱 {seccion} no disponible en modo por bloques: las actas se agregan sin conservar cada mesa")
+
+def obtener_agregados(nombres, en_vivo=False, parametros=None):
+    """Resolver los agregados y figuras pedidos cargando solo las vueltas de las que dependen
+
+    parametros reemplaza, por figura, los parámetros registrados en FIGURAS.
+    """
+    necesarias = list(dict.fromkeys(
+        vuelta for nombre in nombres for vuelta in (FIGURAS[nombre][0] if nombre in FIGURAS else AGREGADOS[nombre][0])
+    ))
     
-    for depto, data in departamentos_data.items():
-        if depto in BOLIVIA_DEPARTAMENTOS:
-            deptos.append(depto)
-            lat.append(BOLIVIA_DEPARTAMENTOS[depto]['lat'])
-            lon.append(BOLIVIA_DEPARTAMENTOS[depto]['lon'])
-            
-            pdc_votos = data.get('PDC', 0)
-            libre_votos = data.get('LIBRE', 0)
-            
-            if pdc_votos > libre_votos:
-                ganador = 'PDC'
-                votos_ganador.append(pdc_votos)
-                colores.append('#1f77b4')  # Azul para PDC
-            else:
-                ganador = 'LIBRE'
-                votos_ganador.append(libre_votos)
-                colores.append('#ff7f0e')  # Naranja para LIBRE
-            
-            ganadores.append(ganador)
+    # Las vueltas se cargan en paralelo; cada hilo hereda el contexto de la sesión (caché y st.error)
+    contexto = get_script_run_ctx()
+    def cargar(vuelta):
+        add_script_run_ctx(threading.current_thread(), contexto)
+        return obtener_vuelta(vuelta, en_vivo)
     
-    if deptos:
-        fig = px.scatter_mapbox(
-            lat=lat,
-            lon=lon,
-            text=deptos,
-            size=votos_ganador,
-            color=ganadores,
-            color_discrete_map={'PDC': '#1f77b4', 'LIBRE': '#ff7f0e'},
-            size_max=30,
-            zoom=4,
-            height=500,
-            title=titulo
-        )
-        
-        fig.update_layout(
-            mapbox_style="open-street-map",
-            margin={"r":0,"t":30,"l":0,"b":0}
-        )
-        
-        return fig
-    return None
+    cargadas = cargar_vueltas(necesarias, cargar)
+    firmas = {vuelta: firma for vuelta, (firma, _) in cargadas.items()}
+    vueltas = {vuelta: datos for vuelta, (_, datos) in cargadas.items()}
+
+    datos = {}
+    for nombre in nombres:
+        if nombre in FIGURAS:
+            dependencias, _, por_defecto = FIGURAS[nombre]
+            elegidos = tuple({**dict(por_defecto), **(parametros or {}).get(nombre, {})}.items())
+            firmas_figura = tuple(firmas[v] for v in dependencias)
+            if nombre in FIGURAS_CON_GEOMETRIA:
+                firmas_figura += (firma_geometria(),)
+            registrar_cache('figuras')
+            figura = _figura_json(nombre, firmas_figura, elegidos, vueltas)
+            # Cada sesión recibe su propia figura reconstruida desde el JSON compartido
+            datos[nombre] = _figura_desde_json(figura)
+        else:
+            dependencias = AGREGADOS[nombre][0]
+            registrar_cache('agregados')
+            datos[nombre] = _calcular_agregado(nombre, tuple(firmas[v] for v in dependencias), vueltas)
+    return datos
 
 def main():
     # Sidebar para navegación
-    st.sidebar.image("https://upload.wikimedia.org/wikipedia/commons/thumb/4/48/Flag_of_Bolivia.svg/1200px-Flag_of_Bolivia.svg.png", width=100)
+    st.sidebar.image(BANDERA, width=100)
     st.sidebar.title("Navegación")
     
     pagina = st.sidebar.radio(
         "Seleccione una sección:",
-        ["🏠 Dashboard Principal", "📊 Análisis Comparativo", "🗺️ Mapa de Resultados", "📈 Evolución Temporal"]
+        list(PAGINAS)
     )
     
-    # Cargar datos
+    # Conteo en vivo: cada recarga procesa solo las actas agregadas a los CSV
+    en_vivo = st.sidebar.checkbox("📡 Conteo en vivo", help="Procesa solo las actas nuevas en cada actualización")
+    if en_vivo:
+        st.sidebar.button("🔄 Actualizar conteo")
+    
+    inicio_rerun = time.perf_counter()
+    
+    # Perfil cProfile de un único rerun, pedido desde la página de diagnóstico
+    perfil = None
+    if DIAGNOSTICO and st.session_state.pop('perfilar_rerun', False):
+        perfil = cProfile.Profile()
+        perfil.enable()
+    
+    # Cargar solo los datos que declara la página seleccionada
     with st.spinner('Cargando datos electorales...'):
-        resultados_primera, df_primera, deptos_primera = cargar_datos_primera_vuelta()
-        resultados_segunda, df_segunda, deptos_segunda = cargar_datos_segunda_vuelta()
+        datos = obtener_agregados(PAGINAS[pagina], en_vivo)
     
     # DASHBOARD PRINCIPAL
     if pagina == "🏠 Dashboard Principal":
         st.markdown('<h2 class="sub-header">Dashboard de Resultados Electorales</h2>', unsafe_allow_html=True)
+        total_mesas = datos['total_mesas']
+        resultados_primera = datos['resultados_primera']
+        resultados_segunda = datos['resultados_segunda']
+        proyeccion = datos['proyeccion']
         
         # Métricas principales en la parte superior
         col1, col2, col3, col4 = st.columns(4)
         
         with col1:
-            total_mesas = len(df_primera) + len(df_segunda)
             st.metric("📋 Total de Mesas", f"{total_mesas:,}")
         
         with col2:
@@ -250,7 +238,11 @@ def main():
                 st.metric("🏆 Ganador 1ra Vuelta", ganador_1ra[0], f"{ganador_1ra[1]:,} votos")
         
         with col3:
-            if resultados_segunda:
+            if proyeccion is not None and proyeccion['pendientes']:
+                # Con mesas pendientes el ganador sale de la proyección, no de las sumas parciales
+                lider = max(proyeccion['prob_victoria'], key=proyeccion['prob_victoria'].get)
+                st.metric("🎯 Ganador 2da Vuelta", f"{lider} (proyectado)", f"{proyeccion['prob_victoria'][lider]:.0%} de probabilidad", delta_color="off")
+            elif resultados_segunda:
                 ganador_2da = 'PDC' if resultados_segunda.get('PDC', 0) > resultados_segunda.get('LIBRE', 0) else 'LIBRE'
                 st.metric("🎯 Ganador 2da Vuelta", ganador_2da, f"{max(resultados_segunda.values()):,} votos")
         
@@ -259,6 +251,31 @@ def main():
                 participacion = ((sum(resultados_segunda.values()) / sum(resultados_primera.values())) * 100) if sum(resultados_primera.values()) > 0 else 0
                 st.metric("👥 Participación", f"{participacion:.1f}%")
         
+        # Proyección del conteo mientras queden mesas por llegar
+        if proyeccion is not None and proyeccion['pendientes']:
+            st.subheader("🔮 Proyección del Conteo")
+            tabla_proyeccion = proyeccion['proyeccion']
+            col_metricas, col_grafico = st.columns([1, 2])
+            with col_metricas:
+                st.metric("Mesas Contadas", f"{proyeccion['contadas']:,}", f"{proyeccion['avance']:.1f}% del total", delta_color="off")
+                for partido in ['PDC', 'LIBRE']:
+                    fila = tabla_proyeccion.loc[partido]
+                    st.metric(
+                        f"{partido} Proyectado", f"{fila['% Válidos']:.1f}%",
+                        f"{fila['% Inferior']:.1f}% – {fila['% Superior']:.1f}% (IC {proyeccion['confianza']:.0%})", delta_color="off"
+                    )
+                st.metric("Prob. de Victoria PDC", f"{proyeccion['prob_victoria']['PDC']:.1%}")
+            with col_grafico:
+                if datos['proyeccion_barras'] is not None:
+                    st.plotly_chart(datos['proyeccion_barras'], use_container_width=True)
+            with st.expander("📋 Proyección por departamento y votos"):
+                st.dataframe(proyeccion['departamentos'], use_container_width=True, hide_index=True)
+                st.dataframe(tabla_proyeccion, use_container_width=True)
+            st.caption(
+                f"{proyeccion['simulaciones']:,} simulaciones Monte Carlo estratificadas por departamento. "
+                f"Mesas pendientes ({proyeccion['pendientes']:,}): mesas de la primera vuelta aún sin acta de segunda vuelta."
+            )
+        
         st.markdown("---")
         
         # Visualizaciones principales
@@ -266,38 +283,28 @@ def main():
         
         with col1:
             st.subheader("📊 Resultados Primera Vuelta")
-            if resultados_primera:
-                fig_1ra = px.pie(
-                    values=list(resultados_primera.values()),
-                    names=list(resultados_primera.keys()),
-                    title="Distribución de Votos - Primera Vuelta"
-                )
-                st.plotly_chart(fig_1ra, use_container_width=True)
+            if datos['pie_primera'] is not None:
+                st.plotly_chart(datos['pie_primera'], use_container_width=True)
             else:
                 st.warning("No hay datos de primera vuelta")
         
         with col2:
             st.subheader("🎯 Resultados Segunda Vuelta")
-            if resultados_segunda:
-                fig_2da = px.pie(
-                    values=list(resultados_segunda.values()),
-                    names=list(resultados_segunda.keys()),
-                    title="Distribución de Votos - Segunda Vuelta"
-                )
-                st.plotly_chart(fig_2da, use_container_width=True)
+            if datos['pie_segunda'] is not None:
+                st.plotly_chart(datos['pie_segunda'], use_container_width=True)
             else:
                 st.warning("No hay datos de segunda vuelta")
         
         # Mapa rápido
         st.subheader("🗺️ Vista Rápida por Departamento")
-        if deptos_segunda:
-            mapa_fig = crear_mapa_departamental(deptos_segunda, "Resultados por Departamento - Segunda Vuelta")
-            if mapa_fig:
-                st.plotly_chart(mapa_fig, use_container_width=True)
+        if datos['mapa_segunda'] is not None:
+            st.plotly_chart(datos['mapa_segunda'], use_container_width=True)
     
     # ANÁLISIS COMPARATIVO
     elif pagina == "📊 Análisis Comparativo":
         st.markdown('<h2 class="sub-header">Análisis Comparativo Entre Vueltas</h2>', unsafe_allow_html=True)
+        resultados_primera = datos['resultados_primera']
+        resultados_segunda = datos['resultados_segunda']
         
         if resultados_primera and resultados_segunda:
             col1, col2 = st.columns(2)
@@ -305,151 +312,107 @@ def main():
             with col1:
                 st.subheader("📈 Evolución PDC vs LIBRE")
                 
-                # Datos para comparación
-                partidos = ['PDC', 'LIBRE']
-                votos_1ra = [resultados_primera.get(p, 0) for p in partidos]
-                votos_2da = [resultados_segunda.get(p, 0) for p in partidos]
-                
-                fig_comparativo = go.Figure()
-                
-                fig_comparativo.add_trace(go.Bar(
-                    name='Primera Vuelta',
-                    x=partidos,
-                    y=votos_1ra,
-                    marker_color=['lightblue', 'lightcoral'],
-                    text=[f'{v:,}' for v in votos_1ra],
-                    textposition='auto'
-                ))
-                
-                fig_comparativo.add_trace(go.Bar(
-                    name='Segunda Vuelta',
-                    x=partidos,
-                    y=votos_2da,
-                    marker_color=['blue', 'red'],
-                    text=[f'{v:,}' for v in votos_2da],
-                    textposition='auto'
-                ))
-                
-                fig_comparativo.update_layout(
-                    title='Comparación Directa: Primera vs Segunda Vuelta',
-                    barmode='group',
-                    xaxis_title='Partidos',
-                    yaxis_title='Votos'
-                )
-                
-                st.plotly_chart(fig_comparativo, use_container_width=True)
+                st.plotly_chart(datos['comparativo'], use_container_width=True)
             
             with col2:
                 st.subheader("📊 Análisis de Cambios")
                 
-                # Calcular cambios
-                cambios = []
-                for partido in ['PDC', 'LIBRE']:
-                    voto_1ra = resultados_primera.get(partido, 0)
-                    voto_2da = resultados_segunda.get(partido, 0)
-                    cambio = voto_2da - voto_1ra
-                    cambio_porc = (cambio / voto_1ra * 100) if voto_1ra > 0 else 0
-                    
-                    cambios.append({
-                        'Partido': partido,
-                        '1ra Vuelta': f"{voto_1ra:,}",
-                        '2da Vuelta': f"{voto_2da:,}",
-                        'Cambio': f"{cambio:+,}",
-                        'Tendencia': f"{cambio_porc:+.1f}%"
-                    })
-                
-                df_cambios = pd.DataFrame(cambios)
+                df_cambios = datos['cambios']
                 st.dataframe(df_cambios, use_container_width=True)
-                
-                # Análisis de transferencia de votos
-                st.subheader("🔄 Transferencia de Votos")
-                
+            
+            # Transferencia de votos estimada mesa a mesa
+            st.subheader("🔄 Transferencia de Votos")
+            transferencias = datos['transferencias']
+            
+            if transferencias is None:
+                aviso_por_bloques("Transferencia de votos")
+            elif transferencias['mesas']:
                 total_1ra = sum(resultados_primera.values())
                 total_2da = sum(resultados_segunda.values())
                 
-                col_met1, col_met2, col_met3 = st.columns(3)
+                col_met1, col_met2, col_met3, col_met4 = st.columns(4)
                 with col_met1:
-                    st.metric("Total 1ra Vuelta", f"{total_1ra:,}")
+                    st.metric("Mesas Emparejadas", f"{transferencias['mesas']:,}", f"{transferencias['cobertura']:.1f}% de la 2da vuelta", delta_color="off")
                 with col_met2:
-                    st.metric("Total 2da Vuelta", f"{total_2da:,}")
+                    st.metric("Total 1ra Vuelta", f"{total_1ra:,}")
                 with col_met3:
+                    st.metric("Total 2da Vuelta", f"{total_2da:,}")
+                with col_met4:
                     st.metric("Diferencia", f"{total_2da - total_1ra:+,}")
+                
+                col1, col2 = st.columns(2)
+                with col1:
+                    if datos['transferencias_nacional'] is not None:
+                        st.plotly_chart(datos['transferencias_nacional'], use_container_width=True)
+                with col2:
+                    por_departamento = transferencias['departamentos']
+                    if not por_departamento.empty:
+                        departamento = st.selectbox("Matriz por departamento:", list(por_departamento['Departamento'].unique()))
+                        matriz_depto = por_departamento[por_departamento['Departamento'] == departamento]
+                        st.dataframe(matriz_depto.drop(columns=['Departamento']), use_container_width=True, hide_index=True)
+                    with st.expander("Votos estimados por origen y destino"):
+                        st.dataframe(transferencias['flujos'], use_container_width=True)
+                
+                st.caption("Regresión ecológica ponderada sobre las mesas presentes en ambas vueltas: estima comportamientos agregados, no el voto de cada persona.")
+            else:
+                st.info("No hay mesas comunes entre ambas vueltas para estimar transferencias")
     
     # MAPA DE RESULTADOS
     elif pagina == "🗺️ Mapa de Resultados":
         st.markdown('<h2 class="sub-header">Representación Geográfica de Resultados</h2>', unsafe_allow_html=True)
+        deptos_primera = datos['deptos_primera']
         
         col1, col2 = st.columns(2)
         
         with col1:
             st.subheader("🗺️ Mapa - Segunda Vuelta")
-            if deptos_segunda:
-                mapa_2da = crear_mapa_departamental(deptos_segunda, "Resultados por Departamento - Segunda Vuelta")
-                if mapa_2da:
-                    st.plotly_chart(mapa_2da, use_container_width=True)
+            if datos['mapa_segunda'] is not None:
+                st.plotly_chart(datos['mapa_segunda'], use_container_width=True)
             else:
                 st.warning("No hay datos geográficos disponibles")
         
         with col2:
             st.subheader("📋 Tabla de Resultados por Departamento")
-            if deptos_segunda:
-                datos_tabla = []
-                for depto in DEPARTAMENTOS_OFICIALES:  # Solo mostrar departamentos oficiales
-                    if depto in deptos_segunda:
-                        data = deptos_segunda[depto]
-                        pdc = data.get('PDC', 0)
-                        libre = data.get('LIBRE', 0)
-                        total = pdc + libre
-                        ganador = 'PDC' if pdc > libre else 'LIBRE'
-                        diferencia = abs(pdc - libre)
-                        
-                        datos_tabla.append({
-                            'Departamento': depto,
-                            'PDC': f"{pdc:,}",
-                            'LIBRE': f"{libre:,}",
-                            'Total': f"{total:,}",
-                            'Ganador': ganador,
-                            'Diferencia': f"{diferencia:,}"
-                        })
-                
-                df_tabla = pd.DataFrame(datos_tabla)
+            df_tabla = datos['tabla_departamentos']
+            if not df_tabla.empty:
                 st.dataframe(df_tabla, use_container_width=True)
         
         # Análisis de patrones regionales
         st.subheader("🔍 Análisis de Patrones Regionales")
-        if deptos_segunda:
-            patrones_data = []
-            for depto in DEPARTAMENTOS_OFICIALES:  # Solo mostrar departamentos oficiales
-                if depto in deptos_segunda:
-                    data = deptos_segunda[depto]
-                    pdc = data.get('PDC', 0)
-                    libre = data.get('LIBRE', 0)
-                    total = pdc + libre
-                    if total > 0:
-                        pdc_porc = (pdc / total) * 100
-                        patrones_data.append({
-                            'Departamento': depto,
-                            'PDC (%)': pdc_porc,
-                            'LIBRE (%)': 100 - pdc_porc,
-                            'Ganador': 'PDC' if pdc > libre else 'LIBRE'
-                        })
-            
-            if patrones_data:
-                df_patrones = pd.DataFrame(patrones_data)
-                
-                fig_patrones = px.bar(
-                    df_patrones,
-                    x='Departamento',
-                    y=['PDC (%)', 'LIBRE (%)'],
-                    title='Distribución Porcentual por Departamento',
-                    barmode='stack',
-                    color_discrete_map={'PDC (%)': '#1f77b4', 'LIBRE (%)': '#ff7f0e'}
-                )
-                st.plotly_chart(fig_patrones, use_container_width=True)
+        if datos['patrones'] is not None:
+            st.plotly_chart(datos['patrones'], use_container_width=True)
+        
+        # Detalle por provincia o municipio, solo con su geometría local disponible
+        niveles = [nivel for nivel in niveles_con_geometria() if nivel != 'departamento']
+        if niveles:
+            st.subheader("🧭 Detalle por Provincia y Municipio")
+            col_nivel, col_depto = st.columns(2)
+            with col_nivel:
+                nivel = st.selectbox("Nivel:", niveles, format_func=str.capitalize)
+            with col_depto:
+                departamento = st.selectbox("Departamento:", ['Todos'] + DEPARTAMENTOS_OFICIALES)
+            departamento = None if departamento == 'Todos' else departamento
+            titulo = f"Resultados por {nivel.capitalize()} - {departamento or 'Bolivia'}"
+            mapa_nivel = obtener_agregados(
+                ['mapa_nivel'], en_vivo, {'mapa_nivel': {'nivel': nivel, 'departamento': departamento, 'titulo': titulo}}
+            )['mapa_nivel']
+            if mapa_nivel is not None:
+                st.plotly_chart(mapa_nivel, use_container_width=True)
+            else:
+                st.info("No hay geometría para la selección")
+        
+        # Primera vuelta por departamento a partir del índice mesa -> departamento
+        cobertura = datos['cobertura_primera']
+        if cobertura is not None and not deptos_primera.empty:
+            st.subheader("📋 Primera Vuelta por Departamento")
+            st.caption(f"Mesas con departamento identificado: {cobertura:.1f}%")
+            st.dataframe(deptos_primera, use_container_width=True)
     
     # EVOLUCIÓN TEMPORAL
     elif pagina == "📈 Evolución Temporal":
         st.markdown('<h2 class="sub-header">Análisis de Evolución y Tendencias</h2>', unsafe_allow_html=True)
+        resultados_primera = datos['resultados_primera']
+        resultados_segunda = datos['resultados_segunda']
         
         if resultados_primera and resultados_segunda:
             col1, col2 = st.columns(2)
@@ -457,32 +420,8 @@ def main():
             with col1:
                 st.subheader("📊 Evolución de Porcentajes")
                 
-                # Datos para gráfico de evolución
-                partidos = ['PDC', 'LIBRE']
-                porcentajes_1ra = [(resultados_primera.get(p, 0) / sum(resultados_primera.values()) * 100) for p in partidos]
-                porcentajes_2da = [(resultados_segunda.get(p, 0) / sum(resultados_segunda.values()) * 100) for p in partidos]
-                
-                fig_evolucion = go.Figure()
-                
-                for i, partido in enumerate(partidos):
-                    fig_evolucion.add_trace(go.Scatter(
-                        x=['Primera Vuelta', 'Segunda Vuelta'],
-                        y=[porcentajes_1ra[i], porcentajes_2da[i]],
-                        mode='lines+markers+text',
-                        name=partido,
-                        text=[f'{porcentajes_1ra[i]:.1f}%', f'{porcentajes_2da[i]:.1f}%'],
-                        textposition='top center',
-                        line=dict(width=3)
-                    ))
-                
-                fig_evolucion.update_layout(
-                    title='Evolución de Porcentajes Entre Vueltas',
-                    xaxis_title='Vuelta Electoral',
-                    yaxis_title='Porcentaje (%)',
-                    yaxis_range=[0, 60]
-                )
-                
-                st.plotly_chart(fig_evolucion, use_container_width=True)
+                if datos['evolucion'] is not None:
+                    st.plotly_chart(datos['evolucion'], use_container_width=True)
             
             with col2:
                 st.subheader("🎯 Análisis de Competitividad")
@@ -515,15 +454,265 @@ def main():
                     st.success("✅ LIBRE ganó terreno, PDC perdió apoyo")
                 else:
                     st.info("📊 Cambio mixto en las tendencias")
+
+        # Progreso del conteo desde el historial de snapshots (sin releer los CSV)
+        st.subheader("⏱️ Progreso del Conteo")
+        col_vuelta, col_rango = st.columns(2)
+        with col_vuelta:
+            vuelta = st.radio("Vuelta del historial:", ['segunda', 'primera'], format_func=lambda v: f"{v.capitalize()} Vuelta", horizontal=True)
+        with col_rango:
+            rangos = {'Todo el historial': None, 'Últimas 24 horas': 24, 'Últimas 6 horas': 6, 'Última hora': 1}
+            horas = rangos[st.selectbox("Rango:", list(rangos))]
+
+        nombre_historial = f'historial_{vuelta}'
+        progreso = obtener_agregados(
+            [nombre_historial, 'progreso_conteo'], en_vivo, {'progreso_conteo': {'vuelta': vuelta, 'horas': horas}}
+        )
+        historial = progreso[nombre_historial]
+        if horas is not None and not historial.empty:
+            historial = historial[historial.index >= historial.index[-1] - pd.Timedelta(hours=horas)]
+
+        if historial.empty:
+            st.info("Aún no hay snapshots registrados para esta vuelta: se agregan con cada actualización de los datos")
+        else:
+            ultimo = historial.iloc[-1]
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.metric("🗂️ Snapshots", f"{len(historial):,}")
+            with col2:
+                if pd.notna(ultimo['% Actas']):
+                    st.metric("📋 Actas Contadas", f"{ultimo['% Actas']:.1f}%", f"{int(ultimo['Mesas']):,} mesas", delta_color="off")
+                else:
+                    st.metric("📋 Mesas Contadas", f"{int(ultimo['Mesas']):,}")
+            with col3:
+                duracion = (historial.index[-1] - historial.index[0]) / pd.Timedelta(hours=1)
+                ritmo = (historial['Mesas'].iloc[-1] - historial['Mesas'].iloc[0]) / duracion if duracion > 0 else 0
+                st.metric("⚡ Ritmo", f"{ritmo:,.0f} mesas/hora")
+
+            if progreso['progreso_conteo'] is not None:
+                st.plotly_chart(progreso['progreso_conteo'], use_container_width=True)
+            with st.expander("Ver snapshots"):
+                st.dataframe(historial.iloc[::-1].head(MAX_FILAS_AUDITORIA), use_container_width=True)
+
+    # EXPLORADOR DE MESAS
+    elif pagina == "🔎 Explorador de Mesas":
+        st.markdown('<h2 class="sub-header">Explorador de Mesas y Recintos</h2>', unsafe_allow_html=True)
+        
+        vuelta = st.radio("Vuelta:", ['primera', 'segunda'], format_func=lambda v: f"{v.capitalize()} Vuelta", horizontal=True)
+        nombre_indice = f'indice_mesas_{vuelta}'
+        indice = obtener_agregados([nombre_indice], en_vivo)[nombre_indice]
+        
+        if indice is None:
+            aviso_por_bloques("Explorador de mesas")
+        elif indice['tabla'].empty:
+            st.warning("No hay actas disponibles para esta vuelta")
+        else:
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                departamento = st.selectbox("Departamento:", ['Todos'] + list(indice['rangos']))
+                departamento = None if departamento == 'Todos' else departamento
+            with col2:
+                recintos = recintos_de_departamento(indice, departamento) if departamento else []
+                recinto = st.selectbox("Recinto:", ['Todos'] + recintos, disabled=not departamento)
+                recinto = None if recinto == 'Todos' else recinto
+            with col3:
+                opciones_ganador = sorted(g for g in indice['tabla']['Ganador'].unique() if g)
+                ganadores = st.multiselect("Ganador de la mesa:", opciones_ganador)
+            
+            col1, col2, col3, col4 = st.columns(4)
+            with col1:
+                min_nulos = st.slider("% Nulos mínimo", 0, 100, 0)
+            with col2:
+                min_blancos = st.slider("% Blancos mínimo", 0, 100, 0)
+            with col3:
+                columnas_orden = [c for c in indice['tabla'].columns if c not in ('Departamento', 'Recinto')]
+                orden = st.selectbox("Ordenar por:", columnas_orden)
+                descendente = st.checkbox("Descendente")
+            with col4:
+                pagina_actual = st.number_input("Página:", min_value=1, value=1, step=1)
+            
+            consulta = consultar_mesas(
+                indice, departamento, recinto, ganadores, min_nulos, min_blancos,
+                orden, descendente, int(pagina_actual)
+            )
+            resumen = consulta['resumen']
+            
+            col1, col2, col3, col4 = st.columns(4)
+            with col1:
+                st.metric("📋 Mesas", f"{resumen['mesas']:,}")
+            with col2:
+                st.metric("✅ Votos Válidos", f"{resumen['votos_validos']:,}")
+            with col3:
+                st.metric("❌ Votos Nulos", f"{resumen['votos_nulos']:,}")
+            with col4:
+                st.metric("⬜ Votos Blancos", f"{resumen['votos_blancos']:,}")
+            
+            st.dataframe(consulta['filas'], use_container_width=True, hide_index=True)
+            inicio_fila = (consulta['pagina'] - 1) * MESAS_POR_PAGINA + 1 if consulta['total'] else 0
+            fin_fila = inicio_fila + len(consulta['filas']) - 1 if consulta['total'] else 0
+            st.caption(f"Mostrando {inicio_fila:,}–{fin_fila:,} de {consulta['total']:,} mesas | Página {consulta['pagina']} de {consulta['paginas']}")
+    
+    # AUDITORÍA DE ACTAS
+    elif pagina == "🚨 Auditoría de Actas":
+        st.markdown('<h2 class="sub-header">Auditoría de Integridad de Actas</h2>', unsafe_allow_html=True)
+        
+        vuelta = st.radio("Vuelta:", ['primera', 'segunda'], format_func=lambda v: f"{v.capitalize()} Vuelta", horizontal=True)
+        nombre_auditoria = f'auditoria_{vuelta}'
+        auditoria = obtener_agregados([nombre_auditoria], en_vivo)[nombre_auditoria]
+        
+        if auditoria is None:
+            aviso_por_bloques("Auditoría de actas")
+        elif not auditoria['resumen']['mesas']:
+            st.warning("No hay actas disponibles para esta vuelta")
+        else:
+            resumen = auditoria['resumen']
+            col1, col2, col3, col4, col5 = st.columns(5)
+            with col1:
+                st.metric("🚩 Mesas Marcadas", f"{resumen['marcadas']:,}", f"{resumen['marcadas'] / resumen['mesas'] * 100:.1f}% del total", delta_color="off")
+            with col2:
+                st.metric("➕ Suma ≠ Válidos", f"{resumen['suma']:,}")
+            with col3:
+                st.metric("🏷️ Sigla ≠ Ganador", f"{resumen['sigla']:,}")
+            with col4:
+                st.metric("❌ Nulos/Blancos Atípicos", f"{resumen['nulos_blancos']:,}")
+            with col5:
+                st.metric("🗳️ Votos Emitidos Atípicos", f"{resumen['emitidos']:,}")
+            
+            st.subheader("🚩 Mesas con Alertas")
+            mesas_marcadas = auditoria['mesas']
+            st.dataframe(mesas_marcadas.head(MAX_FILAS_AUDITORIA), use_container_width=True, hide_index=True)
+            if len(mesas_marcadas) > MAX_FILAS_AUDITORIA:
+                st.caption(f"Mostrando las {MAX_FILAS_AUDITORIA:,} mesas con más alertas de {len(mesas_marcadas):,}")
+            st.download_button(
+                "💾 Descargar mesas marcadas (CSV)",
+                mesas_marcadas.to_csv(index=False).encode('utf-8'),
+                file_name=f"auditoria_{vuelta}_vuelta.csv",
+                mime='text/csv'
+            )
+            
+            st.subheader("🔢 Pruebas de Dígitos")
+            st.dataframe(auditoria['digitos'], use_container_width=True, hide_index=True)
     
-    # Footer informativo
+    # VARIACIONES ENTRE VUELTAS
+    elif pagina == "🔀 Variaciones entre Vueltas":
+        st.markdown('<h2 class="sub-header">Variaciones por Mesa, Recinto y Departamento</h2>', unsafe_allow_html=True)
+        variaciones = datos['variaciones']
+        
+        if variaciones is None:
+            aviso_por_bloques("Comparación mesa a mesa")
+        elif not variaciones['emparejadas']:
+            st.info("No hay mesas presentes en ambas vueltas para comparar")
+        else:
+            mesas = variaciones['mesas']
+            col1, col2, col3, col4 = st.columns(4)
+            with col1:
+                st.metric("Mesas Emparejadas", f"{variaciones['emparejadas']:,}", f"{variaciones['cobertura']:.1f}% de la 2da vuelta", delta_color="off")
+            with col2:
+                st.metric("Swing Mediano", f"{mesas['Swing (pp)'].median():+.2f} pp")
+            with col3:
+                st.metric("Mesas hacia PDC", f"{int((mesas['Swing (pp)'] > 0).sum()):,}")
+            with col4:
+                st.metric("Mesas hacia LIBRE", f"{int((mesas['Swing (pp)'] < 0).sum()):,}")
+            
+            if datos['variaciones_departamentos'] is not None:
+                st.plotly_chart(datos['variaciones_departamentos'], use_container_width=True)
+            
+            st.subheader("🏁 Mayores Variaciones")
+            col_nivel, col_metrica, col_direccion, col_minimo = st.columns(4)
+            with col_nivel:
+                nivel = st.selectbox("Nivel:", ['mesas', 'recintos', 'departamentos'], format_func=str.capitalize)
+            with col_metrica:
+                metrica = st.selectbox("Métrica:", list(METRICAS_VARIACION), help="\n\n".join(f"**{m}**: {d}" for m, d in METRICAS_VARIACION.items()))
+            with col_direccion:
+                direccion = st.selectbox(
+                    "Dirección:", ['absoluto', 'positivo', 'negativo'],
+                    format_func={'absoluto': 'Mayor cambio', 'positivo': 'Mayor aumento', 'negativo': 'Mayor caída'}.get
+                )
+            with col_minimo:
+                # Mesas chicas dan variaciones porcentuales extremas con pocos votos
+                min_emitidos = st.number_input("Mínimo de votos emitidos:", min_value=0, value=50, step=10)
+            
+            ranking = ranking_variaciones(variaciones[nivel], metrica, MAX_FILAS_AUDITORIA, direccion, min_emitidos)
+            st.dataframe(ranking, use_container_width=True, hide_index=True)
+            st.caption(f"Mostrando hasta {MAX_FILAS_AUDITORIA:,} filas ordenadas por {metrica}. Porcentajes sobre votos emitidos.")
+    
+    # DIAGNÓSTICO (oculta)
+    elif pagina == "🩺 Diagnóstico":
+        st.markdown('<h2 class="sub-header">Diagnóstico de Rendimiento</h2>', unsafe_allow_html=True)
+        
+        almacen = metricas()
+        with almacen['lock']:
+            eventos = list(almacen['eventos'])
+            llamadas = dict(almacen['llamadas_cache'])
+            fallos = dict(almacen['fallos_cache'])
+        
+        if eventos:
+            df_eventos = pd.DataFrame(eventos)
+            
+            st.subheader("⏱️ Tiempos por Etapa y Página")
+            resumen = df_eventos.groupby(['tipo', 'nombre'])['ms'].describe(percentiles=[0.5, 0.95])
+            st.dataframe(resumen[['count', '50%', '95%', 'max']].round(1), use_container_width=True)
+            
+            tipo = st.radio("Histograma de:", ['etapa', 'rerun'], horizontal=True)
+            import plotly.express as px
+
+            fig_histograma = px.histogram(
+                df_eventos[df_eventos['tipo'] == tipo],
+                x='ms',
+                color='nombre',
+                nbins=50,
+                title=f"Distribución de tiempos ({tipo})"
+            )
+            st.plotly_chart(fig_histograma, use_container_width=True)
+            
+            st.download_button(
+                "💾 Exportar JSON lines",
+                '\n'.join(json.dumps(e, ensure_ascii=False) for e in eventos) + '\n',
+                file_name=f"diagnostico_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl",
+                mime='application/jsonl'
+            )
+        else:
+            st.info("Aún no hay mediciones registradas")
+        
+        st.subheader("🗄️ Cachés")
+        if llamadas:
+            df_cache = pd.DataFrame({'Consultas': pd.Series(llamadas), 'Fallos': pd.Series(fallos)}).fillna(0).astype(int)
+            df_cache['Aciertos'] = (df_cache['Consultas'] - df_cache['Fallos']).clip(lower=0)
+            df_cache['Tasa de Acierto (%)'] = (df_cache['Aciertos'] / df_cache['Consultas'].where(df_cache['Consultas'] > 0) * 100).round(1)
+            st.dataframe(df_cache, use_container_width=True)
+        
+        st.subheader("🧪 Perfil de un Rerun")
+        if st.button("Perfilar el próximo rerun"):
+            st.session_state['perfilar_rerun'] = True
+            st.info("El próximo rerun (por ejemplo, al cambiar de página) se perfilará con cProfile")
+        if 'perfil_rerun' in st.session_state:
+            perfil_guardado = st.session_state['perfil_rerun']
+            st.caption(f"Página perfilada: {perfil_guardado['pagina']}")
+            st.code(perfil_guardado['texto'])
+    
+    # Footer informativo: la fecha es la del último snapshot registrado, no la del rerun
+    actualizacion = ultima_actualizacion()
     st.markdown("---")
     st.markdown("""
     <div style='text-align: center; color: #666;'>
         <p>🇧🇴 <strong>Plataforma de Visualización Electoral Bolivia 2025</strong></p>
         <p>Desarrollado para análisis de resultados de primera y segunda vuelta | Última actualización: {}</p>
     </div>
-    """.format(datetime.now().strftime('%Y-%m-%d %H:%M:%S')), unsafe_allow_html=True)
+    """.format(actualizacion.strftime('%Y-%m-%d %H:%M:%S') if actualizacion else 'sin datos registrados'), unsafe_allow_html=True)
+    
+    # Latencia del rerun por página, para detectar páginas lentas
+    latencias = st.session_state.setdefault('latencias_pagina', {})
+    latencias[pagina] = (time.perf_counter() - inicio_rerun) * 1000
+    registrar_evento('rerun', pagina, latencias[pagina], en_vivo=en_vivo)
+    
+    if perfil is not None:
+        perfil.disable()
+        salida = io.StringIO()
+        pstats.Stats(perfil, stream=salida).sort_stats('cumulative').print_stats(40)
+        st.session_state['perfil_rerun'] = {'pagina': pagina, 'texto': salida.getvalue()}
+    with st.sidebar.expander("⏱️ Latencia por página"):
+        for nombre, ms in latencias.items():
+            st.caption(f"{nombre}: {ms:.0f} ms")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
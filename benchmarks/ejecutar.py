@@ -0,0 +1,198 @@
+"""Benchmarks de las etapas críticas sobre actas sintéticas.
+
+Mide tiempo de pared y pico de memoria de cada etapa (detección de codificación,
+parseo, caché columnar, carga y agregación de ambas vueltas desde un CSV o desde
+fragmentos por departamento, figura del mapa), el arranque en frío de procesos
+nuevos (núcleo, precálculo por lotes e interfaz) y la latencia de rerun de cada
+página del dashboard.
+
+Uso:
+    python benchmarks/ejecutar.py --mesas 10000 100000 --codificaciones latin-1 utf-8 --json bench.jsonl
+"""
+import argparse
+import json
+import logging
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from generar_actas import escribir_rondas  # noqa: E402
+
+def _importar_app():
+    """Importar app.py sin servidor de Streamlit (modo bare)"""
+    logging.disable(logging.WARNING)
+    import app
+    return app
+
+def _limpiar_caches(nucleo):
+    """Vaciar cachés en memoria y en disco para medir etapas en frío"""
+    nucleo.ingesta._cache_codificaciones.clear()
+    nucleo.agregacion._indice_geografico_para.cache_clear()
+    # También las cachés de los directorios de fragmentos
+    for raiz, directorios, _ in os.walk('.'):
+        if nucleo.config.DIRECTORIO_CACHE_COLUMNAR in directorios:
+            shutil.rmtree(os.path.join(raiz, nucleo.config.DIRECTORIO_CACHE_COLUMNAR), ignore_errors=True)
+
+def _etapas(nucleo):
+    """Etapas a medir: (nombre, preparación, ejecución)"""
+    def en_frio():
+        _limpiar_caches(nucleo)
+
+    def nada():
+        pass
+
+    def mapa():
+        # La importación diferida de plotly se cuenta en el arranque, no en la figura
+        import plotly.express  # noqa: F401
+
+        _, _, deptos = nucleo.cargar_datos_segunda_vuelta()
+        return lambda: nucleo.crear_mapa_departamental(deptos, "Resultados por Departamento - Segunda Vuelta")
+
+    return [
+        ('detectar_codificacion', en_frio, lambda: nucleo.detectar_codificacion('primera_vuelta.csv')),
+        ('leer_actas', en_frio, lambda: nucleo.leer_actas('primera_vuelta.csv')),
+        ('cache_columnar_fria', en_frio, lambda: nucleo.leer_actas_con_cache('primera_vuelta.csv')),
+        ('cache_columnar_caliente', nada, lambda: nucleo.leer_actas_con_cache('primera_vuelta.csv')),
+        ('cargar_datos_primera_vuelta', en_frio, nucleo.cargar_datos_primera_vuelta),
+        ('cargar_datos_segunda_vuelta', en_frio, nucleo.cargar_datos_segunda_vuelta),
+        ('cargar_vueltas_paralelo', en_frio, lambda: nucleo.cargar_vueltas(['primera', 'segunda'])),
+        ('cargar_primera_por_bloques', en_frio, lambda: nucleo.cargar_vuelta_por_bloques('primera')),
+        ('crear_mapa_departamental', nada, mapa)
+    ]
+
+def medir(preparar, ejecutar):
+    """Tiempo de pared (sin tracemalloc) y pico de memoria (con tracemalloc) de una etapa"""
+    preparar()
+    inicio = time.perf_counter()
+    ejecutar()
+    segundos = time.perf_counter() - inicio
+
+    preparar()
+    tracemalloc.start()
+    try:
+        ejecutar()
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return segundos, pico / 2**20
+
+def medir_arranque(directorio, repeticiones=3):
+    """Arranque en frío (mínimo de varias corridas) de procesos nuevos: núcleo, precálculo e interfaz"""
+    entorno = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [RAIZ, os.environ.get('PYTHONPATH')])))
+    salida = os.path.join(directorio, 'precalculado')
+    comandos = [
+        ('importar_nucleo', ['-c', 'import elecciones']),
+        ('precalcular_cli', ['-m', 'elecciones', 'precalcular', '--datos', directorio, '--salida', salida]),
+        ('importar_interfaz', ['-c', 'import app'])
+    ]
+
+    resultados = []
+    for nombre, argumentos in comandos:
+        tiempos = []
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            subprocess.run([sys.executable, *argumentos], cwd=directorio, env=entorno, check=True, capture_output=True)
+            tiempos.append(time.perf_counter() - inicio)
+        resultados.append((nombre, min(tiempos)))
+    return resultados
+
+def medir_reruns(nucleo):
+    """Latencia del primer render y de un rerun posterior para cada página"""
+    from streamlit.testing.v1 import AppTest
+
+    app = _importar_app()
+    _limpiar_caches(nucleo)
+    prueba = AppTest.from_file(os.path.join(RAIZ, 'app.py'), default_timeout=600)
+    inicio = time.perf_counter()
+    prueba.run()
+    arranque = time.perf_counter() - inicio
+
+    resultados = []
+    for pagina in app.PAGINAS:
+        primera = arranque
+        if prueba.sidebar.radio[0].value != pagina:
+            prueba.sidebar.radio[0].set_value(pagina)
+            inicio = time.perf_counter()
+            prueba.run()
+            primera = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        prueba.run()
+        rerun = time.perf_counter() - inicio
+        if prueba.exception:
+            raise RuntimeError(f"{pagina}: {prueba.exception[0].message}")
+        resultados.append((pagina, primera, rerun))
+    return resultados
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks de ingesta, agregación y render")
+    parser.add_argument('--mesas', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--codificaciones', nargs='+', default=['latin-1', 'utf-8'])
+    parser.add_argument('--json', help="Archivo JSON lines donde agregar los resultados")
+    parser.add_argument('--sin-reruns', action='store_true', help="No medir la latencia de rerun por página")
+    parser.add_argument('--sin-arranque', action='store_true', help="No medir el arranque en frío de procesos nuevos")
+    parser.add_argument('--sin-fragmentos', action='store_true', help="No medir la carga desde fragmentos por departamento")
+    args = parser.parse_args()
+
+    import elecciones as nucleo
+    directorio_original = os.getcwd()
+    registros = []
+
+    for mesas in args.mesas:
+        for codificacion in args.codificaciones:
+            directorio = tempfile.mkdtemp(prefix=f"actas_{mesas}_{codificacion}_")
+            try:
+                escribir_rondas(directorio, mesas, codificacion)
+                os.chdir(directorio)
+
+                for nombre, preparar, ejecutar in _etapas(nucleo):
+                    if nombre == 'crear_mapa_departamental':
+                        ejecutar = ejecutar()
+                    segundos, pico = medir(preparar, ejecutar)
+                    registros.append({'etapa': nombre, 'mesas': mesas, 'codificacion': codificacion,
+                                      'segundos': round(segundos, 4), 'pico_mib': round(pico, 1)})
+                    print(f"{mesas:>9,} {codificacion:<8} {nombre:<30} {segundos * 1000:>9.1f} ms {pico:>8.1f} MiB")
+
+                if not args.sin_fragmentos:
+                    # Mismas actas en un CSV por departamento; una carga previa calienta el pool de procesos
+                    escribir_rondas(os.path.join(directorio, 'fragmentos'), mesas, codificacion, fragmentar=True)
+                    os.chdir(os.path.join(directorio, 'fragmentos'))
+                    nucleo.cargar_vueltas(['primera', 'segunda'])
+                    segundos, pico = medir(lambda: _limpiar_caches(nucleo), lambda: nucleo.cargar_vueltas(['primera', 'segunda']))
+                    registros.append({'etapa': 'cargar_vueltas_fragmentos', 'mesas': mesas, 'codificacion': codificacion,
+                                      'procesos': nucleo.config.MAX_PROCESOS_INGESTA,
+                                      'segundos': round(segundos, 4), 'pico_mib': round(pico, 1)})
+                    print(f"{mesas:>9,} {codificacion:<8} {'cargar_vueltas_fragmentos':<30} {segundos * 1000:>9.1f} ms {pico:>8.1f} MiB")
+                    os.chdir(directorio)
+
+                if not args.sin_arranque:
+                    for nombre, segundos in medir_arranque(directorio):
+                        registros.append({'etapa': f'arranque_{nombre}', 'mesas': mesas, 'codificacion': codificacion,
+                                          'segundos': round(segundos, 4)})
+                        print(f"{mesas:>9,} {codificacion:<8} arranque {nombre:<21} {segundos * 1000:>9.1f} ms")
+
+                if not args.sin_reruns:
+                    for pagina, primera, rerun in medir_reruns(nucleo):
+                        registros.append({'etapa': 'rerun', 'pagina': pagina, 'mesas': mesas,
+                                          'codificacion': codificacion, 'segundos_primera': round(primera, 4),
+                                          'segundos_rerun': round(rerun, 4)})
+                        print(f"{mesas:>9,} {codificacion:<8} rerun {pagina:<24} {primera * 1000:>9.1f} ms -> {rerun * 1000:.1f} ms")
+            finally:
+                os.chdir(directorio_original)
+                shutil.rmtree(directorio, ignore_errors=True)
+
+    if args.json:
+        with open(args.json, 'a', encoding='utf-8') as f:
+            for registro in registros:
+                f.write(json.dumps(registro, ensure_ascii=False) + '\n')
+
+if __name__ == "__main__":
+    main()
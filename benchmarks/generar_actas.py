@@ -0,0 +1,138 @@
+"""Generador de actas sintéticas de escala nacional para benchmarks.
+
+Uso:
+    python benchmarks/generar_actas.py --mesas 100000 --codificacion latin-1 --salida /tmp/actas [--fragmentos]
+"""
+import argparse
+import os
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+PARTIDOS_PRIMERA = ['AP', 'APB-SUMATE', 'FP', 'LIBRE', 'LYP-ADN', 'MAS-IPSP', 'PDC', 'UNIDAD']
+PARTIDOS_SEGUNDA = ['PDC', 'LIBRE']
+
+# Peso aproximado de cada departamento en el padrón
+DEPARTAMENTOS = {
+    'La Paz': 0.27, 'Santa Cruz': 0.27, 'Cochabamba': 0.18, 'Potosí': 0.07, 'Chuquisaca': 0.05,
+    'Oruro': 0.05, 'Tarija': 0.05, 'Beni': 0.04, 'Pando': 0.02
+}
+
+# Prefijos y nombres con acentos y eñes para ejercitar la detección de codificación
+PREFIJOS_RECINTO = ['U.E.', 'Escuela', 'Colegio', 'Unidad Educativa', 'Núcleo Escolar', '(Cárcel)']
+NOMBRES_RECINTO = ['San José', 'Ñuflo de Chávez', 'Simón Bolívar', 'Andrés Ibáñez', 'Germán Busch',
+                   'Juana Azurduy', 'Eduardo Abaroa', 'Señor de Mayo', 'Túpac Katari', 'La Asunción']
+
+def generar_rondas(mesas, semilla=2025, mesas_por_recinto=6):
+    """Generar primera y segunda vuelta sintéticas que comparten CódigoMesa"""
+    rng = np.random.default_rng(semilla)
+
+    nombres_depto = list(DEPARTAMENTOS)
+    pesos = np.array(list(DEPARTAMENTOS.values()))
+    depto = rng.choice(len(nombres_depto), size=mesas, p=pesos / pesos.sum())
+
+    # Recintos agrupan varias mesas consecutivas; el código es 'recinto.mesa'
+    n_recintos = max(mesas // mesas_por_recinto, 1)
+    recinto = np.sort(rng.integers(0, n_recintos, size=mesas))
+    codigo_mesa = pd.Series(recinto + 1).astype(str) + '.' + pd.Series(np.arange(1, mesas + 1)).astype(str)
+    nombres = np.array([f"{p} {n} {i}" for i, (p, n) in enumerate(
+        zip(rng.choice(PREFIJOS_RECINTO, n_recintos), rng.choice(NOMBRES_RECINTO, n_recintos)))])
+    nombre_recinto = nombres[recinto]
+    # El departamento lo fija el recinto, no la mesa
+    depto = depto[np.searchsorted(recinto, recinto)]
+
+    habilitados = rng.integers(120, 360, size=mesas)
+    participacion = rng.beta(18, 4, size=mesas)
+    emitidos = (habilitados * participacion).astype('int64')
+    nulos = rng.binomial(emitidos, 0.04)
+    blancos = rng.binomial(emitidos - nulos, 0.02)
+    validos = emitidos - nulos - blancos
+
+    # Preferencias por departamento con ruido por mesa (Dirichlet)
+    base = rng.dirichlet(np.ones(len(PARTIDOS_PRIMERA)) * 2, size=len(nombres_depto))
+    shares = _dirichlet_vectorizado(rng, base[depto] * 60)
+    votos = _repartir(rng, validos, shares)
+
+    primera = pd.DataFrame({'CódigoMesa': codigo_mesa, 'NombreRecinto': nombre_recinto})
+    primera['Sigla'] = np.array(PARTIDOS_PRIMERA)[votos.argmax(axis=1)]
+    for i, partido in enumerate(PARTIDOS_PRIMERA):
+        primera[partido] = votos[:, i]
+    primera['VotoNulo'] = nulos
+    primera['VotoBlanco'] = blancos
+    primera['VotoValido'] = validos
+
+    # Segunda vuelta: PDC vs LIBRE con más nulos y blancos
+    nulos_2 = rng.binomial(emitidos, 0.07)
+    blancos_2 = rng.binomial(emitidos - nulos_2, 0.03)
+    validos_2 = emitidos - nulos_2 - blancos_2
+    pdc = rng.binomial(validos_2, np.clip(0.5 + (shares[:, 6] - shares[:, 3]), 0.05, 0.95))
+    segunda = pd.DataFrame({
+        'CódigoMesa': codigo_mesa,
+        'NombreRecinto': nombre_recinto,
+        'NombreDepartamento': np.array(nombres_depto)[depto]
+    })
+    segunda['Sigla'] = np.where(pdc > validos_2 - pdc, 'PDC', 'LIBRE')
+    segunda['PDC'] = pdc
+    segunda['LIBRE'] = validos_2 - pdc
+    segunda['VotoNulo'] = nulos_2
+    segunda['VotoBlanco'] = blancos_2
+    segunda['VotoValido'] = validos_2
+    return primera, segunda
+
+def _dirichlet_vectorizado(rng, alfas):
+    """Muestrear una Dirichlet por fila normalizando Gammas (más rápido que un bucle)"""
+    muestras = rng.gamma(alfas)
+    return muestras / muestras.sum(axis=1, keepdims=True)
+
+def _repartir(rng, totales, proporciones):
+    """Repartir totales enteros según proporciones conservando la suma exacta por fila"""
+    votos = np.floor(totales[:, None] * proporciones).astype('int64')
+    restantes = totales - votos.sum(axis=1)
+    destino = rng.integers(0, proporciones.shape[1], size=len(totales))
+    votos[np.arange(len(totales)), destino] += restantes
+    return votos
+
+def _nombre_fragmento(departamento):
+    """Nombre de archivo de un fragmento departamental: 'La Paz' -> 'la_paz.csv'"""
+    sin_acentos = unicodedata.normalize('NFKD', departamento).encode('ascii', 'ignore').decode('ascii')
+    return sin_acentos.lower().replace(' ', '_') + '.csv'
+
+def escribir_rondas(directorio, mesas, codificacion='latin-1', semilla=2025, fragmentar=False):
+    """Escribir primera_vuelta.csv y segunda_vuelta.csv en un directorio
+
+    Con fragmentar=True cada vuelta se escribe como primera_vuelta/<departamento>.csv, como en
+    las exportaciones oficiales por departamento (la primera vuelta sin columna de departamento).
+    """
+    os.makedirs(directorio, exist_ok=True)
+    primera, segunda = generar_rondas(mesas, semilla)
+    rutas = []
+    for nombre, df in [('primera_vuelta.csv', primera), ('segunda_vuelta.csv', segunda)]:
+        ruta = os.path.join(directorio, nombre)
+        if not fragmentar:
+            df.to_csv(ruta, index=False, encoding=codificacion)
+            rutas.append(ruta)
+            continue
+
+        carpeta = os.path.splitext(ruta)[0]
+        os.makedirs(carpeta, exist_ok=True)
+        for departamento, filas in df.groupby(segunda['NombreDepartamento'], sort=True):
+            ruta_fragmento = os.path.join(carpeta, _nombre_fragmento(departamento))
+            filas.to_csv(ruta_fragmento, index=False, encoding=codificacion)
+            rutas.append(ruta_fragmento)
+    return rutas
+
+def main():
+    parser = argparse.ArgumentParser(description="Generar actas sintéticas de primera y segunda vuelta")
+    parser.add_argument('--mesas', type=int, default=10_000)
+    parser.add_argument('--codificacion', default='latin-1', choices=['latin-1', 'utf-8'])
+    parser.add_argument('--semilla', type=int, default=2025)
+    parser.add_argument('--salida', default='actas_sinteticas')
+    parser.add_argument('--fragmentos', action='store_true', help="Un CSV por departamento en lugar de uno por vuelta")
+    args = parser.parse_args()
+
+    for ruta in escribir_rondas(args.salida, args.mesas, args.codificacion, args.semilla, args.fragmentos):
+        print(f"{ruta}: {os.path.getsize(ruta) / 2**20:.1f} MiB")
+
+if __name__ == "__main__":
+    main()
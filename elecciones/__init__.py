@@ -0,0 +1,54 @@
+"""Núcleo de resultados electorales sin dependencia de Streamlit.
+
+Carga, agregación, auditoría y conteo en vivo de las actas. plotly solo se
+importa al construir una figura, así que los procesos por lotes arrancan sin él.
+"""
+import pandas as pd
+
+# Copy-on-Write permite compartir DataFrames entre sesiones sin copias defensivas (siempre activo en pandas >= 3)
+if int(pd.__version__.split('.')[0]) < 3:
+    pd.set_option('mode.copy_on_write', True)
+
+from .config import (  # noqa: E402
+    ARCHIVOS_VUELTA, DEPARTAMENTOS_OFICIALES, DIAGNOSTICO, MESAS_POR_PAGINA, PARTIDOS_PRIMERA, PARTIDOS_SEGUNDA
+)
+from .diagnostico import instrumentado, medir_etapa, metricas, registrar_cache, registrar_evento  # noqa: E402
+from .ingesta import (  # noqa: E402
+    ErrorIngesta, archivos_de_fuente, detectar_codificacion, leer_actas, leer_actas_con_cache, leer_fragmento
+)
+from .agregacion import (  # noqa: E402
+    actas_por_mesa, agregar_por_nivel, asignar_departamentos, cargar_indice_geografico, construir_indice_geografico,
+    contar_mesas, es_agregado, firma_archivos, normalizar_codigo_mesa
+)
+from .bloques import agregar_por_bloques, cargar_vuelta_por_bloques, leer_actas_por_bloques, leer_mesas_en_disco  # noqa: E402
+from .carga import (  # noqa: E402
+    cargar_datos_primera_vuelta, cargar_datos_segunda_vuelta, cargar_vuelta, cargar_vueltas, cerrar_pool_ingesta, leer_fragmentos
+)
+from .en_vivo import actualizar_incremental, cargar_datos_en_vivo, version_en_vivo  # noqa: E402
+from .mesas import construir_indice_mesas, consultar_mesas, recintos_de_departamento  # noqa: E402
+from .auditoria import auditar_actas  # noqa: E402
+from .cruce import METRICAS_VARIACION, calcular_variaciones, cruzar_mesas, indice_por_clave, ranking_variaciones  # noqa: E402
+from .proyeccion import proyectar_resultados  # noqa: E402
+from .transferencia import estimar_transferencias  # noqa: E402
+from .historial import consultar_historial, progreso_conteo, registrar_snapshot, ultima_actualizacion  # noqa: E402
+from .geometria import cargar_geometria, firma_geometria, niveles_con_geometria, precalcular_geometria  # noqa: E402
+from .figuras import crear_mapa_coropletico, crear_mapa_departamental  # noqa: E402
+from .registro import AGREGADOS, FIGURAS, FIGURAS_CON_GEOMETRIA  # noqa: E402
+
+__all__ = [
+    'ARCHIVOS_VUELTA', 'DEPARTAMENTOS_OFICIALES', 'DIAGNOSTICO', 'MESAS_POR_PAGINA', 'PARTIDOS_PRIMERA', 'PARTIDOS_SEGUNDA',
+    'instrumentado', 'medir_etapa', 'metricas', 'registrar_cache', 'registrar_evento',
+    'ErrorIngesta', 'archivos_de_fuente', 'detectar_codificacion', 'leer_actas', 'leer_actas_con_cache', 'leer_fragmento',
+    'actas_por_mesa', 'agregar_por_nivel', 'asignar_departamentos', 'cargar_indice_geografico',
+    'construir_indice_geografico', 'contar_mesas', 'es_agregado', 'firma_archivos', 'normalizar_codigo_mesa',
+    'agregar_por_bloques', 'cargar_vuelta_por_bloques', 'leer_actas_por_bloques', 'leer_mesas_en_disco',
+    'cargar_datos_primera_vuelta', 'cargar_datos_segunda_vuelta', 'cargar_vuelta', 'cargar_vueltas', 'cerrar_pool_ingesta',
+    'leer_fragmentos',
+    'actualizar_incremental', 'cargar_datos_en_vivo', 'version_en_vivo',
+    'construir_indice_mesas', 'consultar_mesas', 'recintos_de_departamento',
+    'auditar_actas', 'METRICAS_VARIACION', 'calcular_variaciones', 'cruzar_mesas', 'indice_por_clave', 'ranking_variaciones',
+    'proyectar_resultados', 'estimar_transferencias',
+    'consultar_historial', 'progreso_conteo', 'registrar_snapshot', 'ultima_actualizacion',
+    'cargar_geometria', 'firma_geometria', 'niveles_con_geometria', 'precalcular_geometria',
+    'crear_mapa_coropletico', 'crear_mapa_departamental', 'AGREGADOS', 'FIGURAS', 'FIGURAS_CON_GEOMETRIA'
+]
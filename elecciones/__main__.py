@@ -0,0 +1,161 @@
+"""Precálculo de agregados sin interfaz.
+
+Uso:
+    python -m elecciones precalcular --datos . --salida precalculado [--agregados ...] [--figuras] [--por-bloques]
+    python -m elecciones geometria --datos .
+"""
+import argparse
+import functools
+import json
+import os
+import sys
+import time
+from datetime import datetime
+from types import MappingProxyType
+
+import numpy as np
+import pandas as pd
+
+from .agregacion import firma_archivos
+from .carga import cargar_vuelta, cargar_vueltas
+from .config import AGREGACION_POR_BLOQUES, ARCHIVOS_VUELTA
+from .geometria import firma_geometria, niveles_con_geometria, precalcular_geometria
+from .ingesta import ErrorIngesta
+from .registro import AGREGADOS, FIGURAS, FIGURAS_CON_GEOMETRIA
+
+def _a_json(valor):
+    """Convertir tipos de numpy y vistas de solo lectura a tipos JSON"""
+    if isinstance(valor, np.integer):
+        return int(valor)
+    if isinstance(valor, np.floating):
+        return float(valor)
+    if isinstance(valor, np.bool_):
+        return bool(valor)
+    if isinstance(valor, (np.ndarray, tuple)):
+        return list(valor)
+    if isinstance(valor, MappingProxyType):
+        return dict(valor)
+    raise TypeError(f"Tipo no serializable: {type(valor).__name__}")
+
+def _guardar_tabla(df, ruta_base):
+    """Guardar un DataFrame en Feather (o CSV sin pyarrow); el índice con nombre pasa a columna"""
+    if df.index.name is not None:
+        df = df.reset_index()
+    try:
+        df.to_feather(f"{ruta_base}.feather")
+        return f"{ruta_base}.feather"
+    except ImportError:
+        df.to_csv(f"{ruta_base}.csv", index=False)
+        return f"{ruta_base}.csv"
+
+def _guardar(nombre, valor, salida):
+    """Guardar un agregado: tablas y arreglos en archivos propios, el resto en JSON"""
+    archivos = []
+    escalares = {}
+    partes = valor.items() if isinstance(valor, (dict, MappingProxyType)) else [(None, valor)]
+    for clave, parte in partes:
+        base = os.path.join(salida, nombre if clave is None else f"{nombre}.{clave}")
+        if isinstance(parte, pd.DataFrame):
+            archivos.append(_guardar_tabla(parte, base))
+        elif isinstance(parte, np.ndarray):
+            np.save(f"{base}.npy", parte)
+            archivos.append(f"{base}.npy")
+        else:
+            escalares['valor' if clave is None else clave] = parte
+
+    if escalares or not archivos:
+        ruta = os.path.join(salida, f"{nombre}.json")
+        with open(ruta, 'w', encoding='utf-8') as f:
+            json.dump(escalares, f, ensure_ascii=False, default=_a_json)
+        archivos.append(ruta)
+    return [os.path.basename(a) for a in archivos]
+
+def precalcular(nombres, salida, por_bloques=AGREGACION_POR_BLOQUES):
+    """Cargar las vueltas necesarias una vez y guardar cada agregado pedido en `salida`"""
+    os.makedirs(salida, exist_ok=True)
+    tiempos = {}
+    manifiesto = {}
+
+    # Todas las vueltas necesarias se cargan a la vez
+    necesarias = list(dict.fromkeys(
+        vuelta for nombre in nombres for vuelta in (FIGURAS[nombre][0] if nombre in FIGURAS else AGREGADOS[nombre][0])
+    ))
+    inicio = time.perf_counter()
+    firmas = {vuelta: firma_archivos(ARCHIVOS_VUELTA[vuelta]) for vuelta in necesarias}
+    if FIGURAS_CON_GEOMETRIA.intersection(nombres):
+        firmas['geometria'] = firma_geometria()
+    vueltas = cargar_vueltas(necesarias, functools.partial(cargar_vuelta, por_bloques=por_bloques))
+    tiempos['vueltas'] = round((time.perf_counter() - inicio) * 1000, 1)
+
+    for nombre in nombres:
+        inicio = time.perf_counter()
+        if nombre in FIGURAS:
+            _, constructor, parametros = FIGURAS[nombre]
+            figura = constructor(vueltas, **dict(parametros))
+            ruta = os.path.join(salida, f"{nombre}.plotly.json")
+            with open(ruta, 'w', encoding='utf-8') as f:
+                f.write(figura.to_json() if figura is not None else 'null')
+            manifiesto[nombre] = [os.path.basename(ruta)]
+        else:
+            manifiesto[nombre] = _guardar(nombre, AGREGADOS[nombre][1](vueltas), salida)
+        tiempos[nombre] = round((time.perf_counter() - inicio) * 1000, 1)
+
+    with open(os.path.join(salida, 'manifiesto.json'), 'w', encoding='utf-8') as f:
+        json.dump({
+            'generado': datetime.now().isoformat(timespec='seconds'),
+            'firmas': firmas,
+            'archivos': manifiesto,
+            'tiempos_ms': tiempos
+        }, f, ensure_ascii=False, indent=2, default=_a_json)
+    return tiempos
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m elecciones', description="Herramientas sin interfaz sobre las actas")
+    comandos = parser.add_subparsers(dest='comando', required=True)
+
+    precalculo = comandos.add_parser('precalcular', help="Calcular agregados y guardarlos en disco")
+    precalculo.add_argument('--datos', default='.', help="Directorio con los CSV de actas")
+    precalculo.add_argument('--salida', default='precalculado', help="Directorio de salida")
+    precalculo.add_argument('--agregados', nargs='+', choices=sorted(AGREGADOS), help="Agregados a calcular (todos por defecto)")
+    precalculo.add_argument('--figuras', action='store_true', help="Incluir también las figuras en JSON de plotly")
+    precalculo.add_argument(
+        '--por-bloques', action='store_true', default=AGREGACION_POR_BLOQUES,
+        help="Leer los CSV de a bloques sin cargar las actas en memoria (solo agregados)"
+    )
+
+    geometria = comandos.add_parser('geometria', help="Simplificar los GeoJSON locales y guardar sus niveles de detalle")
+    geometria.add_argument('--datos', default='.', help="Directorio que contiene la carpeta de geometría")
+    args = parser.parse_args(argv)
+
+    if args.comando == 'geometria':
+        os.chdir(args.datos)
+        niveles = niveles_con_geometria()
+        if not niveles:
+            print("No se encontraron archivos GeoJSON locales", file=sys.stderr)
+            return 1
+        for nivel in niveles:
+            inicio = time.perf_counter()
+            ruta = precalcular_geometria(nivel)
+            print(f"{nivel:<28} {(time.perf_counter() - inicio) * 1000:>9.1f} ms  {os.path.getsize(ruta):>9,} bytes")
+        return 0
+
+    salida = os.path.abspath(args.salida)
+    nombres = list(args.agregados or AGREGADOS)
+    if args.figuras:
+        nombres += list(FIGURAS)
+
+    # Las rutas de los CSV son relativas al directorio de datos
+    os.chdir(args.datos)
+    try:
+        tiempos = precalcular(nombres, salida, args.por_bloques)
+    except ErrorIngesta as e:
+        print(f"Error de ingesta: {e}", file=sys.stderr)
+        return 1
+
+    for nombre, ms in tiempos.items():
+        print(f"{nombre:<28} {ms:>9.1f} ms")
+    print(f"Resultados en {salida}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,261 @@
+"""Agregación de actas por nivel geográfico e índice mesa -> departamento"""
+import functools
+import os
+
+import numpy as np
+import pandas as pd
+
+from .config import (
+    ARCHIVO_GEOGRAFIA, COLUMNA_MESA, DEPARTAMENTOS_OFICIALES, NIVELES_AGREGACION
+)
+from .diagnostico import instrumentado
+from .ingesta import ErrorIngesta, archivos_de_fuente, leer_fragmento
+
+def es_agregado(actas):
+    """Actas resumidas en agregados (carga por bloques o por fragmentos) en lugar de un DataFrame por mesa
+
+    El agregado trae totales, departamentos, niveles, mesas y mesas_con_departamento; los de
+    fragmentos traen además 'cargar_mesas' para armar el DataFrame por mesa al pedirlo.
+    """
+    return isinstance(actas, dict)
+
+def contar_mesas(actas):
+    """Cantidad de mesas de una vuelta, con sus actas en memoria o agregadas"""
+    return actas['mesas'] if es_agregado(actas) else len(actas)
+
+def actas_por_mesa(actas):
+    """DataFrame por mesa de una vuelta: los fragmentos lo arman recién al pedirlo; por bloques no existe (None)"""
+    if not es_agregado(actas):
+        return actas
+    if actas.get('cargar_mesas') is None:
+        return None
+    with actas['lock']:
+        # Una sola construcción compartida por todas las sesiones que usan este snapshot
+        if actas.get('por_mesa') is None:
+            actas['por_mesa'] = actas['cargar_mesas']()
+        return actas['por_mesa']
+
+@instrumentado('agregacion')
+def agregar_por_nivel(df, nivel, partidos):
+    """Sumar votos por nivel geográfico con un único groupby"""
+    columna = NIVELES_AGREGACION[nivel]
+    if es_agregado(df):
+        # Actas agregadas por bloques o por fragmentos: el agregado ya viene calculado
+        resultado = df['departamentos'] if nivel == 'departamento' else df['niveles'].get(nivel)
+        if resultado is None:
+            resultado = pd.DataFrame(columns=partidos, dtype='int64')
+    elif columna in df.columns:
+        presentes = [p for p in partidos if p in df.columns]
+        resultado = df.groupby(columna, observed=True)[presentes].sum()
+    else:
+        resultado = pd.DataFrame(columns=[p for p in partidos if p in df.columns], dtype='int64')
+
+    # Partidos ausentes en el CSV se reportan en cero
+    resultado = resultado.reindex(columns=partidos, fill_value=0)
+    if nivel == 'departamento':
+        # Solo los 9 departamentos oficiales, todos presentes
+        resultado = resultado.reindex(DEPARTAMENTOS_OFICIALES, fill_value=0)
+    resultado.index.name = nivel.capitalize()
+    return resultado.astype('int64')
+
+def normalizar_codigo_mesa(codigos):
+    """Convertir CódigoMesa 'recinto.mesa' en una clave entera ordenable (-1 si es inválido)"""
+    if len(codigos) == 0:
+        return np.array([], dtype='int64')
+    try:
+        import pyarrow as pa
+        import pyarrow.compute as pc
+    except ImportError:
+        return _normalizar_codigo_mesa_pandas(codigos)
+
+    # Kernels de texto de Arrow: un orden de magnitud más rápido que str.partition
+    texto = pa.array(codigos.astype(str).to_numpy(dtype=object), type=pa.string(), from_pandas=True)
+    partes = pc.extract_regex(texto, r'^\s*(?P<recinto>\d+)(?:\.(?P<mesa>.*))?$')
+    mesa = pc.utf8_trim_whitespace(pc.struct_field(partes, 'mesa'))
+    mesa = pc.if_else(pc.utf8_is_digit(mesa), mesa, '0')
+    claves = pc.add(pc.multiply(pc.cast(pc.struct_field(partes, 'recinto'), pa.int64()), 1_000_000), pc.cast(mesa, pa.int64()))
+    return pc.fill_null(claves, -1).to_numpy(zero_copy_only=False).astype('int64')
+
+def _normalizar_codigo_mesa_pandas(codigos):
+    """Respaldo sin pyarrow de normalizar_codigo_mesa"""
+    partes = codigos.astype(str).str.partition('.')
+    recinto = pd.to_numeric(partes[0], errors='coerce')
+    mesa = pd.to_numeric(partes[2], errors='coerce').fillna(0)
+    claves = recinto * 1_000_000 + mesa
+    return claves.fillna(-1).astype('int64').to_numpy()
+
+def codigos_departamento(departamentos):
+    """Posición de cada departamento en DEPARTAMENTOS_OFICIALES (-1 si no es oficial)"""
+    return pd.Index(DEPARTAMENTOS_OFICIALES).get_indexer(departamentos.astype(str)).astype('int8')
+
+def construir_indice_geografico(fuentes):
+    """Construir el índice mesa -> departamento como arreglo ordenado para searchsorted"""
+    claves = []
+    codigos = []
+    recintos = []
+    for df in fuentes:
+        if 'NombreDepartamento' not in df.columns or COLUMNA_MESA not in df.columns:
+            continue
+        codigos_depto = codigos_departamento(df['NombreDepartamento'])
+        validos = codigos_depto >= 0
+        claves_fuente = normalizar_codigo_mesa(df[COLUMNA_MESA])
+        # La clave centinela -1 (código inválido o ausente) no entra al índice: todas esas mesas la comparten
+        con_clave = validos & (claves_fuente >= 0)
+        claves.append(claves_fuente[con_clave])
+        codigos.append(codigos_depto[con_clave])
+        if 'NombreRecinto' in df.columns:
+            recintos.append(pd.DataFrame({
+                'NombreRecinto': df['NombreRecinto'].astype(str)[validos],
+                'codigo': codigos_depto[validos]
+            }))
+
+    if claves:
+        claves = np.concatenate(claves)
+        codigos = np.concatenate(codigos)
+    else:
+        claves = np.array([], dtype='int64')
+        codigos = np.array([], dtype='int8')
+
+    # Ordenar y quitar claves repetidas (prevalece la primera fuente)
+    orden = np.argsort(claves, kind='stable')
+    claves, codigos = claves[orden], codigos[orden]
+    unicas = np.ones(len(claves), dtype=bool)
+    unicas[1:] = claves[1:] != claves[:-1]
+
+    # Respaldo por nombre de recinto, solo para nombres que caen en un único departamento
+    por_recinto = pd.Series(dtype='int8')
+    if recintos:
+        recintos = pd.concat(recintos, ignore_index=True).drop_duplicates()
+        conteo = recintos.groupby('NombreRecinto')['codigo'].transform('size')
+        por_recinto = recintos[conteo == 1].set_index('NombreRecinto')['codigo'].astype('int8')
+
+    return {'claves': claves[unicas], 'departamentos': codigos[unicas], 'recintos': por_recinto}
+
+@instrumentado('indice_geografico')
+def asignar_departamentos(df, indice):
+    """Agregar NombreDepartamento a las actas con un join vectorizado sobre el índice"""
+    # Un fragmento sin columna de código solo puede cruzarse por recinto
+    if COLUMNA_MESA in df.columns:
+        claves = normalizar_codigo_mesa(df[COLUMNA_MESA])
+    else:
+        claves = np.full(len(df), -1, dtype='int64')
+    posiciones = np.searchsorted(indice['claves'], claves)
+    posiciones = np.minimum(posiciones, max(len(indice['claves']) - 1, 0))
+    codigos = np.full(len(df), -1, dtype='int8')
+    if len(indice['claves']):
+        encontrados = (indice['claves'][posiciones] == claves) & (claves >= 0)
+        codigos[encontrados] = indice['departamentos'][posiciones[encontrados]]
+
+    if 'NombreRecinto' in df.columns and len(indice['recintos']):
+        faltantes = codigos < 0
+        por_nombre = df['NombreRecinto'].astype(str)[faltantes].map(indice['recintos'])
+        codigos[faltantes] = por_nombre.fillna(-1).astype('int8').to_numpy()
+
+    # Las mesas que ya traen departamento (p. ej. de un fragmento por departamento) lo conservan
+    if 'NombreDepartamento' in df.columns:
+        existentes = codigos_departamento(df['NombreDepartamento'])
+        codigos = np.where(existentes >= 0, existentes, codigos).astype('int8')
+
+    df['NombreDepartamento'] = pd.Categorical.from_codes(codigos, categories=DEPARTAMENTOS_OFICIALES)
+    return df
+
+def firma_archivos(archivos):
+    """Huella (ruta, mtime, tamaño) que cambia cuando se modifica, agrega o quita algún archivo
+
+    Las fuentes fragmentadas (directorio o glob) aportan una entrada por fragmento.
+    """
+    firma = []
+    for archivo in [a for fuente in archivos for a in (archivos_de_fuente(fuente) or [fuente])]:
+        try:
+            estado = os.stat(archivo)
+            firma.append((os.path.abspath(archivo), estado.st_mtime_ns, estado.st_size))
+        except OSError:
+            firma.append((os.path.abspath(archivo), None, None))
+    return tuple(firma)
+
+@functools.lru_cache(maxsize=2)
+def _indice_geografico_para(firma):
+    """Índice geográfico construido una vez por versión de sus archivos fuente"""
+    fuentes = []
+    for archivo, mtime, _ in firma:
+        if mtime is not None:
+            try:
+                fuentes.append(leer_fragmento(archivo))
+            except ErrorIngesta:
+                continue
+    return construir_indice_geografico(fuentes)
+
+def cargar_indice_geografico():
+    """Cargar el índice geográfico desde la tabla local y la segunda vuelta"""
+    return _indice_geografico_para(firma_archivos([ARCHIVO_GEOGRAFIA, 'segunda_vuelta.csv']))
+
+def _departamentos_simulados(resultados, partidos):
+    """Repartir totales nacionales en partes iguales entre los 9 departamentos"""
+    fila = {p: resultados.get(p, 0) // 9 for p in partidos}
+    simulados = pd.DataFrame([fila] * len(DEPARTAMENTOS_OFICIALES), index=DEPARTAMENTOS_OFICIALES)
+    simulados.index.name = 'Departamento'
+    return simulados
+
+def _tabla_departamentos(vueltas):
+    """Tabla formateada de resultados por departamento de la segunda vuelta"""
+    deptos_segunda = vueltas['segunda'][2]
+    if deptos_segunda.empty:
+        return pd.DataFrame()
+    pdc = deptos_segunda['PDC']
+    libre = deptos_segunda['LIBRE']
+    return pd.DataFrame({
+        'Departamento': deptos_segunda.index,
+        'PDC': pdc.map('{:,}'.format),
+        'LIBRE': libre.map('{:,}'.format),
+        'Total': (pdc + libre).map('{:,}'.format),
+        'Ganador': np.where(pdc > libre, 'PDC', 'LIBRE'),
+        'Diferencia': (pdc - libre).abs().map('{:,}'.format)
+    }).reset_index(drop=True)
+
+def _patrones_departamentos(vueltas):
+    """Porcentajes PDC/LIBRE por departamento con votos en segunda vuelta"""
+    deptos_segunda = vueltas['segunda'][2]
+    if deptos_segunda.empty:
+        return pd.DataFrame()
+    total = deptos_segunda['PDC'] + deptos_segunda['LIBRE']
+    con_votos = deptos_segunda[total > 0]
+    pdc_porc = con_votos['PDC'] / total[total > 0] * 100
+    return pd.DataFrame({
+        'Departamento': con_votos.index,
+        'PDC (%)': pdc_porc,
+        'LIBRE (%)': 100 - pdc_porc,
+        'Ganador': np.where(con_votos['PDC'] > con_votos['LIBRE'], 'PDC', 'LIBRE')
+    }).reset_index(drop=True)
+
+def _cambios_entre_vueltas(vueltas):
+    """Cambio de votos de PDC y LIBRE entre primera y segunda vuelta"""
+    resultados_primera = vueltas['primera'][0]
+    resultados_segunda = vueltas['segunda'][0]
+    cambios = []
+    for partido in ['PDC', 'LIBRE']:
+        voto_1ra = resultados_primera.get(partido, 0)
+        voto_2da = resultados_segunda.get(partido, 0)
+        cambio = voto_2da - voto_1ra
+        cambio_porc = (cambio / voto_1ra * 100) if voto_1ra > 0 else 0
+
+        cambios.append({
+            'Partido': partido,
+            '1ra Vuelta': f"{voto_1ra:,}",
+            '2da Vuelta': f"{voto_2da:,}",
+            'Cambio': f"{cambio:+,}",
+            'Tendencia': f"{cambio_porc:+.1f}%"
+        })
+    return pd.DataFrame(cambios)
+
+def _cobertura_primera(vueltas):
+    """Porcentaje de mesas de primera vuelta con departamento identificado"""
+    df_primera = vueltas['primera'][1]
+    if es_agregado(df_primera):
+        # Actas agregadas: solo se conservó el conteo
+        con_departamento = df_primera['mesas_con_departamento']
+        if con_departamento is None or not df_primera['mesas']:
+            return None
+        return float(con_departamento / df_primera['mesas'] * 100)
+    if 'NombreDepartamento' not in df_primera.columns or df_primera.empty:
+        return None
+    return float(df_primera['NombreDepartamento'].notna().mean() * 100)
@@ -0,0 +1,153 @@
+"""Auditoría vectorizada de integridad de actas y pruebas de dígitos"""
+import numpy as np
+import pandas as pd
+
+from .agregacion import codigos_departamento
+from .config import (
+    CHI2_CRITICO_BENFORD, CHI2_CRITICO_ULTIMO_DIGITO, COLUMNA_MESA, DEPARTAMENTOS_OFICIALES, MIN_MESAS_RECINTO,
+    MIN_VOTOS_ULTIMO_DIGITO, UMBRAL_Z_EMITIDOS, UMBRAL_Z_NULOS_BLANCOS
+)
+from .diagnostico import instrumentado
+
+def _z_robusto_por_grupo(valores, grupos, minimo=MIN_MESAS_RECINTO):
+    """Z robusto (mediana/MAD) dentro de cada grupo; grupos chicos usan la referencia global"""
+    serie = pd.Series(valores)
+    por_grupo = serie.groupby(grupos)
+    mediana = por_grupo.transform('median').to_numpy()
+    mad = (serie - mediana).abs().groupby(grupos).transform('median').to_numpy()
+    tamano = por_grupo.transform('size').to_numpy()
+
+    mediana_global = np.median(valores) if len(valores) else 0.0
+    mad_global = np.median(np.abs(valores - mediana_global)) if len(valores) else 0.0
+    usar_global = (tamano < minimo) | (mad == 0)
+    mediana = np.where(usar_global, mediana_global, mediana)
+    mad = np.where(usar_global, mad_global, mad)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        z = 0.6745 * (valores - mediana) / mad
+    return np.where(mad > 0, z, 0.0)
+
+def _pruebas_digitos(votos, grupos, nombres_grupo):
+    """Chi-cuadrado del último dígito (uniforme) y del primer dígito (Benford) por grupo"""
+    n_grupos = len(nombres_grupo)
+    filas = []
+    grupo_votos = np.repeat(grupos, votos.shape[1])
+    valores = votos.ravel()
+
+    # Último dígito: solo conteos con dos o más cifras
+    usar = (valores >= MIN_VOTOS_ULTIMO_DIGITO) & (grupo_votos >= 0)
+    conteo = np.bincount(grupo_votos[usar] * 10 + valores[usar] % 10, minlength=n_grupos * 10).reshape(n_grupos, 10)
+    esperado = conteo.sum(axis=1, keepdims=True) / 10
+
+    # Primer dígito: Benford sobre conteos positivos
+    positivos = (valores > 0) & (grupo_votos >= 0)
+    primeros = (valores[positivos] // 10 ** np.floor(np.log10(valores[positivos])).astype('int64')).astype('int64')
+    conteo_benford = np.bincount(grupo_votos[positivos] * 10 + primeros, minlength=n_grupos * 10).reshape(n_grupos, 10)[:, 1:]
+    benford = np.log10(1 + 1 / np.arange(1, 10))
+    esperado_benford = conteo_benford.sum(axis=1, keepdims=True) * benford
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        chi2 = np.nansum((conteo - esperado) ** 2 / esperado, axis=1)
+        chi2_benford = np.nansum((conteo_benford - esperado_benford) ** 2 / esperado_benford, axis=1)
+
+    for i, nombre in enumerate(nombres_grupo):
+        filas.append({
+            'Grupo': nombre,
+            'Prueba': 'Último dígito',
+            'Conteos': int(conteo[i].sum()),
+            'Chi²': round(float(chi2[i]), 2),
+            'Crítico 5%': CHI2_CRITICO_ULTIMO_DIGITO,
+            'Sospechoso': bool(chi2[i] > CHI2_CRITICO_ULTIMO_DIGITO)
+        })
+        filas.append({
+            'Grupo': nombre,
+            'Prueba': 'Benford 1er dígito',
+            'Conteos': int(conteo_benford[i].sum()),
+            'Chi²': round(float(chi2_benford[i]), 2),
+            'Crítico 5%': CHI2_CRITICO_BENFORD,
+            'Sospechoso': bool(chi2_benford[i] > CHI2_CRITICO_BENFORD)
+        })
+    return pd.DataFrame(filas)
+
+@instrumentado('auditoria')
+def auditar_actas(df, partidos):
+    """Revisar la integridad de todas las actas en una sola pasada vectorizada"""
+    n = len(df)
+    presentes = [p for p in partidos if p in df.columns]
+    votos = df[presentes].to_numpy(dtype='int64') if presentes else np.zeros((n, 1), dtype='int64')
+    nulos = df['VotoNulo'].to_numpy(dtype='int64') if 'VotoNulo' in df.columns else np.zeros(n, dtype='int64')
+    blancos = df['VotoBlanco'].to_numpy(dtype='int64') if 'VotoBlanco' in df.columns else np.zeros(n, dtype='int64')
+    suma_partidos = votos.sum(axis=1)
+    validos = df['VotoValido'].to_numpy(dtype='int64') if 'VotoValido' in df.columns else suma_partidos
+    emitidos = validos + nulos + blancos
+
+    # 1. La suma de votos por partido debe coincidir con VotoValido
+    diferencia = suma_partidos - validos
+    alerta_suma = diferencia != 0
+
+    # 2. La Sigla declarada debe ser el partido más votado (salvo empates)
+    maximo = votos.max(axis=1)
+    ganador_real = np.array(presentes or [''])[votos.argmax(axis=1)]
+    empate = (votos == maximo[:, None]).sum(axis=1) > 1
+    sigla = df['Sigla'].astype(object).fillna('').astype(str).to_numpy() if 'Sigla' in df.columns else ganador_real
+    alerta_sigla = (sigla != ganador_real) & ~empate & (maximo > 0) & (sigla != '')
+
+    # 3. Proporción de nulos y blancos atípica frente a su recinto
+    with np.errstate(divide='ignore', invalid='ignore'):
+        porc_nulos = np.where(emitidos > 0, nulos / emitidos, 0.0)
+        porc_blancos = np.where(emitidos > 0, blancos / emitidos, 0.0)
+    recinto = pd.Categorical(df['NombreRecinto'].astype(object).fillna('')).codes if 'NombreRecinto' in df.columns else np.zeros(n)
+    z_nulos = _z_robusto_por_grupo(porc_nulos, recinto)
+    z_blancos = _z_robusto_por_grupo(porc_blancos, recinto)
+    alerta_nulos = (z_nulos > UMBRAL_Z_NULOS_BLANCOS) | (z_blancos > UMBRAL_Z_NULOS_BLANCOS)
+
+    # 4. Votos emitidos atípicos dentro de su departamento: sin padrón de habilitados no es una tasa de participación
+    if 'NombreDepartamento' in df.columns:
+        depto = codigos_departamento(df['NombreDepartamento']).astype('int64')
+    else:
+        depto = np.full(n, -1, dtype='int64')
+    por_depto = pd.Series(emitidos, dtype='float64').groupby(depto)
+    media = por_depto.transform('mean').to_numpy()
+    desviacion = por_depto.transform('std').to_numpy()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        z_emitidos = np.where(desviacion > 0, (emitidos - media) / desviacion, 0.0)
+    alerta_emitidos = np.abs(z_emitidos) > UMBRAL_Z_EMITIDOS
+
+    # 5. Pruebas de dígitos por departamento y a nivel nacional
+    nombres_grupo = ['Nacional'] + DEPARTAMENTOS_OFICIALES
+    digitos = pd.concat([
+        _pruebas_digitos(votos, np.zeros(n, dtype='int64'), nombres_grupo[:1]),
+        _pruebas_digitos(votos, depto, DEPARTAMENTOS_OFICIALES)
+    ], ignore_index=True)
+    digitos = digitos[digitos['Conteos'] > 0].reset_index(drop=True)
+
+    alertas = alerta_suma.astype('int8') + alerta_sigla + alerta_nulos + alerta_emitidos
+    marcadas = np.flatnonzero(alertas > 0)
+    tabla = pd.DataFrame({
+        'Mesa': df[COLUMNA_MESA].astype(str).to_numpy()[marcadas] if COLUMNA_MESA in df.columns else marcadas.astype(str),
+        'Recinto': df['NombreRecinto'].astype(object).to_numpy()[marcadas] if 'NombreRecinto' in df.columns else '',
+        'Departamento': np.array(['Sin departamento'] + DEPARTAMENTOS_OFICIALES)[depto[marcadas] + 1],
+        'Alertas': alertas[marcadas],
+        'Suma ≠ Válidos': alerta_suma[marcadas],
+        'Sigla ≠ Ganador': alerta_sigla[marcadas],
+        'Nulos/Blancos Atípicos': alerta_nulos[marcadas],
+        'Votos Emitidos Atípicos': alerta_emitidos[marcadas],
+        'Suma Partidos': suma_partidos[marcadas],
+        'VotoValido': validos[marcadas],
+        'Sigla': sigla[marcadas],
+        'Ganador Real': ganador_real[marcadas],
+        '% Nulos': (porc_nulos[marcadas] * 100).round(1),
+        '% Blancos': (porc_blancos[marcadas] * 100).round(1),
+        'Z Emitidos': z_emitidos[marcadas].round(2)
+    })
+    tabla = tabla.sort_values(['Alertas', '% Nulos'], ascending=False, kind='stable').reset_index(drop=True)
+
+    resumen = {
+        'mesas': n,
+        'suma': int(alerta_suma.sum()),
+        'sigla': int(alerta_sigla.sum()),
+        'nulos_blancos': int(alerta_nulos.sum()),
+        'emitidos': int(alerta_emitidos.sum()),
+        'marcadas': len(marcadas)
+    }
+    return {'mesas': tabla, 'resumen': resumen, 'digitos': digitos}
@@ -0,0 +1,292 @@
+"""Agregación por bloques para CSV más grandes que la memoria: solo se conservan acumuladores"""
+import codecs
+import functools
+import io
+import os
+
+import numpy as np
+import pandas as pd
+
+from .agregacion import (
+    _departamentos_simulados, agregar_por_nivel, asignar_departamentos, construir_indice_geografico, normalizar_codigo_mesa
+)
+from .config import (
+    ARCHIVO_GEOGRAFIA, COLUMNA_MESA, COLUMNAS_CATEGORICAS, DEPARTAMENTOS_OFICIALES, FILAS_POR_BLOQUE, INDICE_MESAS_EN_DISCO,
+    NIVELES_AGREGACION, PARTIDOS_PRIMERA, PARTIDOS_SEGUNDA
+)
+from .diagnostico import instrumentado
+from .ingesta import (
+    ErrorIngesta, _aplicar_tipos, _borrar_versiones_viejas, _motor_disponible, _ruta_cache_columnar, archivos_de_fuente,
+    departamento_de_archivo, detectar_codificacion
+)
+
+def _codificacion_valida(archivo):
+    """Codificación detectada, o latin-1 si el nombre detectado no es un códec conocido"""
+    codificacion = detectar_codificacion(archivo)
+    try:
+        codecs.lookup(codificacion)
+    except LookupError:
+        return 'latin-1'
+    return codificacion
+
+def leer_actas_por_bloques(archivo, filas=FILAS_POR_BLOQUE, codificacion=None):
+    """Iterar un CSV de actas en DataFrames tipados de a `filas` filas
+
+    La codificación se valida mientras se leen los bloques. Si falla antes del primer bloque se
+    relee en latin-1 (igual que la lectura completa); si falla después, los bloques ya entregados
+    no se pueden retirar y se levanta ErrorIngesta de 'decodificación': ver _por_archivo.
+    """
+    etapa = 'decodificación'
+    try:
+        codificacion = codificacion or _codificacion_valida(archivo)
+        tipos = {COLUMNA_MESA: str}
+        tipos.update({columna: 'category' for columna in COLUMNAS_CATEGORICAS})
+        departamento = departamento_de_archivo(archivo)
+
+        etapa = 'lectura'
+        entregados = 0
+        releer = False
+        with open(archivo, 'rb') as f:
+            etapa = 'parseo'
+            try:
+                # Decodificado a medida que se lee: no hay una pasada previa sobre todo el archivo
+                texto = io.TextIOWrapper(f, encoding=codificacion, newline='')
+                # El motor pyarrow no admite chunksize
+                with pd.read_csv(texto, dtype=tipos, chunksize=filas, engine='c') as lector:
+                    for bloque in lector:
+                        bloque = _aplicar_tipos(bloque)
+                        # Igual que leer_fragmento: el nombre del archivo aporta el departamento que falta
+                        if departamento and ('NombreDepartamento' not in bloque.columns or bloque['NombreDepartamento'].isna().all()):
+                            codigos = np.full(len(bloque), DEPARTAMENTOS_OFICIALES.index(departamento), dtype='int8')
+                            bloque['NombreDepartamento'] = pd.Categorical.from_codes(codigos, categories=DEPARTAMENTOS_OFICIALES)
+                        entregados += 1
+                        yield bloque
+            except UnicodeDecodeError as e:
+                if entregados:
+                    raise ErrorIngesta('decodificación', archivo, e) from e
+                releer = True
+        if releer:
+            yield from leer_actas_por_bloques(archivo, filas, codificacion='latin-1')
+    except ErrorIngesta:
+        raise
+    except Exception as e:
+        raise ErrorIngesta(etapa, archivo, e) from e
+
+def _por_archivo(archivo, filas, consumir):
+    """Resultado de `consumir` sobre los bloques de un archivo, releído entero en latin-1 si la decodificación falla a mitad de camino"""
+    try:
+        return consumir(leer_actas_por_bloques(archivo, filas))
+    except ErrorIngesta as e:
+        if e.etapa != 'decodificación' or not isinstance(e.causa, UnicodeDecodeError):
+            raise
+        # Como la lectura completa: todo el archivo en latin-1, descartando lo acumulado de este archivo
+        return consumir(leer_actas_por_bloques(archivo, filas, codificacion='latin-1'))
+
+def _acumulador_nuevo(partidos):
+    """Acumuladores vacíos: totales, departamentos, demás niveles y cantidad de mesas"""
+    return {
+        'partidos': partidos,
+        'totales': {},
+        'departamentos': np.zeros((len(DEPARTAMENTOS_OFICIALES), len(partidos)), dtype='int64'),
+        'con_departamento': False,
+        'mesas_con_departamento': 0,
+        'niveles': {},
+        'mesas': 0
+    }
+
+def _sumar_unidades(nivel, unidades, votos):
+    """Sumar filas de votos a las unidades de un nivel: posición fija por nombre en una matriz que crece al doble"""
+    posiciones = nivel['posiciones']
+    filas = np.fromiter((posiciones.setdefault(u, len(posiciones)) for u in unidades), dtype=np.intp, count=len(unidades))
+    if len(posiciones) > len(nivel['votos']):
+        matriz = np.zeros((max(len(posiciones), 2 * len(nivel['votos'])), nivel['votos'].shape[1]), dtype='int64')
+        matriz[:len(nivel['votos'])] = nivel['votos']
+        nivel['votos'] = matriz
+    # Unidades distintas dentro de cada llamada: la suma indexada no pierde filas repetidas
+    nivel['votos'][filas] += votos
+
+def _acumular_bloque(acumulador, bloque):
+    """Sumar un bloque de actas a los acumuladores"""
+    partidos = acumulador['partidos']
+    acumulador['mesas'] += len(bloque)
+    for partido, votos in bloque[[p for p in partidos if p in bloque.columns]].sum().items():
+        acumulador['totales'][partido] = acumulador['totales'].get(partido, 0) + int(votos)
+
+    if 'NombreDepartamento' in bloque.columns:
+        acumulador['con_departamento'] = True
+        acumulador['mesas_con_departamento'] += int(bloque['NombreDepartamento'].notna().sum())
+        acumulador['departamentos'] += agregar_por_nivel(bloque, 'departamento', partidos).to_numpy()
+
+    # Provincias, municipios y recintos: un groupby del bloque sumado a la matriz del nivel, sin rehacer lo acumulado
+    for nivel, columna in NIVELES_AGREGACION.items():
+        if nivel == 'departamento' or columna not in bloque.columns:
+            continue
+        parcial = agregar_por_nivel(bloque, nivel, partidos)
+        if nivel not in acumulador['niveles']:
+            acumulador['niveles'][nivel] = {'posiciones': {}, 'votos': np.zeros((0, len(partidos)), dtype='int64')}
+        _sumar_unidades(acumulador['niveles'][nivel], parcial.index, parcial.to_numpy())
+
+def _combinar_acumuladores(acumulador, archivo):
+    """Sumar el acumulador de un archivo al de toda la fuente"""
+    for partido, votos in archivo['totales'].items():
+        acumulador['totales'][partido] = acumulador['totales'].get(partido, 0) + votos
+    acumulador['departamentos'] += archivo['departamentos']
+    acumulador['con_departamento'] |= archivo['con_departamento']
+    acumulador['mesas_con_departamento'] += archivo['mesas_con_departamento']
+    acumulador['mesas'] += archivo['mesas']
+    for nivel, unidades in archivo['niveles'].items():
+        if nivel not in acumulador['niveles']:
+            acumulador['niveles'][nivel] = {'posiciones': {}, 'votos': np.zeros((0, len(acumulador['partidos'])), dtype='int64')}
+        _sumar_unidades(acumulador['niveles'][nivel], list(unidades['posiciones']), unidades['votos'][:len(unidades['posiciones'])])
+
+def _tabla_mesas(bloque, partidos):
+    """Columnas del índice de mesas en disco; categorías como texto (el formato de archivo no admite diccionarios cambiantes)"""
+    import pyarrow as pa
+
+    columnas = {
+        COLUMNA_MESA: pa.array(bloque[COLUMNA_MESA].astype(str).to_numpy(dtype=object), type=pa.string()),
+        'Clave': pa.array(normalizar_codigo_mesa(bloque[COLUMNA_MESA]), type=pa.int64())
+    }
+    # Tipos explícitos: un bloque con una columna toda vacía no debe cambiar el esquema del archivo
+    for columna in ['NombreDepartamento', 'NombreProvincia', 'NombreMunicipio', 'NombreRecinto']:
+        if columna in bloque.columns:
+            valores = bloque[columna].astype(object).where(bloque[columna].notna(), None).to_numpy()
+            columnas[columna] = pa.array(valores, type=pa.string())
+    for columna in partidos + ['VotoNulo', 'VotoBlanco', 'VotoValido']:
+        if columna in bloque.columns:
+            columnas[columna] = pa.array(bloque[columna].to_numpy(dtype='int32'), type=pa.int32())
+    return pa.table(columnas)
+
+def _indice_geografico_por_bloques(filas):
+    """Índice mesa -> departamento armado leyendo sus fuentes de a bloques (solo se guardan las claves)"""
+    fuentes = [a for fuente in [ARCHIVO_GEOGRAFIA, 'segunda_vuelta.csv'] for a in archivos_de_fuente(fuente)]
+    columnas = {COLUMNA_MESA, 'NombreDepartamento', 'NombreRecinto'}
+    return construir_indice_geografico(
+        bloque
+        for archivo in fuentes
+        for bloque in _por_archivo(archivo, filas, lambda bloques: [b[[c for c in b.columns if c in columnas]] for b in bloques])
+    )
+
+def _agregar_archivo(archivo, bloques, partidos, indice, indice_mesas):
+    """Acumulador de un archivo y la ruta de su índice de mesas en disco (None si no se escribe)"""
+    acumulador = _acumulador_nuevo(partidos)
+    escritor = None
+    ruta = None
+    try:
+        for bloque in bloques:
+            # Mismo cruce con el índice geográfico que la carga completa, fila a fila
+            if indice is not None and (len(indice['claves']) or len(indice['recintos'])) and (
+                'NombreDepartamento' not in bloque.columns or bloque['NombreDepartamento'].isna().any()
+            ):
+                bloque = asignar_departamentos(bloque, indice)
+            try:
+                _acumular_bloque(acumulador, bloque)
+            except Exception as e:
+                raise ErrorIngesta('agregación', archivo, e) from e
+
+            if indice_mesas:
+                import pyarrow as pa
+
+                tabla = _tabla_mesas(bloque, partidos)
+                if escritor is None:
+                    ruta = _ruta_cache_columnar(archivo, 'mesas.arrow')
+                    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+                    escritor = pa.ipc.new_file(f"{ruta}.{os.getpid()}.tmp", tabla.schema)
+                escritor.write_table(tabla)
+    except BaseException:
+        if escritor is not None:
+            escritor.close()
+            os.remove(f"{ruta}.{os.getpid()}.tmp")
+        raise
+    if escritor is not None:
+        escritor.close()
+        os.replace(f"{ruta}.{os.getpid()}.tmp", ruta)
+        _borrar_versiones_viejas(ruta, 'mesas.arrow')
+    return acumulador, ruta
+
+@instrumentado('agregacion_por_bloques')
+def agregar_por_bloques(fuente, partidos, filas=FILAS_POR_BLOQUE, indice_mesas=INDICE_MESAS_EN_DISCO, asignar_departamento=False):
+    """Agregar una vuelta leyendo sus CSV de a bloques; la memoria queda acotada por `filas`
+
+    Devuelve totales, departamentos (None si ninguna mesa trae departamento), los demás niveles,
+    la cantidad de mesas (total y con departamento) y las rutas del índice de mesas en disco (Arrow, una por archivo).
+    """
+    acumulador = _acumulador_nuevo(partidos)
+    # El índice en disco se escribe con pyarrow; sin él solo se acumulan agregados
+    indice_mesas = indice_mesas and _motor_disponible('pyarrow') == 'pyarrow'
+    indice = _indice_geografico_por_bloques(filas) if asignar_departamento else None
+    rutas_indice = []
+    for archivo in archivos_de_fuente(fuente):
+        parcial, ruta = _por_archivo(archivo, filas, functools.partial(
+            _agregar_archivo, archivo, partidos=partidos, indice=indice, indice_mesas=indice_mesas
+        ))
+        _combinar_acumuladores(acumulador, parcial)
+        if ruta is not None:
+            rutas_indice.append(ruta)
+
+    departamentos = None
+    if acumulador['con_departamento']:
+        departamentos = pd.DataFrame(acumulador['departamentos'], index=DEPARTAMENTOS_OFICIALES, columns=partidos)
+        departamentos.index.name = 'Departamento'
+    # Las tablas de cada nivel se arman una sola vez, al final
+    niveles = {}
+    for nivel, unidades in acumulador['niveles'].items():
+        tabla = pd.DataFrame(
+            unidades['votos'][:len(unidades['posiciones'])], index=list(unidades['posiciones']), columns=partidos
+        ).sort_index()
+        tabla.index.name = nivel.capitalize()
+        niveles[nivel] = tabla
+    return {
+        'totales': acumulador['totales'],
+        'departamentos': departamentos,
+        'niveles': niveles,
+        'mesas': acumulador['mesas'],
+        'mesas_con_departamento': acumulador['mesas_con_departamento'] if acumulador['con_departamento'] else None,
+        'indice_mesas': rutas_indice
+    }
+
+def leer_mesas_en_disco(rutas, departamento=None, columnas=None):
+    """Leer del índice de mesas en disco solo las filas de un departamento, lote por lote"""
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    partes = []
+    for ruta in rutas:
+        # Mapeado en memoria: solo se copian los lotes filtrados
+        with pa.memory_map(ruta) as fuente:
+            lector = pa.ipc.open_file(fuente)
+            for i in range(lector.num_record_batches):
+                lote = lector.get_batch(i)
+                if columnas is not None:
+                    lote = lote.select([c for c in columnas if c in lote.schema.names])
+                if departamento is not None and 'NombreDepartamento' in lote.schema.names:
+                    lote = lote.filter(pc.equal(lote['NombreDepartamento'], departamento))
+                if lote.num_rows:
+                    partes.append(lote.to_pandas())
+    return pd.concat(partes, ignore_index=True) if partes else pd.DataFrame(columns=columnas)
+
+def cargar_vuelta_por_bloques(vuelta, filas=FILAS_POR_BLOQUE):
+    """Cargar una vuelta sin materializar sus actas, con la misma forma que cargar_vuelta
+
+    En lugar de las actas devuelve el agregado de agregar_por_bloques (ver es_agregado): los
+    cálculos mesa a mesa no están disponibles y los niveles geográficos salen ya sumados.
+    """
+    primera = vuelta == 'primera'
+    fuente = 'primera_vuelta.csv' if primera else 'segunda_vuelta.csv'
+    partidos = PARTIDOS_PRIMERA if primera else PARTIDOS_SEGUNDA
+    if not archivos_de_fuente(fuente):
+        return {}, pd.DataFrame(), pd.DataFrame()
+
+    agregado = agregar_por_bloques(fuente, partidos, filas, asignar_departamento=primera)
+    totales = agregado['totales']
+    if primera:
+        resultados = {p: totales[p] for p in partidos if p in totales}
+    else:
+        resultados = {p: totales.get(p, 0) for p in partidos}
+
+    departamentos = agregado['departamentos']
+    if departamentos is None:
+        simulados = ['AP', 'PDC', 'LIBRE', 'MAS-IPSP'] if primera else partidos
+        departamentos = _departamentos_simulados(resultados, simulados)
+
+    return resultados, agregado, departamentos
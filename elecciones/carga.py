@@ -0,0 +1,237 @@
+"""Carga de vueltas desde un CSV o desde fragmentos parseados en paralelo"""
+import atexit
+import functools
+import multiprocessing
+import operator
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import pandas as pd
+
+from .agregacion import (
+    _departamentos_simulados, agregar_por_nivel, asignar_departamentos, cargar_indice_geografico, es_agregado
+)
+from .bloques import cargar_vuelta_por_bloques
+from .config import (
+    AGREGACION_POR_BLOQUES, COLUMNAS_CATEGORICAS, MAX_PROCESOS_INGESTA, NIVELES_AGREGACION, PARTIDOS_PRIMERA,
+    PARTIDOS_SEGUNDA
+)
+from .diagnostico import instrumentado
+from .ingesta import ErrorIngesta, archivos_de_fuente, leer_fragmento
+
+# Pool de procesos compartido por todas las vueltas; se crea al primer uso
+_POOL = {'lock': threading.Lock(), 'ejecutor': None}
+
+def _pool_ingesta():
+    """Pool de procesos para parsear fragmentos"""
+    with _POOL['lock']:
+        if _POOL['ejecutor'] is None:
+            # spawn: el proceso de la interfaz tiene hilos y fork podría heredar locks tomados
+            _POOL['ejecutor'] = ProcessPoolExecutor(
+                max_workers=MAX_PROCESOS_INGESTA,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return _POOL['ejecutor']
+
+@atexit.register
+def cerrar_pool_ingesta():
+    """Terminar los procesos del pool; se vuelve a crear en la próxima carga fragmentada"""
+    with _POOL['lock']:
+        ejecutor, _POOL['ejecutor'] = _POOL['ejecutor'], None
+    if ejecutor is not None:
+        ejecutor.shutdown(wait=True, cancel_futures=True)
+
+def _sin_departamento(df):
+    """Actas con alguna mesa sin departamento (o sin la columna)"""
+    return 'NombreDepartamento' not in df.columns or bool(df['NombreDepartamento'].isna().any())
+
+def _procesar_fragmento(archivo, partidos, indice=None):
+    """Parsear un fragmento y devolver solo sus agregados parciales (tarea del pool)
+
+    Con `indice` las mesas sin departamento se cruzan con el índice geográfico dentro del proceso.
+    """
+    df = leer_fragmento(archivo)
+    try:
+        incompleto = _sin_departamento(df)
+        if indice is not None and incompleto:
+            df = asignar_departamentos(df, indice)
+        presentes = [p for p in partidos if p in df.columns]
+        con_departamento = 'NombreDepartamento' in df.columns
+        return {
+            'totales': {p: int(v) for p, v in df[presentes].sum().items()},
+            'departamentos': agregar_por_nivel(df, 'departamento', partidos) if con_departamento else None,
+            'niveles': {
+                nivel: agregar_por_nivel(df, nivel, partidos)
+                for nivel, columna in NIVELES_AGREGACION.items()
+                if nivel != 'departamento' and columna in df.columns
+            },
+            'mesas': len(df),
+            'mesas_con_departamento': int(df['NombreDepartamento'].notna().sum()) if con_departamento else None,
+            'incompleto': incompleto
+        }
+    except Exception as e:
+        raise ErrorIngesta('agregación', archivo, e) from e
+
+def _mapear_en_pool(archivos, partidos, indice):
+    """Repartir los fragmentos en el pool; si el pool se rompe se procesan en serie"""
+    # Rutas absolutas: los procesos del pool conservan el directorio de trabajo con el que nacieron
+    absolutas = [os.path.abspath(archivo) for archivo in archivos]
+    n = len(absolutas)
+    try:
+        return list(_pool_ingesta().map(_procesar_fragmento, absolutas, [partidos] * n, [indice] * n))
+    except BrokenProcessPool:
+        with _POOL['lock']:
+            _POOL['ejecutor'] = None
+        return [_procesar_fragmento(archivo, partidos, indice) for archivo in absolutas]
+
+def _sumar_niveles(parciales):
+    """Combinar las tablas de cada nivel: una sola suma por nivel sobre las unidades de todos los fragmentos"""
+    niveles = {}
+    for nivel in NIVELES_AGREGACION:
+        tablas = [parcial['niveles'][nivel] for parcial in parciales if nivel in parcial['niveles']]
+        if not tablas:
+            continue
+        # Índices categóricos con categorías distintas: se combinan como texto
+        tabla = pd.concat([t.set_axis(t.index.astype(object)) for t in tablas]).groupby(level=0).sum()
+        tabla = tabla.sort_index().astype('int64')
+        tabla.index.name = nivel.capitalize()
+        niveles[nivel] = tabla
+    return niveles
+
+def _leer_mesas_de_fragmentos(archivos, indice):
+    """DataFrame por mesa de todos los fragmentos, con el mismo cruce geográfico que sus agregados"""
+    df = pd.concat([leer_fragmento(archivo) for archivo in archivos], ignore_index=True)
+    # Fragmentos con categorías distintas se concatenan como object: se vuelven a categorizar
+    for columna in COLUMNAS_CATEGORICAS:
+        if columna in df.columns and not isinstance(df[columna].dtype, pd.CategoricalDtype):
+            df[columna] = df[columna].astype('category')
+    if indice is not None and _sin_departamento(df):
+        df = asignar_departamentos(df, indice)
+    return df
+
+def _procesar_fragmentos(archivos, partidos, indice):
+    """Agregados parciales de cada fragmento, en el pool si hay más de uno"""
+    if len(archivos) > 1 and MAX_PROCESOS_INGESTA > 1:
+        return _mapear_en_pool(archivos, partidos, indice)
+    return [_procesar_fragmento(archivo, partidos, indice) for archivo in archivos]
+
+def _indice_geografico():
+    """Índice geográfico para cruzar mesas sin departamento; None si no tiene mesas ni recintos"""
+    indice = cargar_indice_geografico()
+    return indice if len(indice['claves']) or len(indice['recintos']) else None
+
+@instrumentado('fragmentos')
+def leer_fragmentos(archivos, partidos, cruzar_departamentos=False):
+    """Leer los fragmentos de una vuelta y combinar sus agregados parciales
+
+    Un solo archivo devuelve su DataFrame por mesa. Varios devuelven el agregado combinado
+    (ver es_agregado): el DataFrame por mesa se arma recién cuando lo pide actas_por_mesa.
+    Con `cruzar_departamentos` las mesas sin departamento se cruzan con el índice geográfico.
+    """
+    if len(archivos) == 1:
+        df = leer_fragmento(archivos[0])
+        indice = _indice_geografico() if cruzar_departamentos and _sin_departamento(df) else None
+        return asignar_departamentos(df, indice) if indice is not None else df
+
+    parciales = _procesar_fragmentos(archivos, partidos, None)
+    indice = None
+    if cruzar_departamentos and any(parcial['incompleto'] for parcial in parciales):
+        indice = _indice_geografico()
+    if indice is not None:
+        # Solo los fragmentos con mesas sin departamento se vuelven a procesar, ya con el índice
+        incompletos = [i for i, parcial in enumerate(parciales) if parcial['incompleto']]
+        cruzados = _procesar_fragmentos([archivos[i] for i in incompletos], partidos, indice)
+        for i, parcial in zip(incompletos, cruzados):
+            parciales[i] = parcial
+
+    totales = {}
+    for parcial in parciales:
+        for partido, votos in parcial['totales'].items():
+            totales[partido] = totales.get(partido, 0) + votos
+
+    # Todos reindexados a los 9 departamentos y a los mismos partidos: se suman celda a celda
+    por_departamento = [parcial['departamentos'] for parcial in parciales if parcial['departamentos'] is not None]
+    con_departamento = [parcial['mesas_con_departamento'] for parcial in parciales if parcial['mesas_con_departamento'] is not None]
+    return {
+        'totales': totales,
+        'departamentos': functools.reduce(operator.add, por_departamento) if por_departamento else None,
+        'niveles': _sumar_niveles(parciales),
+        'mesas': sum(parcial['mesas'] for parcial in parciales),
+        'mesas_con_departamento': sum(con_departamento) if con_departamento else None,
+        'cargar_mesas': functools.partial(_leer_mesas_de_fragmentos, list(archivos), indice),
+        'lock': threading.Lock()
+    }
+
+def cargar_datos_primera_vuelta(fuente='primera_vuelta.csv'):
+    """Cargar y procesar datos de la primera vuelta desde un CSV o sus fragmentos (ErrorIngesta si falla)"""
+    archivos = archivos_de_fuente(fuente)
+    if not archivos:
+        return {}, pd.DataFrame(), pd.DataFrame()
+
+    # Las mesas sin departamento se cruzan con el índice geográfico (en cada fragmento, dentro del pool)
+    actas = leer_fragmentos(archivos, PARTIDOS_PRIMERA, cruzar_departamentos=True)
+
+    try:
+        if es_agregado(actas):
+            # Totales combinados desde los agregados parciales de cada fragmento
+            totales, departamentos_primera = actas['totales'], actas['departamentos']
+        else:
+            totales = {p: int(v) for p, v in actas[[p for p in PARTIDOS_PRIMERA if p in actas.columns]].sum().items()}
+            departamentos_primera = None
+            if 'NombreDepartamento' in actas.columns:
+                departamentos_primera = agregar_por_nivel(actas, 'departamento', PARTIDOS_PRIMERA)
+        resultados_primera = {p: totales[p] for p in PARTIDOS_PRIMERA if p in totales}
+
+        # Análisis por departamento - solo los 9 departamentos oficiales
+        if departamentos_primera is None:
+            # Simulación - en producción se haría el mapeo real
+            departamentos_primera = _departamentos_simulados(resultados_primera, ['AP', 'PDC', 'LIBRE', 'MAS-IPSP'])
+
+        return resultados_primera, actas, departamentos_primera
+
+    except Exception as e:
+        raise ErrorIngesta('agregación', fuente, e) from e
+
+def cargar_datos_segunda_vuelta(fuente='segunda_vuelta.csv'):
+    """Cargar y procesar datos de la segunda vuelta desde un CSV o sus fragmentos (ErrorIngesta si falla)"""
+    archivos = archivos_de_fuente(fuente)
+    if not archivos:
+        return {}, pd.DataFrame(), pd.DataFrame()
+
+    actas = leer_fragmentos(archivos, PARTIDOS_SEGUNDA)
+
+    try:
+        if es_agregado(actas):
+            totales, departamentos_segunda = actas['totales'], actas['departamentos']
+        else:
+            totales = {p: int(v) for p, v in actas[[p for p in PARTIDOS_SEGUNDA if p in actas.columns]].sum().items()}
+            departamentos_segunda = None
+            if 'NombreDepartamento' in actas.columns:
+                departamentos_segunda = agregar_por_nivel(actas, 'departamento', PARTIDOS_SEGUNDA)
+        resultados_segunda = {p: totales.get(p, 0) for p in PARTIDOS_SEGUNDA}
+
+        # Análisis por departamento para segunda vuelta - solo los 9 departamentos oficiales
+        if departamentos_segunda is None:
+            # Simulación si no hay datos de departamento - solo los 9 departamentos
+            departamentos_segunda = _departamentos_simulados(resultados_segunda, PARTIDOS_SEGUNDA)
+
+        return resultados_segunda, actas, departamentos_segunda
+
+    except Exception as e:
+        raise ErrorIngesta('agregación', fuente, e) from e
+
+def cargar_vuelta(vuelta, por_bloques=AGREGACION_POR_BLOQUES):
+    """Cargar una vuelta desde los CSV del directorio actual, sin cachés de la interfaz"""
+    if por_bloques:
+        return cargar_vuelta_por_bloques(vuelta)
+    cargar = cargar_datos_primera_vuelta if vuelta == 'primera' else cargar_datos_segunda_vuelta
+    return cargar()
+
+def cargar_vueltas(vueltas, cargar=cargar_vuelta):
+    """Cargar varias vueltas en paralelo; sus fragmentos comparten el mismo pool de procesos"""
+    if len(vueltas) < 2:
+        return {vuelta: cargar(vuelta) for vuelta in vueltas}
+    with ThreadPoolExecutor(max_workers=len(vueltas)) as ejecutor:
+        return dict(zip(vueltas, ejecutor.map(cargar, vueltas)))
@@ -0,0 +1,138 @@
+"""Constantes compartidas: geografía, partidos, esquema de actas y parámetros de ingesta"""
+import codecs
+import os
+
+# Datos geográficos de departamentos de Bolivia
+BOLIVIA_DEPARTAMENTOS = {
+    'La Paz': {'lat': -16.5, 'lon': -68.15, 'color': '#1f77b4'},
+    'Santa Cruz': {'lat': -17.8, 'lon': -63.18, 'color': '#ff7f0e'},
+    'Cochabamba': {'lat': -17.4, 'lon': -66.16, 'color': '#2ca02c'},
+    'Oruro': {'lat': -17.97, 'lon': -67.12, 'color': '#d62728'},
+    'Potosí': {'lat': -19.58, 'lon': -65.75, 'color': '#9467bd'},
+    'Chuquisaca': {'lat': -19.0, 'lon': -65.0, 'color': '#8c564b'},
+    'Tarija': {'lat': -21.53, 'lon': -64.73, 'color': '#e377c2'},
+    'Beni': {'lat': -14.83, 'lon': -64.9, 'color': '#7f7f7f'},
+    'Pando': {'lat': -11.03, 'lon': -68.75, 'color': '#bcbd22'}
+}
+
+# Lista de los 9 departamentos oficiales
+DEPARTAMENTOS_OFICIALES = ['Beni', 'Chuquisaca', 'Cochabamba', 'La Paz', 'Oruro', 'Pando', 'Potosí', 'Santa Cruz', 'Tarija']
+
+# Partidos por vuelta
+PARTIDOS_PRIMERA = ['AP', 'APB-SUMATE', 'FP', 'LIBRE', 'LYP-ADN', 'MAS-IPSP', 'PDC', 'UNIDAD']
+PARTIDOS_SEGUNDA = ['PDC', 'LIBRE']
+
+# Esquema de columnas de las actas
+COLUMNA_MESA = 'CódigoMesa'
+COLUMNAS_CATEGORICAS = ['NombreRecinto', 'Sigla', 'NombreDepartamento', 'NombreProvincia', 'NombreMunicipio']
+COLUMNAS_VOTOS = PARTIDOS_PRIMERA + ['VotoNulo', 'VotoBlanco', 'VotoValido']
+
+# Niveles geográficos de agregación y la columna que los identifica
+NIVELES_AGREGACION = {
+    'departamento': 'NombreDepartamento',
+    'provincia': 'NombreProvincia',
+    'municipio': 'NombreMunicipio',
+    'recinto': 'NombreRecinto'
+}
+
+# Tabla opcional de geografía (CódigoMesa o NombreRecinto -> NombreDepartamento) distribuida con la app
+ARCHIVO_GEOGRAFIA = 'recintos_departamento.csv'
+
+# Archivos que invalidan cada vuelta (la primera depende de la segunda a través del índice geográfico)
+ARCHIVOS_VUELTA = {
+    'primera': ['primera_vuelta.csv', ARCHIVO_GEOGRAFIA, 'segunda_vuelta.csv'],
+    'segunda': ['segunda_vuelta.csv']
+}
+
+# Filas por página en el explorador de mesas (lo único que viaja al navegador)
+MESAS_POR_PAGINA = 50
+
+# Umbrales de auditoría de actas
+UMBRAL_Z_EMITIDOS = 3.0
+UMBRAL_Z_NULOS_BLANCOS = 3.5
+MIN_MESAS_RECINTO = 3
+MIN_VOTOS_ULTIMO_DIGITO = 10
+
+# Valores críticos chi-cuadrado al 5%: último dígito (9 g.l.) y primer dígito de Benford (8 g.l.)
+CHI2_CRITICO_ULTIMO_DIGITO = 16.919
+CHI2_CRITICO_BENFORD = 15.507
+
+# Procesos para parsear fragmentos en paralelo (ELECCIONES_PROCESOS lo fija; 1 desactiva el pool)
+MAX_PROCESOS_INGESTA = int(os.environ.get('ELECCIONES_PROCESOS', os.cpu_count() or 1))
+
+# Contracción de las matrices departamentales de transferencia hacia la nacional (fracción de la traza media)
+REGULARIZACION_TRANSFERENCIA = 0.05
+
+# Agregación por bloques para CSV más grandes que la memoria (ELECCIONES_POR_BLOQUES=1 la activa):
+# no se conservan las actas, solo acumuladores y, opcionalmente, un índice de mesas en disco
+AGREGACION_POR_BLOQUES = os.environ.get('ELECCIONES_POR_BLOQUES') == '1'
+FILAS_POR_BLOQUE = int(os.environ.get('ELECCIONES_FILAS_BLOQUE', 200_000))
+INDICE_MESAS_EN_DISCO = True
+
+# Proyección del conteo: simulaciones Monte Carlo, nivel de los intervalos y semilla (resultados estables entre reruns)
+SIMULACIONES_PROYECCION = 4000
+CONFIANZA_PROYECCION = 0.95
+SEMILLA_PROYECCION = 2025
+
+# Historial de snapshots del conteo (columnas binarias de solo agregado junto a los CSV) y cada cuántas
+# filas se guardan los totales completos en vez de diferencias: acota lo que relee una consulta por rango
+DIRECTORIO_HISTORIAL = '.historial'
+INTERVALO_CLAVES_HISTORIAL = 256
+
+# Motor de pandas para leer CSV: 'pyarrow' es más rápido pero no tolera filas mal entrecomilladas
+MOTOR_CSV = 'c'
+
+# Diagnóstico opcional: ELECCIONES_DIAGNOSTICO=1 activa las métricas de rendimiento
+DIAGNOSTICO = os.environ.get('ELECCIONES_DIAGNOSTICO') == '1'
+MAX_EVENTOS_DIAGNOSTICO = 5000
+
+# Geometría local (GeoJSON) por nivel, sin red: primero la del directorio de datos y, si falta, la incluida en el
+# repositorio (solo departamentos, con límites generalizados). Sin ninguna, el mapa departamental dibuja burbujas en
+# los centroides y los demás niveles no tienen mapa
+DIRECTORIO_GEOMETRIA = 'geo'
+DIRECTORIO_GEOMETRIA_INCLUIDA = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'geo')
+ARCHIVOS_GEOMETRIA = {
+    'departamento': 'departamentos.geojson',
+    'provincia': 'provincias.geojson',
+    'municipio': 'municipios.geojson'
+}
+
+# Propiedades de cada feature donde se busca el nombre de la unidad y el de su departamento ('padre')
+PROPIEDADES_GEOMETRIA = {
+    'departamento': ['NombreDepartamento', 'departamento', 'DEPARTAMENTO', 'NAME_1', 'nombre', 'name'],
+    'provincia': ['NombreProvincia', 'provincia', 'PROVINCIA', 'NAME_2', 'nombre', 'name'],
+    'municipio': ['NombreMunicipio', 'municipio', 'MUNICIPIO', 'NAME_3', 'nombre', 'name'],
+    'padre': ['NombreDepartamento', 'departamento', 'DEPARTAMENTO', 'NAME_1']
+}
+
+# Niveles de detalle: tolerancias de simplificación en grados (~100 m a ~9 km), de fino a grueso
+TOLERANCIAS_GEOMETRIA = [0.001, 0.005, 0.02, 0.08]
+
+# Ancho aproximado del mapa en píxeles: fija la tolerancia que ya no se distingue en pantalla
+RESOLUCION_MAPA_PX = 600
+
+# Cuantización de coordenadas en la caché de geometría (1e-5 grados ≈ 1 m)
+ESCALA_COORDENADAS = 100_000
+
+# Colores de los partidos en mapas
+COLORES_PARTIDOS = {
+    'PDC': '#1f77b4', 'LIBRE': '#ff7f0e', 'MAS-IPSP': '#2ca02c', 'UNIDAD': '#d62728',
+    'AP': '#9467bd', 'APB-SUMATE': '#8c564b', 'FP': '#e377c2', 'LYP-ADN': '#bcbd22'
+}
+COLOR_SIN_DATOS = '#d9d9d9'
+
+# Caché columnar en disco (Feather) junto a los CSV; requiere pyarrow
+DIRECTORIO_CACHE_COLUMNAR = '.cache_columnar'
+
+# Parámetros de detección de codificación: solo se analiza un prefijo acotado
+TAMANO_BLOQUE_DETECCION = 64 * 1024
+MAX_BYTES_DETECCION = 1024 * 1024
+
+# Marcas de orden de bytes reconocidas sin necesidad de chardet
+BOMS_CONOCIDOS = [
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16')
+]
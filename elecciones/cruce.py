@@ -0,0 +1,166 @@
+"""Cruce de mesas entre vueltas por CódigoMesa normalizado y variaciones (swing) por mesa, recinto y departamento"""
+import threading
+import weakref
+
+import numpy as np
+import pandas as pd
+
+from .agregacion import normalizar_codigo_mesa
+from .config import COLUMNA_MESA
+from .diagnostico import instrumentado
+
+# Índices y cruces por identidad de los DataFrames de cada snapshot; la entrada muere con ellos
+_CACHE_CRUCES = {'lock': threading.Lock(), 'indices': {}, 'cruces': {}, 'variaciones': {}}
+
+# Métricas de variación que se pueden rankear: columna y descripción
+METRICAS_VARIACION = {
+    'Swing (pp)': "Swing de dos partidos: (Δ PDC - Δ LIBRE) / 2 en puntos porcentuales",
+    'Δ PDC (pp)': "Cambio del porcentaje de PDC sobre votos emitidos",
+    'Δ LIBRE (pp)': "Cambio del porcentaje de LIBRE sobre votos emitidos",
+    'Δ Participación (%)': "Cambio relativo de votos emitidos",
+    'Δ Nulos (pp)': "Cambio del porcentaje de votos nulos"
+}
+
+def _memorizado(registro, objetos, calcular):
+    """Calcular una sola vez por combinación de DataFrames vivos"""
+    clave = tuple(id(objeto) for objeto in objetos)
+    entrada = registro.get(clave)
+    if entrada is not None and all(ref() is objeto for ref, objeto in zip(entrada[0], objetos)):
+        return entrada[1]
+
+    valor = calcular()
+    # El callback no toma el lock: puede correr durante la recolección en cualquier hilo
+    refs = tuple(weakref.ref(objeto, lambda _, c=clave: registro.pop(c, None)) for objeto in objetos)
+    with _CACHE_CRUCES['lock']:
+        registro[clave] = (refs, valor)
+    return valor
+
+def indice_por_clave(df):
+    """Índice hash CódigoMesa normalizado -> primera fila de la vuelta con esa mesa (se arma una vez por snapshot)"""
+    def construir():
+        claves = normalizar_codigo_mesa(df[COLUMNA_MESA])
+        # duplicated usa una tabla hash: O(n), sin ordenar
+        primeras = ~pd.Series(claves).duplicated().to_numpy() & (claves >= 0)
+        posiciones = np.flatnonzero(primeras)
+        return pd.Index(claves[posiciones]), posiciones
+    return _memorizado(_CACHE_CRUCES['indices'], (df,), construir)
+
+@instrumentado('cruce_mesas')
+def cruzar_mesas(df_primera, df_segunda):
+    """Posiciones (primera, segunda) de las mesas presentes en ambas vueltas, en el orden de la primera"""
+    if COLUMNA_MESA not in df_primera.columns or COLUMNA_MESA not in df_segunda.columns:
+        return np.array([], dtype='int64'), np.array([], dtype='int64')
+
+    def construir():
+        claves_1, posiciones_1 = indice_por_clave(df_primera)
+        claves_2, posiciones_2 = indice_por_clave(df_segunda)
+        # get_indexer sobre claves únicas: sondeo hash por mesa
+        encontradas = claves_2.get_indexer(claves_1)
+        presentes = encontradas >= 0
+        return posiciones_1[presentes], posiciones_2[encontradas[presentes]]
+    return _memorizado(_CACHE_CRUCES['cruces'], (df_primera, df_segunda), construir)
+
+def _votos(df, columna):
+    """Columna de votos como int64, o ceros si no existe"""
+    return df[columna].to_numpy(dtype='int64') if columna in df.columns else np.zeros(len(df), dtype='int64')
+
+def _emitidos(df):
+    """Votos emitidos por mesa: válidos más nulos y blancos"""
+    return _votos(df, 'VotoValido') + _votos(df, 'VotoNulo') + _votos(df, 'VotoBlanco')
+
+def _porcentaje(votos, emitidos):
+    """Porcentaje sobre votos emitidos (0 en mesas sin votos)"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(emitidos > 0, votos / emitidos * 100, 0.0)
+
+def _metricas_variacion(conteos):
+    """Agregar a una tabla de conteos de ambas vueltas los cambios porcentuales"""
+    emitidos_1 = conteos['Emitidos 1ra'].to_numpy(dtype='float64')
+    emitidos_2 = conteos['Emitidos 2da'].to_numpy(dtype='float64')
+    delta_pdc = _porcentaje(conteos['PDC 2da'].to_numpy(), emitidos_2) - _porcentaje(conteos['PDC 1ra'].to_numpy(), emitidos_1)
+    delta_libre = _porcentaje(conteos['LIBRE 2da'].to_numpy(), emitidos_2) - _porcentaje(conteos['LIBRE 1ra'].to_numpy(), emitidos_1)
+    delta_nulos = _porcentaje(conteos['Nulos 2da'].to_numpy(), emitidos_2) - _porcentaje(conteos['Nulos 1ra'].to_numpy(), emitidos_1)
+
+    conteos['Ganancia PDC'] = conteos['PDC 2da'] - conteos['PDC 1ra']
+    conteos['Ganancia LIBRE'] = conteos['LIBRE 2da'] - conteos['LIBRE 1ra']
+    conteos['Δ PDC (pp)'] = delta_pdc.round(2)
+    conteos['Δ LIBRE (pp)'] = delta_libre.round(2)
+    conteos['Swing (pp)'] = ((delta_pdc - delta_libre) / 2).round(2)
+    conteos['Δ Participación (%)'] = _porcentaje(emitidos_2 - emitidos_1, emitidos_1).round(2)
+    conteos['Δ Nulos (pp)'] = delta_nulos.round(2)
+    return conteos
+
+def _por_grupo(mesas, claves):
+    """Sumar los conteos de las mesas por grupo y recalcular las variaciones sobre las sumas"""
+    columnas = [c for c in mesas.columns if c.endswith(' 1ra') or c.endswith(' 2da')]
+    grupos = mesas.groupby(claves, observed=True, sort=True)
+    tabla = grupos[columnas].sum()
+    tabla.insert(0, 'Mesas', grupos.size())
+    return _metricas_variacion(tabla).reset_index()
+
+@instrumentado('variaciones')
+def calcular_variaciones(df_primera, df_segunda):
+    """Variaciones entre vueltas de las mesas emparejadas, y agregadas por recinto y departamento
+
+    Los porcentajes de recintos y departamentos se recalculan sobre los votos sumados, no se
+    promedian entre mesas. Se calcula una vez por snapshot: figuras y páginas comparten el resultado.
+    """
+    return _memorizado(_CACHE_CRUCES['variaciones'], (df_primera, df_segunda), lambda: _variaciones(df_primera, df_segunda))
+
+def _variaciones(df_primera, df_segunda):
+    """Cálculo de calcular_variaciones sin memorizar"""
+    vacio = {'mesas': pd.DataFrame(), 'recintos': pd.DataFrame(), 'departamentos': pd.DataFrame(), 'emparejadas': 0, 'cobertura': 0.0}
+    if df_primera.empty or df_segunda.empty:
+        return vacio
+    pos_1, pos_2 = cruzar_mesas(df_primera, df_segunda)
+    if not len(pos_1):
+        return vacio
+
+    primera = df_primera.iloc[pos_1]
+    segunda = df_segunda.iloc[pos_2]
+
+    # Ubicación de la mesa: la de la segunda vuelta si la trae, si no la de la primera
+    def ubicacion(columna, respaldo):
+        for df in (segunda, primera):
+            if columna in df.columns:
+                return df[columna].astype(object).fillna(respaldo).astype(str).to_numpy()
+        return np.full(len(pos_1), respaldo, dtype=object)
+
+    mesas = pd.DataFrame({
+        'Mesa': segunda[COLUMNA_MESA].astype(str).to_numpy(),
+        'Departamento': pd.Categorical(ubicacion('NombreDepartamento', 'Sin departamento')),
+        'Recinto': pd.Categorical(ubicacion('NombreRecinto', '')),
+        'PDC 1ra': _votos(primera, 'PDC'),
+        'PDC 2da': _votos(segunda, 'PDC'),
+        'LIBRE 1ra': _votos(primera, 'LIBRE'),
+        'LIBRE 2da': _votos(segunda, 'LIBRE'),
+        'Nulos 1ra': _votos(primera, 'VotoNulo'),
+        'Nulos 2da': _votos(segunda, 'VotoNulo'),
+        'Emitidos 1ra': _emitidos(primera),
+        'Emitidos 2da': _emitidos(segunda)
+    })
+    mesas = _metricas_variacion(mesas)
+
+    return {
+        'mesas': mesas,
+        'recintos': _por_grupo(mesas, ['Departamento', 'Recinto']),
+        'departamentos': _por_grupo(mesas, ['Departamento']),
+        'emparejadas': len(mesas),
+        'cobertura': float(len(mesas) / len(df_segunda) * 100)
+    }
+
+def ranking_variaciones(tabla, metrica='Swing (pp)', cantidad=50, direccion='absoluto', min_emitidos=0):
+    """Las `cantidad` filas con mayor variación: 'absoluto', 'positivo' (hacia PDC) o 'negativo'"""
+    if tabla.empty:
+        return tabla
+    if min_emitidos:
+        tabla = tabla[np.minimum(tabla['Emitidos 1ra'], tabla['Emitidos 2da']) >= min_emitidos]
+    valores = tabla[metrica].to_numpy()
+    puntaje = {'absoluto': np.abs(valores), 'positivo': valores, 'negativo': -valores}[direccion]
+    cantidad = min(cantidad, len(tabla))
+    if not cantidad:
+        return tabla.iloc[:0]
+    # argpartition es O(n): solo se ordenan las filas que se muestran
+    mejores = np.argpartition(-puntaje, cantidad - 1)[:cantidad]
+    mejores = mejores[np.argsort(-puntaje[mejores], kind='stable')]
+    return tabla.iloc[mejores].reset_index(drop=True)
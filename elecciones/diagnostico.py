@@ -0,0 +1,61 @@
+"""Instrumentación opcional: tiempos por etapa y contadores de caché del proceso"""
+import functools
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from datetime import datetime
+
+from .config import DIAGNOSTICO, MAX_EVENTOS_DIAGNOSTICO
+
+# Métricas de rendimiento compartidas por todas las sesiones del proceso
+_METRICAS = {
+    'lock': threading.Lock(),
+    'eventos': deque(maxlen=MAX_EVENTOS_DIAGNOSTICO),
+    'llamadas_cache': Counter(),
+    'fallos_cache': Counter()
+}
+
+def metricas():
+    """Almacén de métricas del proceso (eventos y contadores de caché)"""
+    return _METRICAS
+
+def registrar_evento(tipo, nombre, ms, **extra):
+    """Registrar una medición de tiempo si el diagnóstico está activo"""
+    if not DIAGNOSTICO:
+        return
+    almacen = metricas()
+    evento = {'ts': datetime.now().isoformat(timespec='milliseconds'), 'tipo': tipo, 'nombre': nombre, 'ms': round(ms, 3)}
+    evento.update(extra)
+    with almacen['lock']:
+        almacen['eventos'].append(evento)
+
+def registrar_cache(nombre, fallo=False):
+    """Contar una consulta a una caché; los fallos se registran desde la función cacheada"""
+    if not DIAGNOSTICO:
+        return
+    almacen = metricas()
+    with almacen['lock']:
+        almacen['fallos_cache' if fallo else 'llamadas_cache'][nombre] += 1
+
+@contextmanager
+def medir_etapa(nombre):
+    """Medir la duración de una etapa; sin diagnóstico no agrega costo"""
+    if not DIAGNOSTICO:
+        yield
+        return
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        registrar_evento('etapa', nombre, (time.perf_counter() - inicio) * 1000)
+
+def instrumentado(etapa):
+    """Decorador que mide cada llamada a la función como una etapa"""
+    def decorador(funcion):
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            with medir_etapa(etapa):
+                return funcion(*args, **kwargs)
+        return envoltura
+    return decorador
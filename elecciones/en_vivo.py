@@ -0,0 +1,243 @@
+"""Conteo en vivo: ingesta incremental de las actas agregadas a un CSV en crecimiento"""
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from .agregacion import asignar_departamentos, cargar_indice_geografico, codigos_departamento
+from .config import COLUMNA_MESA, COLUMNAS_CATEGORICAS, COLUMNAS_VOTOS, DEPARTAMENTOS_OFICIALES
+from .diagnostico import instrumentado
+from .ingesta import ErrorIngesta, _aplicar_tipos, _decodificar, _parsear_texto, detectar_codificacion
+
+# Estados de ingesta incremental compartidos por todas las sesiones del proceso
+_REGISTRO_INCREMENTAL = {'lock': threading.Lock(), 'estados': {}}
+
+def _estado_incremental_nuevo(partidos, version=0):
+    """Estado vacío: posición leída, acumuladores de totales y la tabla de actas por mesa
+
+    version se conserva entre reinicios para que la firma del snapshot nunca se repita.
+    """
+    return {
+        'offset': 0,
+        'encabezado': None,
+        'codificacion': None,
+        'partidos': partidos,
+        'columnas': None,
+        'totales': None,
+        'por_departamento': None,
+        'tabla': None,
+        'posiciones': {},
+        'version': version,
+        'actas': None,
+        'version_actas': -1
+    }
+
+def _reiniciar(estado):
+    """Volver a leer el archivo desde cero con una versión nueva"""
+    estado.update(_estado_incremental_nuevo(estado['partidos'], estado['version'] + 1))
+
+def _tabla_nueva(delta):
+    """Buffers por columna del primer lote: votos en int32, categóricas como códigos y el resto como object"""
+    tabla = {'filas': 0, 'columnas': {}, 'categorias': {}, 'tipos': {}}
+    for columna in delta.columns:
+        if columna in COLUMNAS_CATEGORICAS:
+            tabla['categorias'][columna] = {}
+        tipo = 'int32' if columna in COLUMNAS_VOTOS or columna in COLUMNAS_CATEGORICAS else object
+        tabla['columnas'][columna] = np.empty(0, dtype=tipo)
+    return tabla
+
+def _valores_de_lote(tabla, delta, columna):
+    """Valores de una columna del lote en el formato de su buffer"""
+    if columna in tabla['categorias']:
+        if columna not in delta.columns:
+            return np.full(len(delta), -1, dtype='int32')
+        serie = delta[columna].astype('category')
+        # Las categorías nuevas van al final: los códigos de los snapshots ya entregados no cambian
+        categorias = tabla['categorias'][columna]
+        previas = len(categorias)
+        for valor in serie.cat.categories:
+            categorias.setdefault(valor, len(categorias))
+        if len(categorias) != previas:
+            tabla['tipos'].pop(columna, None)
+        mapa = np.array([categorias[valor] for valor in serie.cat.categories] + [-1], dtype='int32')
+        return mapa[serie.cat.codes.to_numpy()]
+    if columna in COLUMNAS_VOTOS:
+        return delta[columna].to_numpy(dtype='int32') if columna in delta.columns else np.zeros(len(delta), dtype='int32')
+    return delta[columna].to_numpy(dtype=object) if columna in delta.columns else np.full(len(delta), None, dtype=object)
+
+def _escribir_en_tabla(tabla, delta, posiciones, nuevas):
+    """Sobrescribir las mesas corregidas y agregar las nuevas al final de los buffers"""
+    valores = {columna: _valores_de_lote(tabla, delta, columna) for columna in tabla['columnas']}
+    corregidas = ~nuevas
+    filas = tabla['filas']
+    total = filas + int(nuevas.sum())
+    # Capacidad duplicada al crecer: agregar mesas cuesta O(lote) amortizado
+    capacidad = len(next(iter(tabla['columnas'].values())))
+    if total > capacidad:
+        capacidad = max(total, 2 * capacidad, 1024)
+    for columna, buffer in tabla['columnas'].items():
+        if corregidas.any() or capacidad > len(buffer):
+            # Los snapshots entregados son vistas de estos buffers: se copian antes de tocar filas ya publicadas
+            copia = np.empty(capacidad, dtype=buffer.dtype)
+            copia[:filas] = buffer[:filas]
+            buffer = tabla['columnas'][columna] = copia
+        buffer[posiciones[corregidas]] = valores[columna][corregidas]
+        buffer[filas:total] = valores[columna][nuevas]
+    tabla['filas'] = total
+
+def _votos_en_tabla(estado, posiciones):
+    """Aporte vigente (departamento y votos) de mesas ya contadas, leído de la tabla"""
+    tabla = estado['tabla']
+    valores = np.column_stack([tabla['columnas'][c][posiciones] for c in estado['columnas']]).astype('int64')
+    if 'NombreDepartamento' not in tabla['categorias']:
+        return np.full(len(posiciones), -1, dtype='int64'), valores
+    oficiales = np.append(codigos_departamento(pd.Index(list(tabla['categorias']['NombreDepartamento']))), -1)
+    return oficiales[tabla['columnas']['NombreDepartamento'][posiciones]].astype('int64'), valores
+
+def _acumular_delta(estado, delta):
+    """Sumar un lote de actas a los acumuladores; las mesas repetidas reemplazan su aporte previo"""
+    if estado['columnas'] is None:
+        estado['columnas'] = [c for c in estado['partidos'] + ['VotoNulo', 'VotoBlanco', 'VotoValido'] if c in delta.columns]
+        estado['totales'] = np.zeros(len(estado['columnas']), dtype='int64')
+        estado['por_departamento'] = np.zeros((len(DEPARTAMENTOS_OFICIALES), len(estado['columnas'])), dtype='int64')
+        estado['tabla'] = _tabla_nueva(delta)
+
+    # Dentro del lote prevalece la última versión de cada mesa
+    delta = delta.drop_duplicates(COLUMNA_MESA, keep='last')
+    mesas = delta[COLUMNA_MESA].astype(str).tolist()
+    valores = delta[estado['columnas']].to_numpy(dtype='int64')
+    if 'NombreDepartamento' in delta.columns:
+        codigos = codigos_departamento(delta['NombreDepartamento'])
+    else:
+        codigos = np.full(len(delta), -1, dtype='int8')
+
+    # Índice mesa -> fila de la tabla: solo se tocan las filas de las mesas del lote
+    posiciones = np.fromiter((estado['posiciones'].get(mesa, -1) for mesa in mesas), dtype='int64', count=len(mesas))
+    nuevas = posiciones < 0
+
+    # Retirar el aporte anterior de las mesas corregidas o reenviadas
+    if not nuevas.all():
+        codigos_previos, valores_previos = _votos_en_tabla(estado, posiciones[~nuevas])
+        estado['totales'] -= valores_previos.sum(axis=0)
+        con_depto = codigos_previos >= 0
+        np.subtract.at(estado['por_departamento'], codigos_previos[con_depto], valores_previos[con_depto])
+
+    estado['totales'] += valores.sum(axis=0)
+    con_depto = codigos >= 0
+    np.add.at(estado['por_departamento'], codigos[con_depto], valores[con_depto])
+
+    filas = estado['tabla']['filas']
+    estado['posiciones'].update(zip((m for m, nueva in zip(mesas, nuevas) if nueva), range(filas, filas + int(nuevas.sum()))))
+    _escribir_en_tabla(estado['tabla'], delta, posiciones, nuevas)
+    estado['version'] += 1
+
+def _actas_de_tabla(tabla):
+    """DataFrame de las actas vigentes: vistas sobre los buffers, sin copiar ni deduplicar"""
+    filas = tabla['filas']
+    columnas = {}
+    for columna, buffer in tabla['columnas'].items():
+        if columna in tabla['categorias']:
+            # El tipo se valida una vez por conjunto de categorías, no en cada versión
+            if columna not in tabla['tipos']:
+                tabla['tipos'][columna] = pd.CategoricalDtype(list(tabla['categorias'][columna]))
+            columnas[columna] = pd.Categorical.from_codes(buffer[:filas], dtype=tabla['tipos'][columna])
+        elif buffer.dtype == object:
+            # object explícito: inferir el tipo str recorrería todas las mesas en cada versión
+            columnas[columna] = pd.Series(buffer[:filas], dtype=object, copy=False)
+        else:
+            columnas[columna] = buffer[:filas]
+    return pd.DataFrame(columnas, copy=False)
+
+@instrumentado('ingesta_incremental')
+def actualizar_incremental(estado, archivo):
+    """Leer y acumular solo los bytes agregados al CSV desde la última actualización"""
+    etapa = 'lectura'
+    try:
+        tamano = os.path.getsize(archivo)
+        if tamano < estado['offset']:
+            # Archivo truncado o reemplazado: se reinicia desde cero
+            _reiniciar(estado)
+        if tamano == estado['offset']:
+            return 0
+
+        with open(archivo, 'rb') as f:
+            if estado['encabezado'] is None:
+                estado['encabezado'] = f.readline()
+                estado['codificacion'] = detectar_codificacion(archivo)
+                estado['offset'] = f.tell()
+            else:
+                f.seek(0)
+                if f.readline() != estado['encabezado']:
+                    # Encabezado distinto: el archivo fue reescrito
+                    _reiniciar(estado)
+                    return actualizar_incremental(estado, archivo)
+                f.seek(estado['offset'])
+            nuevos = f.read()
+
+        # Solo líneas completas; una fila a medio escribir se procesa en la próxima lectura
+        fin = nuevos.rfind(b'\n') + 1
+        if fin == 0:
+            return 0
+        nuevos = nuevos[:fin]
+
+        etapa = 'decodificación'
+        texto = _decodificar(estado['encabezado'] + nuevos, estado['codificacion'])
+
+        etapa = 'parseo'
+        delta = _parsear_texto(texto)
+
+        etapa = 'tipos'
+        delta = _aplicar_tipos(delta)
+
+        etapa = 'agregación'
+        if 'NombreDepartamento' not in delta.columns:
+            indice = cargar_indice_geografico()
+            if len(indice['claves']) or len(indice['recintos']):
+                delta = asignar_departamentos(delta, indice)
+        _acumular_delta(estado, delta)
+
+        estado['offset'] += fin
+        return len(delta)
+    except Exception as e:
+        raise ErrorIngesta(etapa, archivo, e) from e
+
+def cargar_datos_en_vivo(archivo, partidos, errores=None):
+    """Cargar una vuelta en modo conteo en vivo, procesando solo las actas nuevas
+
+    Devuelve (versión, datos): la versión es la del estado con que se armaron los datos, leída
+    bajo el mismo lock, así que sirve de firma aunque otra sesión ingiera enseguida.
+    Un lote que no se puede ingerir no descarta lo acumulado: el error se agrega a `errores`.
+    """
+    if not os.path.exists(archivo):
+        return -1, ({}, pd.DataFrame(), pd.DataFrame())
+
+    registro = _REGISTRO_INCREMENTAL
+    with registro['lock']:
+        estado = registro['estados'].setdefault(os.path.abspath(archivo), _estado_incremental_nuevo(partidos))
+        try:
+            actualizar_incremental(estado, archivo)
+        except ErrorIngesta as e:
+            if errores is not None:
+                errores.append(e)
+        if estado['columnas'] is None:
+            return estado['version'], ({}, pd.DataFrame(), pd.DataFrame())
+
+        totales = dict(zip(estado['columnas'], estado['totales'].tolist()))
+        resultados = {p: totales[p] for p in partidos if p in totales}
+        departamentos = pd.DataFrame(
+            estado['por_departamento'], index=DEPARTAMENTOS_OFICIALES, columns=estado['columnas']
+        ).reindex(columns=partidos, fill_value=0)
+        departamentos.index.name = 'Departamento'
+
+        # El DataFrame se arma solo cuando cambió la versión, como vistas sobre la tabla por mesa
+        if estado['version_actas'] != estado['version']:
+            estado['actas'] = _actas_de_tabla(estado['tabla'])
+            estado['version_actas'] = estado['version']
+
+        return estado['version'], (resultados, estado['actas'], departamentos)
+
+def version_en_vivo(archivo):
+    """Versión del estado incremental de un archivo (cambia con cada lote de actas)"""
+    estado = _REGISTRO_INCREMENTAL['estados'].get(os.path.abspath(archivo))
+    return estado['version'] if estado else -1
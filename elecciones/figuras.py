@@ -0,0 +1,346 @@
+"""Constructores de figuras; plotly se importa solo al construir una figura"""
+import numpy as np
+import pandas as pd
+
+from .agregacion import _patrones_departamentos, agregar_por_nivel
+from .config import BOLIVIA_DEPARTAMENTOS, COLOR_SIN_DATOS, COLORES_PARTIDOS, PARTIDOS_SEGUNDA
+from .cruce import calcular_variaciones
+from .diagnostico import instrumentado
+from .geometria import cargar_geometria, seleccionar_anillos, trazos_con_separadores
+from .historial import progreso_conteo
+from .ingesta import _normalizar_nombre
+from .proyeccion import proyectar_resultados
+from .transferencia import estimar_transferencias
+
+def _figura_pie(vueltas, vuelta, titulo):
+    """Torta de distribución de votos de una vuelta"""
+    resultados = vueltas[vuelta][0]
+    if not resultados:
+        return None
+    import plotly.express as px
+
+    return px.pie(
+        values=list(resultados.values()),
+        names=list(resultados.keys()),
+        title=titulo
+    )
+
+def _figura_mapa(vueltas, vuelta, titulo):
+    """Mapa departamental de una vuelta"""
+    departamentos = vueltas[vuelta][2]
+    if departamentos.empty:
+        return None
+    return crear_mapa_departamental(departamentos, titulo)
+
+def _figura_comparativo(vueltas):
+    """Barras agrupadas de PDC y LIBRE en ambas vueltas"""
+    resultados_primera = vueltas['primera'][0]
+    resultados_segunda = vueltas['segunda'][0]
+    
+    # Datos para comparación
+    partidos = ['PDC', 'LIBRE']
+    votos_1ra = [resultados_primera.get(p, 0) for p in partidos]
+    votos_2da = [resultados_segunda.get(p, 0) for p in partidos]
+    
+    import plotly.graph_objects as go
+
+    fig_comparativo = go.Figure()
+    
+    fig_comparativo.add_trace(go.Bar(
+        name='Primera Vuelta',
+        x=partidos,
+        y=votos_1ra,
+        marker_color=['lightblue', 'lightcoral'],
+        text=[f'{v:,}' for v in votos_1ra],
+        textposition='auto'
+    ))
+    
+    fig_comparativo.add_trace(go.Bar(
+        name='Segunda Vuelta',
+        x=partidos,
+        y=votos_2da,
+        marker_color=['blue', 'red'],
+        text=[f'{v:,}' for v in votos_2da],
+        textposition='auto'
+    ))
+    
+    fig_comparativo.update_layout(
+        title='Comparación Directa: Primera vs Segunda Vuelta',
+        barmode='group',
+        xaxis_title='Partidos',
+        yaxis_title='Votos'
+    )
+    return fig_comparativo
+
+def _figura_patrones(vueltas):
+    """Barras apiladas de porcentajes PDC/LIBRE por departamento"""
+    df_patrones = _patrones_departamentos(vueltas)
+    if df_patrones.empty:
+        return None
+    import plotly.express as px
+
+    return px.bar(
+        df_patrones,
+        x='Departamento',
+        y=['PDC (%)', 'LIBRE (%)'],
+        title='Distribución Porcentual por Departamento',
+        barmode='stack',
+        color_discrete_map={'PDC (%)': '#1f77b4', 'LIBRE (%)': '#ff7f0e'}
+    )
+
+def _figura_evolucion(vueltas):
+    """Líneas de porcentaje de PDC y LIBRE entre vueltas"""
+    resultados_primera = vueltas['primera'][0]
+    resultados_segunda = vueltas['segunda'][0]
+    if not sum(resultados_primera.values()) or not sum(resultados_segunda.values()):
+        return None
+    
+    # Datos para gráfico de evolución
+    partidos = ['PDC', 'LIBRE']
+    porcentajes_1ra = [(resultados_primera.get(p, 0) / sum(resultados_primera.values()) * 100) for p in partidos]
+    porcentajes_2da = [(resultados_segunda.get(p, 0) / sum(resultados_segunda.values()) * 100) for p in partidos]
+    
+    import plotly.graph_objects as go
+
+    fig_evolucion = go.Figure()
+    
+    for i, partido in enumerate(partidos):
+        fig_evolucion.add_trace(go.Scatter(
+            x=['Primera Vuelta', 'Segunda Vuelta'],
+            y=[porcentajes_1ra[i], porcentajes_2da[i]],
+            mode='lines+markers+text',
+            name=partido,
+            text=[f'{porcentajes_1ra[i]:.1f}%', f'{porcentajes_2da[i]:.1f}%'],
+            textposition='top center',
+            line=dict(width=3)
+        ))
+    
+    fig_evolucion.update_layout(
+        title='Evolución de Porcentajes Entre Vueltas',
+        xaxis_title='Vuelta Electoral',
+        yaxis_title='Porcentaje (%)',
+        yaxis_range=[0, 60]
+    )
+    return fig_evolucion
+
+def _figura_transferencias(vueltas):
+    """Mapa de calor de la matriz nacional de transferencia de votos"""
+    matriz = estimar_transferencias(vueltas['primera'][1], vueltas['segunda'][1])['nacional']
+    if matriz.empty:
+        return None
+    import plotly.express as px
+
+    fig = px.imshow(
+        matriz,
+        text_auto='.1f',
+        color_continuous_scale='Blues',
+        zmin=0,
+        zmax=100,
+        aspect='auto',
+        labels={'x': 'Destino en 2da Vuelta', 'y': 'Origen en 1ra Vuelta', 'color': '%'},
+        title='Transferencia Estimada de Votos (% del origen)'
+    )
+    fig.update_layout(margin={"r": 0, "t": 40, "l": 0, "b": 0})
+    return fig
+
+def _figura_variaciones(vueltas):
+    """Barras del cambio porcentual de PDC y LIBRE por departamento entre vueltas"""
+    departamentos = calcular_variaciones(vueltas['primera'][1], vueltas['segunda'][1])['departamentos']
+    if departamentos.empty:
+        return None
+    import plotly.express as px
+
+    fig = px.bar(
+        departamentos,
+        x='Departamento',
+        y=['Δ PDC (pp)', 'Δ LIBRE (pp)'],
+        barmode='group',
+        title='Cambio de Porcentaje entre Vueltas por Departamento (mesas emparejadas)',
+        color_discrete_map={'Δ PDC (pp)': COLORES_PARTIDOS['PDC'], 'Δ LIBRE (pp)': COLORES_PARTIDOS['LIBRE']},
+        labels={'value': 'Puntos porcentuales', 'variable': ''}
+    )
+    fig.update_layout(margin={"r": 0, "t": 40, "l": 0, "b": 0})
+    return fig
+
+def _figura_proyeccion(vueltas):
+    """Porcentaje proyectado de PDC y LIBRE con su intervalo"""
+    proyeccion = proyectar_resultados(vueltas['primera'][1], vueltas['segunda'][1])
+    if proyeccion['proyeccion'].empty:
+        return None
+    tabla = proyeccion['proyeccion'].loc[['PDC', 'LIBRE']]
+    import plotly.graph_objects as go
+
+    fig = go.Figure(go.Bar(
+        x=tabla.index,
+        y=tabla['% Válidos'],
+        marker_color=[COLORES_PARTIDOS['PDC'], COLORES_PARTIDOS['LIBRE']],
+        error_y={
+            'type': 'data', 'symmetric': False,
+            'array': tabla['% Superior'] - tabla['% Válidos'],
+            'arrayminus': tabla['% Válidos'] - tabla['% Inferior']
+        },
+        text=[f"{v:.1f}%" for v in tabla['% Válidos']],
+        textposition='inside'
+    ))
+    fig.add_hline(y=50, line_dash='dash', line_color='gray')
+    fig.update_layout(
+        title=f"Proyección con {proyeccion['avance']:.1f}% de mesas contadas (intervalo {proyeccion['confianza']:.0%})",
+        yaxis_title='% de votos válidos',
+        yaxis_range=[0, 100],
+        height=350,
+        margin={"r": 0, "t": 40, "l": 0, "b": 0}
+    )
+    return fig
+
+def _figura_progreso(vueltas, vuelta, horas):
+    """Porcentajes de PDC y LIBRE y avance del conteo en cada snapshot registrado"""
+    tabla = progreso_conteo(vuelta, horas)
+    if tabla.empty:
+        return None
+    import plotly.graph_objects as go
+
+    fig = go.Figure()
+    for partido in PARTIDOS_SEGUNDA:
+        fig.add_trace(go.Scatter(
+            x=tabla.index, y=tabla[f'% {partido}'], mode='lines+markers', name=f'% {partido}',
+            line={'color': COLORES_PARTIDOS[partido], 'width': 3}
+        ))
+    # Sin padrón conocido el avance se mide en mesas
+    avance = '% Actas' if tabla['% Actas'].notna().any() else 'Mesas'
+    fig.add_trace(go.Scatter(
+        x=tabla.index, y=tabla[avance], mode='lines', name=avance, yaxis='y2',
+        line={'color': 'gray', 'dash': 'dot'}
+    ))
+    fig.update_layout(
+        title=f"Progreso del Conteo - {vuelta.capitalize()} Vuelta",
+        xaxis_title='Fecha',
+        yaxis={'title': '% sobre votos a partidos'},
+        yaxis2={'title': avance, 'overlaying': 'y', 'side': 'right', 'showgrid': False},
+        legend={'orientation': 'h', 'y': -0.2},
+        margin={"r": 0, "t": 40, "l": 0, "b": 0}
+    )
+    return fig
+
+def _ejes_geograficos(fig, latitud, titulo):
+    """Ejes cartesianos ocultos con la proporción de una proyección equirectangular a esa latitud"""
+    fig.update_xaxes(visible=False)
+    fig.update_yaxes(visible=False, scaleanchor='x', scaleratio=1 / np.cos(np.radians(latitud)))
+    fig.update_layout(
+        title=titulo,
+        height=500,
+        plot_bgcolor='rgba(0,0,0,0)',
+        legend_title_text='Ganador',
+        margin={"r": 0, "t": 30, "l": 0, "b": 0}
+    )
+    return fig
+
+def _resumen_unidades(datos):
+    """Ganador y texto de detalle por unidad ('Sin datos' si no tiene votos)"""
+    votos = datos.to_numpy(dtype='int64')
+    totales = votos.sum(axis=1)
+    partidos = np.asarray(datos.columns, dtype=object)
+    ganadores = np.where(totales > 0, partidos[votos.argmax(axis=1)] if len(partidos) else 'Sin datos', 'Sin datos')
+    porcentajes = votos / np.maximum(totales, 1)[:, None] * 100
+    detalles = [
+        '<br>'.join(f"{p}: {v:,} ({pc:.1f}%)" for p, v, pc in zip(partidos, fila, fila_pc))
+        for fila, fila_pc in zip(votos, porcentajes)
+    ]
+    return ganadores, totales, detalles
+
+def _figura_mapa_nivel(vueltas, nivel, departamento, titulo):
+    """Mapa de la segunda vuelta por departamento, provincia o municipio, opcionalmente de un departamento"""
+    if nivel == 'departamento':
+        datos = vueltas['segunda'][2]
+    else:
+        datos = agregar_por_nivel(vueltas['segunda'][1], nivel, PARTIDOS_SEGUNDA)
+    geometria = cargar_geometria(nivel)
+    if geometria is None:
+        return crear_mapa_departamental(datos, titulo) if nivel == 'departamento' else None
+    return crear_mapa_coropletico(datos, geometria, titulo, departamento)
+
+@instrumentado('figuras')
+def crear_mapa_coropletico(datos, geometria, titulo, departamento=None):
+    """Mapa cloroplético sin red: un trazo relleno por partido ganador con polígonos simplificados"""
+    unidades = np.arange(len(geometria['nombres']))
+    if departamento:
+        unidades = unidades[geometria['claves_padre'] == _normalizar_nombre(departamento)]
+    if not len(unidades):
+        return None
+
+    # Unidades del GeoJSON y filas de datos se emparejan por nombre sin acentos
+    claves = pd.Index([_normalizar_nombre(str(nombre)) for nombre in datos.index])
+    datos = datos.groupby(claves).sum()
+    ganadores, totales, detalles = _resumen_unidades(datos.reindex(geometria['claves'][unidades], fill_value=0))
+
+    coordenadas, inicio, unidad_anillo, nivel = seleccionar_anillos(geometria, unidades)
+    # Decimales suficientes para la tolerancia del nivel: menos bytes por coordenada
+    coordenadas = np.round(coordenadas, int(np.ceil(-np.log10(geometria['tolerancias'][nivel]))) + 1)
+    posicion = np.searchsorted(unidades, unidad_anillo)
+    largos = np.diff(inicio)
+
+    import plotly.graph_objects as go
+
+    fig = go.Figure()
+    categorias = [p for p in COLORES_PARTIDOS if p in set(ganadores)] + sorted(set(ganadores) - set(COLORES_PARTIDOS))
+    for categoria in categorias:
+        anillos = ganadores[posicion] == categoria
+        if not anillos.any():
+            continue
+        x, y = trazos_con_separadores(
+            coordenadas[np.repeat(anillos, largos)],
+            np.concatenate([[0], np.cumsum(largos[anillos])])
+        )
+        color = COLORES_PARTIDOS.get(categoria, COLOR_SIN_DATOS)
+        fig.add_trace(go.Scatter(
+            x=x, y=y, mode='lines', fill='toself', fillcolor=color, name=categoria,
+            line={'color': 'white', 'width': 0.6}, hoverinfo='skip', legendgroup=categoria
+        ))
+
+    # El detalle se muestra al pasar por la etiqueta de cada unidad, no por cada vértice
+    nombres = geometria['nombres'][unidades]
+    etiquetas = geometria['etiquetas'][unidades]
+    fig.add_trace(go.Scatter(
+        x=np.round(etiquetas[:, 0], 3), y=np.round(etiquetas[:, 1], 3),
+        mode='markers+text' if len(unidades) <= 40 else 'markers',
+        text=nombres, textfont={'size': 10}, showlegend=False,
+        marker={'size': 5, 'color': 'rgba(0,0,0,0.35)'},
+        hovertext=[f"<b>{n}</b><br>Total: {t:,}<br>{d}" for n, t, d in zip(nombres, totales, detalles)],
+        hoverinfo='text'
+    ))
+    cajas = geometria['cajas'][unidades]
+    return _ejes_geograficos(fig, (cajas[:, 1].min() + cajas[:, 3].max()) / 2, titulo)
+
+@instrumentado('figuras')
+def crear_mapa_departamental(departamentos_data, titulo):
+    """Crear mapa cloroplético de Bolivia; sin geometría local, burbujas en los centroides"""
+    geometria = cargar_geometria('departamento')
+    if geometria is not None:
+        return crear_mapa_coropletico(departamentos_data, geometria, titulo)
+
+    datos = departamentos_data[departamentos_data.index.isin(list(BOLIVIA_DEPARTAMENTOS))]
+    coordenadas = pd.DataFrame.from_dict(BOLIVIA_DEPARTAMENTOS, orient='index').reindex(datos.index)
+
+    deptos = list(datos.index)
+    lat = coordenadas['lat'].to_numpy()
+    lon = coordenadas['lon'].to_numpy()
+    pdc_votos = datos['PDC'].to_numpy() if 'PDC' in datos.columns else np.zeros(len(datos), dtype='int64')
+    libre_votos = datos['LIBRE'].to_numpy() if 'LIBRE' in datos.columns else np.zeros(len(datos), dtype='int64')
+    ganadores = np.where(pdc_votos > libre_votos, 'PDC', 'LIBRE')
+    votos_ganador = np.maximum(pdc_votos, libre_votos)
+
+    if deptos:
+        import plotly.express as px
+
+        # Ejes cartesianos en lugar de teselas: el mapa no depende de servidores externos
+        fig = px.scatter(
+            x=lon,
+            y=lat,
+            text=deptos,
+            size=votos_ganador,
+            color=ganadores,
+            color_discrete_map=COLORES_PARTIDOS,
+            size_max=30
+        )
+        fig.update_traces(textposition='top center')
+        return _ejes_geograficos(fig, float(np.mean(lat)), titulo)
+    return None
@@ -0,0 +1,251 @@
+"""Geometría local por nivel con niveles de detalle precalculados y caché compacta en disco"""
+import functools
+import json
+import os
+import threading
+
+import numpy as np
+
+from .agregacion import firma_archivos
+from .config import (
+    ARCHIVOS_GEOMETRIA, DIRECTORIO_GEOMETRIA, DIRECTORIO_GEOMETRIA_INCLUIDA, ESCALA_COORDENADAS, PROPIEDADES_GEOMETRIA,
+    RESOLUCION_MAPA_PX, TOLERANCIAS_GEOMETRIA
+)
+from .diagnostico import instrumentado, registrar_cache
+from .ingesta import _borrar_versiones_viejas, _normalizar_nombre, _ruta_cache_columnar
+
+def ruta_geometria(nivel):
+    """Ruta del GeoJSON de un nivel ('departamento', 'provincia' o 'municipio'): el del directorio de datos o el incluido"""
+    local = os.path.join(DIRECTORIO_GEOMETRIA, ARCHIVOS_GEOMETRIA[nivel])
+    incluido = os.path.join(DIRECTORIO_GEOMETRIA_INCLUIDA, ARCHIVOS_GEOMETRIA[nivel])
+    return local if os.path.isfile(local) or not os.path.isfile(incluido) else incluido
+
+def firma_geometria():
+    """Huella de los GeoJSON de todos los niveles: cambia al agregar, quitar o modificar alguno"""
+    return firma_archivos([ruta_geometria(nivel) for nivel in ARCHIVOS_GEOMETRIA])
+
+def niveles_con_geometria():
+    """Niveles cuyo GeoJSON está disponible localmente"""
+    return [nivel for nivel in ARCHIVOS_GEOMETRIA if os.path.isfile(ruta_geometria(nivel))]
+
+def _propiedad(propiedades, claves):
+    """Primer valor no vacío entre las propiedades candidatas"""
+    for clave in claves:
+        valor = propiedades.get(clave)
+        if valor not in (None, ''):
+            return str(valor)
+    return ''
+
+def _anillos_exteriores(geometria):
+    """Anillos exteriores de un Polygon o MultiPolygon (los huecos no se dibujan)"""
+    if not geometria:
+        return []
+    if geometria.get('type') == 'Polygon':
+        poligonos = [geometria['coordinates']]
+    elif geometria.get('type') == 'MultiPolygon':
+        poligonos = geometria['coordinates']
+    else:
+        return []
+    anillos = []
+    for poligono in poligonos:
+        if poligono and len(poligono[0]) >= 4:
+            anillo = np.asarray(poligono[0], dtype='float64')[:, :2]
+            if not np.array_equal(anillo[0], anillo[-1]):
+                anillo = np.vstack([anillo, anillo[:1]])
+            anillos.append(anillo)
+    return anillos
+
+def _importancia_tramo(puntos, tolerancia_minima):
+    """Tolerancia de Douglas-Peucker hasta la que sobrevive cada punto de una polilínea"""
+    importancia = np.zeros(len(puntos))
+    importancia[0] = importancia[-1] = np.inf
+    pila = [(0, len(puntos) - 1, np.inf)]
+    while pila:
+        inicio, fin, techo = pila.pop()
+        if fin - inicio < 2:
+            continue
+        a, b = puntos[inicio], puntos[fin]
+        tramo = puntos[inicio + 1:fin] - a
+        dx, dy = b - a
+        largo = np.hypot(dx, dy)
+        if largo > 0:
+            distancias = np.abs(dx * tramo[:, 1] - dy * tramo[:, 0]) / largo
+        else:
+            distancias = np.hypot(tramo[:, 0], tramo[:, 1])
+        i = int(distancias.argmax())
+        if distancias[i] < tolerancia_minima:
+            continue
+        # Acotar por el punto que partió el tramo deja los niveles anidados: lo grueso es subconjunto de lo fino
+        valor = min(float(distancias[i]), techo)
+        medio = inicio + 1 + i
+        importancia[medio] = valor
+        pila.append((inicio, medio, valor))
+        pila.append((medio, fin, valor))
+    return importancia
+
+def _importancia_anillo(anillo, tolerancia_minima):
+    """Importancia de cada punto de un anillo cerrado, partido en su punto más lejano al inicio"""
+    lejano = int(np.hypot(*(anillo - anillo[0]).T).argmax())
+    if lejano == 0:
+        return np.full(len(anillo), np.inf)
+    return np.concatenate([
+        _importancia_tramo(anillo[:lejano + 1], tolerancia_minima),
+        _importancia_tramo(anillo[lejano:], tolerancia_minima)[1:]
+    ])
+
+def _area_anillo(anillo):
+    """Área (fórmula del cordón) de un anillo en grados cuadrados"""
+    x, y = anillo[:, 0], anillo[:, 1]
+    return abs(np.dot(x[:-1], y[1:]) - np.dot(x[1:], y[:-1])) / 2
+
+@instrumentado('geometria')
+def simplificar_geojson(archivo, nivel, tolerancias=TOLERANCIAS_GEOMETRIA):
+    """Leer un GeoJSON y codificarlo en arreglos compactos con el nivel de detalle de cada punto
+
+    Cada punto guarda cuántas tolerancias supera (0 = se descarta incluso en el nivel más fino);
+    las coordenadas se cuantizan y se guardan como diferencias int32 entre puntos consecutivos.
+    """
+    with open(archivo, encoding='utf-8') as f:
+        features = json.load(f).get('features', [])
+
+    tolerancias = np.sort(np.asarray(tolerancias, dtype='float64'))
+    nombres, padres, etiquetas, cajas = [], [], [], []
+    puntos, niveles, largos, unidades = [], [], [], []
+    for feature in features:
+        anillos = _anillos_exteriores(feature.get('geometry'))
+        propiedades = feature.get('properties') or {}
+        nombre = _propiedad(propiedades, PROPIEDADES_GEOMETRIA[nivel])
+        if not anillos or not nombre:
+            continue
+        unidad = len(nombres)
+        nombres.append(nombre)
+        padres.append(_propiedad(propiedades, PROPIEDADES_GEOMETRIA['padre']))
+
+        # La etiqueta va al centro de la caja del anillo más grande
+        mayor = max(anillos, key=_area_anillo)
+        etiquetas.append((mayor[:, 0].min() + mayor[:, 0].max()) / 2)
+        etiquetas.append((mayor[:, 1].min() + mayor[:, 1].max()) / 2)
+        todos = np.vstack(anillos)
+        cajas.append([todos[:, 0].min(), todos[:, 1].min(), todos[:, 0].max(), todos[:, 1].max()])
+
+        for anillo in anillos:
+            nivel_puntos = np.searchsorted(tolerancias, _importancia_anillo(anillo, tolerancias[0]), side='right')
+            conservados = nivel_puntos > 0
+            if conservados.sum() < 4:
+                continue
+            puntos.append(anillo[conservados])
+            niveles.append(nivel_puntos[conservados].astype('int8'))
+            largos.append(int(conservados.sum()))
+            unidades.append(unidad)
+
+    cuantizados = np.rint(np.vstack(puntos) * ESCALA_COORDENADAS).astype('int64') if puntos else np.zeros((0, 2), 'int64')
+    return {
+        'deltas': np.diff(cuantizados, axis=0, prepend=np.zeros((1, 2), 'int64')).astype('int32'),
+        'niveles': np.concatenate(niveles) if niveles else np.array([], dtype='int8'),
+        'inicio_anillos': np.concatenate([[0], np.cumsum(largos)]).astype('int64'),
+        'unidad_anillo': np.asarray(unidades, dtype='int32'),
+        'nombres': np.asarray(nombres, dtype=str),
+        'padres': np.asarray(padres, dtype=str),
+        'etiquetas': np.asarray(etiquetas, dtype='float64').reshape(-1, 2),
+        'cajas': np.asarray(cajas, dtype='float64').reshape(-1, 4),
+        'tolerancias': tolerancias
+    }
+
+def _escribir_cache_geometria(codificada, ruta):
+    """Guardar la geometría codificada en .npz comprimido de forma atómica y borrar versiones viejas"""
+    directorio = os.path.dirname(ruta)
+    os.makedirs(directorio, exist_ok=True)
+    temporal = f"{ruta}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temporal, 'wb') as f:
+        np.savez_compressed(f, **codificada)
+    os.replace(temporal, ruta)
+    _borrar_versiones_viejas(ruta, 'npz')
+
+def precalcular_geometria(nivel):
+    """Simplificar el GeoJSON de un nivel y dejarlo en caché; devuelve la ruta de la caché"""
+    archivo = ruta_geometria(nivel)
+    ruta = _ruta_cache_columnar(archivo, 'npz')
+    if not os.path.exists(ruta):
+        _escribir_cache_geometria(simplificar_geojson(archivo, nivel), ruta)
+    return ruta
+
+@functools.lru_cache(maxsize=len(ARCHIVOS_GEOMETRIA))
+def _geometria_para(firma, nivel):
+    """Geometría decodificada una vez por versión del GeoJSON"""
+    registrar_cache('geometria', fallo=True)
+    archivo = firma[0][0]
+    ruta = _ruta_cache_columnar(archivo, 'npz')
+    codificada = None
+    if os.path.exists(ruta):
+        try:
+            with np.load(ruta) as datos:
+                codificada = {clave: datos[clave] for clave in datos.files}
+        except Exception:
+            codificada = None  # Caché corrupta: se regenera desde el GeoJSON
+    if codificada is None:
+        codificada = simplificar_geojson(archivo, nivel)
+        try:
+            _escribir_cache_geometria(codificada, ruta)
+        except OSError:
+            pass  # Sin permisos de escritura la caché es opcional
+
+    geometria = dict(codificada)
+    geometria['coordenadas'] = np.cumsum(codificada['deltas'].astype('int64'), axis=0) / ESCALA_COORDENADAS
+    geometria['claves'] = np.array([_normalizar_nombre(n) for n in codificada['nombres']], dtype=str)
+    geometria['claves_padre'] = np.array([_normalizar_nombre(p) for p in codificada['padres']], dtype=str)
+    return geometria
+
+def cargar_geometria(nivel):
+    """Geometría simplificada de un nivel, o None si no hay GeoJSON local"""
+    archivo = ruta_geometria(nivel)
+    if not os.path.isfile(archivo):
+        return None
+    registrar_cache('geometria')
+    return _geometria_para(firma_archivos([archivo]), nivel)
+
+def seleccionar_anillos(geometria, unidades, pixeles=RESOLUCION_MAPA_PX):
+    """Coordenadas de los anillos de las unidades en el nivel de detalle justo para su extensión
+
+    Devuelve (coordenadas, inicio_anillos, unidad_anillo, nivel): un punto entra si su
+    importancia supera la tolerancia del nivel elegido, que es la más gruesa que sigue por
+    debajo de un píxel en pantalla.
+    """
+    unidades = np.asarray(unidades, dtype='int64')
+    vacio = (np.zeros((0, 2)), np.zeros(1, dtype='int64'), np.array([], dtype='int32'), 0)
+    if not len(unidades):
+        return vacio
+
+    cajas = geometria['cajas'][unidades]
+    extension = max(cajas[:, 2].max() - cajas[:, 0].min(), cajas[:, 3].max() - cajas[:, 1].min())
+    nivel = max(int(np.searchsorted(geometria['tolerancias'], extension / pixeles, side='right')) - 1, 0)
+
+    inicio = geometria['inicio_anillos']
+    anillos = np.flatnonzero(np.isin(geometria['unidad_anillo'], unidades))
+    if not len(anillos):
+        return vacio
+    largos = inicio[anillos + 1] - inicio[anillos]
+    indices = np.repeat(inicio[anillos] - (np.cumsum(largos) - largos), largos) + np.arange(largos.sum())
+    conservados = geometria['niveles'][indices] > nivel
+    anillo_de_punto = np.repeat(np.arange(len(anillos)), largos)
+
+    # Anillos que quedan degenerados en este nivel se omiten
+    por_anillo = np.bincount(anillo_de_punto[conservados], minlength=len(anillos))
+    validos = por_anillo >= 4
+    conservados &= validos[anillo_de_punto]
+    return (
+        geometria['coordenadas'][indices[conservados]],
+        np.concatenate([[0], np.cumsum(por_anillo[validos])]).astype('int64'),
+        geometria['unidad_anillo'][anillos[validos]],
+        nivel
+    )
+
+def trazos_con_separadores(coordenadas, inicio_anillos):
+    """Unir anillos en un solo par x/y separados por NaN, el formato de un trazo plotly con varias partes"""
+    n_anillos = len(inicio_anillos) - 1
+    if n_anillos <= 0:
+        return np.array([]), np.array([])
+    largos = np.diff(inicio_anillos)
+    destino = np.arange(len(coordenadas)) + np.repeat(np.arange(n_anillos), largos)
+    salida = np.full((len(coordenadas) + n_anillos - 1, 2), np.nan)
+    salida[destino] = coordenadas
+    return salida[:, 0], salida[:, 1]
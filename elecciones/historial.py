@@ -0,0 +1,236 @@
+"""Historial de snapshots del conteo: columnas binarias de solo agregado con totales en diferencias"""
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from .agregacion import contar_mesas
+from .config import (
+    DEPARTAMENTOS_OFICIALES, DIRECTORIO_HISTORIAL, INTERVALO_CLAVES_HISTORIAL, PARTIDOS_PRIMERA, PARTIDOS_SEGUNDA
+)
+from .diagnostico import instrumentado
+
+# Estado del historial de cada vuelta (filas, último snapshot) compartido por todas las sesiones del proceso
+_HISTORIAL = {'lock': threading.Lock(), 'estados': {}}
+
+# Zona horaria local: las fechas se guardan en ns UTC y se muestran en hora local
+_ZONA_LOCAL = datetime.now().astimezone().tzinfo
+
+def _partidos_de(vuelta):
+    """Partidos que registra el historial de una vuelta"""
+    return PARTIDOS_PRIMERA if vuelta == 'primera' else PARTIDOS_SEGUNDA
+
+def _columnas(partidos):
+    """Columnas del historial: tipo y valores por snapshot; 'tiempo' va al final y marca las filas completas"""
+    return {
+        'mesas': ('<i8', 1),
+        'partidos': ('<i4', len(partidos)),
+        'departamentos': ('<i4', len(DEPARTAMENTOS_OFICIALES) * len(partidos)),
+        'tiempo': ('<i8', 1)
+    }
+
+def _ruta(directorio, columna):
+    """Archivo binario de una columna"""
+    return os.path.join(directorio, f"{columna}.bin")
+
+def _filas_en_disco(directorio):
+    """Snapshots completos: los que ya escribieron su tiempo"""
+    try:
+        return os.path.getsize(_ruta(directorio, 'tiempo')) // 8
+    except OSError:
+        return 0
+
+def _abrir_columna(directorio, columna, tipo, ancho, filas):
+    """Columna mapeada en memoria de solo lectura (filas x ancho)"""
+    if not filas:
+        return np.zeros((0, ancho), dtype=tipo)
+    return np.memmap(_ruta(directorio, columna), dtype=tipo, mode='r', shape=(filas, ancho))
+
+def _reconstruir(deltas, primera_fila):
+    """Totales absolutos desde diferencias; las filas múltiplo de INTERVALO_CLAVES_HISTORIAL ya son absolutas"""
+    acumulado = np.cumsum(deltas.astype('int64'), axis=0)
+    filas = np.arange(primera_fila, primera_fila + len(deltas))
+    clave_local = filas // INTERVALO_CLAVES_HISTORIAL * INTERVALO_CLAVES_HISTORIAL - primera_fila
+    previo = np.vstack([np.zeros((1, deltas.shape[1]), dtype='int64'), acumulado])
+    return acumulado - previo[clave_local]
+
+def _leer_filas(directorio, partidos, inicio, fin, columna='partidos', seleccion=slice(None)):
+    """Totales absolutos de las filas [inicio, fin) de una columna, releyendo desde la fila clave previa"""
+    tipo, ancho = _columnas(partidos)[columna]
+    clave = inicio - inicio % INTERVALO_CLAVES_HISTORIAL
+    deltas = _abrir_columna(directorio, columna, tipo, ancho, fin)[clave:fin, seleccion]
+    return _reconstruir(np.asarray(deltas), clave)[inicio - clave:]
+
+def _estado_nuevo(directorio, partidos, crear):
+    """Abrir el historial de un directorio y recuperar su último snapshot; con crear, prepararlo para escribir"""
+    esquema = {'partidos': partidos, 'departamentos': DEPARTAMENTOS_OFICIALES, 'intervalo_claves': INTERVALO_CLAVES_HISTORIAL}
+    ruta_esquema = os.path.join(directorio, 'esquema.json')
+    try:
+        with open(ruta_esquema, encoding='utf-8') as f:
+            vigente = json.load(f) == esquema
+    except (OSError, ValueError):
+        vigente = False
+    if not vigente and crear:
+        # Otro esquema (partidos o intervalo distintos): el historial viejo se archiva, no se mezcla
+        if os.path.isdir(directorio):
+            os.replace(directorio, f"{directorio}.{time.strftime('%Y%m%d_%H%M%S')}")
+        os.makedirs(directorio, exist_ok=True)
+        with open(ruta_esquema, 'w', encoding='utf-8') as f:
+            json.dump(esquema, f, ensure_ascii=False)
+        vigente = True
+
+    filas = _filas_en_disco(directorio) if vigente else 0
+    estado = {'directorio': directorio, 'partidos': partidos, 'vigente': vigente, 'filas': filas, 'firma': None,
+              'tiempo': 0, 'mesas': 0, 'ultimo': None}
+    if filas:
+        columnas = _columnas(partidos)
+        estado['tiempo'] = int(_abrir_columna(directorio, 'tiempo', *columnas['tiempo'], filas)[-1, 0])
+        estado['mesas'] = int(_abrir_columna(directorio, 'mesas', *columnas['mesas'], filas)[-1, 0])
+        estado['ultimo'] = np.concatenate([
+            _leer_filas(directorio, partidos, filas - 1, filas, 'partidos')[0],
+            _leer_filas(directorio, partidos, filas - 1, filas, 'departamentos')[0]
+        ])
+    return estado
+
+def _estado(vuelta, crear=False):
+    """Estado del historial de una vuelta en el directorio actual (llamar con el lock tomado)
+
+    Solo con crear se escribe en disco: consultar un historial inexistente no lo crea.
+    """
+    directorio = os.path.abspath(os.path.join(DIRECTORIO_HISTORIAL, vuelta))
+    estado = _HISTORIAL['estados'].get(directorio)
+    # Otro proceso pudo agregar snapshots: se relee el último
+    if (estado is None or (crear and not estado['vigente'])
+            or (estado['vigente'] and _filas_en_disco(directorio) != estado['filas'])):
+        firma = estado['firma'] if estado else None
+        estado = _estado_nuevo(directorio, _partidos_de(vuelta), crear)
+        estado['firma'] = firma
+        _HISTORIAL['estados'][directorio] = estado
+    return estado
+
+def _instante(firma):
+    """Momento del snapshot en ns UTC: la última modificación de sus archivos"""
+    if firma and firma[0] == 'vivo':
+        try:
+            return os.stat(firma[1]).st_mtime_ns
+        except OSError:
+            return time.time_ns()
+    modificaciones = [mtime for _, mtime, _ in firma if mtime is not None]
+    return max(modificaciones) if modificaciones else time.time_ns()
+
+def _agregar_fila(estado, tiempo, mesas, totales):
+    """Escribir un snapshot al final de cada columna; el tiempo se escribe último"""
+    fila = estado['filas']
+    n_partidos = len(estado['partidos'])
+    base = 0 if fila % INTERVALO_CLAVES_HISTORIAL == 0 else estado['ultimo']
+    delta = totales - base
+    valores = {'mesas': [mesas], 'partidos': delta[:n_partidos], 'departamentos': delta[n_partidos:], 'tiempo': [tiempo]}
+    for columna, (tipo, ancho) in _columnas(estado['partidos']).items():
+        with open(_ruta(estado['directorio'], columna), 'ab') as f:
+            # Un snapshot a medio escribir (sin tiempo) se descarta antes de agregar el nuevo
+            f.truncate(fila * ancho * np.dtype(tipo).itemsize)
+            f.write(np.asarray(valores[columna], dtype=tipo).tobytes())
+    estado.update(filas=fila + 1, tiempo=tiempo, mesas=mesas, ultimo=totales)
+
+def registrar_snapshot(vuelta, firma, datos):
+    """Agregar al historial el snapshot de una vuelta si cambió su firma y también sus totales o mesas
+
+    Devuelve True si se agregó una fila. Sin permisos de escritura el historial se omite.
+    """
+    resultados, df, departamentos = datos
+    if not resultados:
+        return False
+    partidos = _partidos_de(vuelta)
+    with _HISTORIAL['lock']:
+        try:
+            estado = _estado(vuelta, crear=True)
+            if estado['firma'] == firma:
+                return False
+            estado['firma'] = firma
+
+            nacional = np.array([resultados.get(p, 0) for p in partidos], dtype='int64')
+            por_departamento = departamentos.reindex(index=DEPARTAMENTOS_OFICIALES, columns=partidos, fill_value=0)
+            totales = np.concatenate([nacional, por_departamento.to_numpy(dtype='int64').ravel()])
+            mesas = contar_mesas(df)
+            if estado['filas'] and mesas == estado['mesas'] and np.array_equal(totales, estado['ultimo']):
+                return False
+            # Las fechas no retroceden: las consultas por rango buscan sobre la columna ordenada
+            _agregar_fila(estado, max(_instante(firma), estado['tiempo']), mesas, totales)
+            return True
+        except OSError:
+            return False
+
+def _a_ns(fecha):
+    """Fecha (sin zona = hora local) a ns UTC"""
+    fecha = pd.Timestamp(fecha)
+    if fecha.tzinfo is None:
+        fecha = fecha.tz_localize(_ZONA_LOCAL)
+    return fecha.value
+
+def _a_fechas(tiempos):
+    """ns UTC a fechas locales sin zona"""
+    return pd.to_datetime(np.asarray(tiempos, dtype='int64'), unit='ns', utc=True).tz_convert(_ZONA_LOCAL).tz_localize(None)
+
+@instrumentado('historial')
+def consultar_historial(vuelta, desde=None, hasta=None, departamento=None):
+    """Snapshots de una vuelta entre dos fechas: mesas y votos por partido, nacionales o de un departamento
+
+    La búsqueda por fecha es binaria sobre la columna de tiempos mapeada en memoria y solo se
+    reconstruyen las filas del rango (desde la fila clave anterior), sin releer los CSV.
+    """
+    partidos = _partidos_de(vuelta)
+    with _HISTORIAL['lock']:
+        estado = _estado(vuelta)
+    directorio = estado['directorio']
+    filas = _filas_en_disco(directorio) if estado['vigente'] else 0
+    columnas = _columnas(partidos)
+
+    tiempos = _abrir_columna(directorio, 'tiempo', *columnas['tiempo'], filas)[:, 0]
+    inicio = int(np.searchsorted(tiempos, _a_ns(desde), side='left')) if desde is not None else 0
+    fin = int(np.searchsorted(tiempos, _a_ns(hasta), side='right')) if hasta is not None else filas
+    if fin <= inicio:
+        return pd.DataFrame(columns=['Mesas'] + partidos, dtype='int64', index=pd.DatetimeIndex([], name='Fecha'))
+
+    if departamento is None:
+        votos = _leer_filas(directorio, partidos, inicio, fin, 'partidos')
+    else:
+        posicion = DEPARTAMENTOS_OFICIALES.index(departamento) * len(partidos)
+        votos = _leer_filas(directorio, partidos, inicio, fin, 'departamentos', slice(posicion, posicion + len(partidos)))
+
+    tabla = pd.DataFrame(votos, columns=partidos, index=pd.DatetimeIndex(_a_fechas(tiempos[inicio:fin]), name='Fecha'))
+    tabla.insert(0, 'Mesas', np.asarray(_abrir_columna(directorio, 'mesas', *columnas['mesas'], filas)[inicio:fin, 0]))
+    return tabla
+
+def progreso_conteo(vuelta, horas=None):
+    """Historial de una vuelta con el avance (% de actas) y PDC/LIBRE sobre votos a partidos
+
+    El padrón de mesas es la última cantidad registrada de la primera vuelta. horas acota el
+    rango a las últimas horas antes del último snapshot.
+    """
+    with _HISTORIAL['lock']:
+        ultimo = _estado(vuelta)['tiempo']
+        esperadas = _estado('primera')['mesas']
+    desde = None
+    if horas is not None and ultimo:
+        desde = pd.Timestamp(ultimo - int(horas * 3600 * 1e9), unit='ns', tz='UTC')
+
+    tabla = consultar_historial(vuelta, desde=desde)
+    partidos = _partidos_de(vuelta)
+    tabla['% Actas'] = (tabla['Mesas'] / esperadas * 100).round(2) if esperadas else np.nan
+    con_votos = tabla[partidos].sum(axis=1)
+    for partido in PARTIDOS_SEGUNDA:
+        tabla[f'% {partido}'] = (tabla[partido] / con_votos.where(con_votos > 0) * 100).round(2)
+    return tabla
+
+def ultima_actualizacion():
+    """Fecha local del snapshot más reciente de cualquier vuelta, o None si no hay historial"""
+    with _HISTORIAL['lock']:
+        try:
+            ultimo = max(_estado(vuelta)['tiempo'] for vuelta in ('primera', 'segunda'))
+        except OSError:
+            return None
+    return _a_fechas([ultimo])[0].to_pydatetime(warn=False) if ultimo else None
@@ -0,0 +1,283 @@
+"""Lectura de CSV de actas: detección de codificación, parseo tipado y caché columnar"""
+import codecs
+import glob
+import io
+import os
+import re
+import threading
+import unicodedata
+
+import numpy as np
+
+import pandas as pd
+
+from .config import (
+    BOMS_CONOCIDOS, COLUMNA_MESA, COLUMNAS_CATEGORICAS, COLUMNAS_VOTOS, DEPARTAMENTOS_OFICIALES,
+    DIRECTORIO_CACHE_COLUMNAR, MAX_BYTES_DETECCION, MOTOR_CSV, TAMANO_BLOQUE_DETECCION
+)
+from .diagnostico import instrumentado
+
+# Caché de codificaciones: una entrada por ruta con la (mtime, tamaño) con que se detectó;
+# un archivo reescrito reemplaza su entrada en vez de sumar otra
+_cache_codificaciones = {}
+
+def _codificacion_por_prefijo(prefijo):
+    """Resolver la codificación por BOM o UTF-8 válido sin usar chardet"""
+    for bom, codificacion in BOMS_CONOCIDOS:
+        if prefijo.startswith(bom):
+            return codificacion
+
+    if prefijo.isascii():
+        return None
+
+    try:
+        # final=False tolera una secuencia multibyte cortada al final del prefijo
+        codecs.getincrementaldecoder('utf-8')().decode(prefijo, final=False)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        return None
+
+@instrumentado('codificacion')
+def detectar_codificacion(archivo):
+    """Detectar la codificación del archivo leyendo solo un prefijo acotado"""
+    try:
+        estado = os.stat(archivo)
+        ruta = os.path.abspath(archivo)
+        version = (estado.st_mtime_ns, estado.st_size)
+        guardada = _cache_codificaciones.get(ruta)
+        if guardada is not None and guardada[0] == version:
+            return guardada[1]
+
+        with open(archivo, 'rb') as f:
+            primer_bloque = f.read(TAMANO_BLOQUE_DETECCION)
+            codificacion = _codificacion_por_prefijo(primer_bloque)
+
+            if codificacion is None:
+                import chardet
+
+                detector = chardet.UniversalDetector()
+                detector.feed(primer_bloque)
+                leidos = len(primer_bloque)
+                while not detector.done and leidos < MAX_BYTES_DETECCION:
+                    bloque = f.read(TAMANO_BLOQUE_DETECCION)
+                    if not bloque:
+                        break
+                    detector.feed(bloque)
+                    leidos += len(bloque)
+                detector.close()
+                codificacion = detector.result.get('encoding')
+
+        # Un prefijo solo ASCII no garantiza el resto del archivo: UTF-8 es el superconjunto seguro
+        if not codificacion or codificacion.lower() == 'ascii':
+            codificacion = 'utf-8'
+
+        _cache_codificaciones[ruta] = (version, codificacion)
+        return codificacion
+    except Exception:
+        return 'latin-1'
+
+class ErrorIngesta(Exception):
+    """Error al ingerir un CSV de actas, indicando la etapa que falló"""
+    def __init__(self, etapa, archivo, causa):
+        self.etapa = etapa
+        self.archivo = archivo
+        self.causa = causa
+        super().__init__(f"{archivo} (etapa: {etapa}): {causa}")
+
+    def __reduce__(self):
+        # Permite devolver el error desde un proceso del pool de ingesta
+        return (ErrorIngesta, (self.etapa, self.archivo, self.causa))
+
+def _motor_disponible(motor):
+    """Usar el motor pedido solo si su dependencia está instalada"""
+    if motor == 'pyarrow':
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            return 'c'
+    return motor
+
+# Máximo que admite una columna de votos antes de estrecharla a int32
+_MAX_VOTOS = np.iinfo('int32').max
+
+# Versión del parseo tipado, parte del nombre de las cachés columnares: subirla al cambiar
+# _aplicar_tipos o los dtypes del esquema, para que no se lean cachés con los tipos anteriores
+_VERSION_PARSEO = 1
+
+def _aplicar_tipos(df):
+    """Convertir columnas de votos a int32 compacto; una celda vacía cuenta como 0 votos
+
+    Una celda no vacía que no sea un entero entre 0 y el máximo de int32 es un acta corrupta:
+    no se reemplaza por 0, se levanta ValueError con la columna, la cantidad y las primeras filas.
+    """
+    for columna in COLUMNAS_VOTOS:
+        if columna not in df.columns:
+            continue
+        original = df[columna]
+        valores = original.to_numpy()
+        # Caso común: enteros sin celdas vacías, basta revisar el rango
+        if pd.api.types.is_integer_dtype(original) and (not len(valores) or (valores.min() >= 0 and valores.max() <= _MAX_VOTOS)):
+            df[columna] = original.astype('int32')
+            continue
+
+        votos = pd.to_numeric(original, errors='coerce')
+        vacias = original.isna()
+        if not pd.api.types.is_numeric_dtype(original):
+            vacias |= original.astype(str).str.strip().eq('')
+        invalidas = (votos.isna() & ~vacias) | (votos < 0) | (votos > _MAX_VOTOS) | (votos.notna() & (votos % 1 != 0))
+        if invalidas.any():
+            filas = df.index[invalidas.to_numpy()][:5].tolist()
+            raise ValueError(
+                f"{int(invalidas.sum())} celdas de '{columna}' no son votos válidos "
+                f"(filas {filas}, p. ej. {str(original[invalidas].iloc[0])!r})"
+            )
+        df[columna] = votos.fillna(0).astype('int32')
+    return df
+
+def _decodificar(contenido, codificacion):
+    """Decodificar bytes una sola vez; latin-1 nunca falla y sirve de respaldo"""
+    try:
+        return contenido.decode(codificacion)
+    except (UnicodeDecodeError, LookupError):
+        return contenido.decode('latin-1')
+
+def _parsear_texto(texto, motor=MOTOR_CSV):
+    """Parsear texto CSV de actas con los tipos explícitos del esquema"""
+    tipos = {COLUMNA_MESA: str}
+    tipos.update({columna: 'category' for columna in COLUMNAS_CATEGORICAS})
+    return pd.read_csv(io.StringIO(texto), dtype=tipos, engine=_motor_disponible(motor))
+
+def _parsear_flujo(f, codificacion, motor=MOTOR_CSV):
+    """Parsear un CSV abierto en binario decodificándolo a medida que se lee (sin copia completa en texto)"""
+    tipos = {COLUMNA_MESA: str}
+    tipos.update({columna: 'category' for columna in COLUMNAS_CATEGORICAS})
+    texto = io.TextIOWrapper(f, encoding=codificacion, newline='')
+    try:
+        return pd.read_csv(texto, dtype=tipos, engine=_motor_disponible(motor))
+    finally:
+        # El archivo lo cierra quien lo abrió
+        texto.detach()
+
+@instrumentado('parseo_csv')
+def leer_actas(archivo, motor=MOTOR_CSV):
+    """Leer un CSV de actas en una sola pasada con tipos explícitos, decodificando en streaming"""
+    etapa = 'decodificación'
+    try:
+        codificacion = detectar_codificacion(archivo)
+        try:
+            codecs.lookup(codificacion)
+        except LookupError:
+            codificacion = 'latin-1'
+
+        etapa = 'lectura'
+        with open(archivo, 'rb') as f:
+            etapa = 'parseo'
+            try:
+                df = _parsear_flujo(f, codificacion, motor)
+            except UnicodeDecodeError:
+                # Bytes inválidos más allá del prefijo detectado: latin-1 nunca falla y sirve de respaldo
+                f.seek(0)
+                df = _parsear_flujo(f, 'latin-1', motor)
+
+        etapa = 'tipos'
+        return _aplicar_tipos(df)
+    except Exception as e:
+        raise ErrorIngesta(etapa, archivo, e) from e
+
+def _ruta_cache_columnar(archivo, extension='feather'):
+    """Ruta de la caché (Feather por defecto) asociada a un archivo fuente, con clave de tamaño, mtime y versión del parseo"""
+    estado = os.stat(archivo)
+    directorio = os.path.join(os.path.dirname(os.path.abspath(archivo)), DIRECTORIO_CACHE_COLUMNAR)
+    base = os.path.splitext(os.path.basename(archivo))[0]
+    return os.path.join(directorio, f"{base}.{estado.st_size}-{estado.st_mtime_ns}.v{_VERSION_PARSEO}.{extension}")
+
+def _borrar_versiones_viejas(ruta, extension):
+    """Borrar las cachés con la misma extensión de versiones anteriores del mismo archivo fuente"""
+    directorio = os.path.dirname(ruta)
+    # '{base}.{tamaño}-{mtime}[.v{versión}].{extensión}': la base completa, aunque tenga puntos
+    # ('actas.2025.csv' no debe borrar las cachés de 'actas.csv'); sin versión, las de antes de _VERSION_PARSEO
+    patron = re.compile(rf"(.+)\.\d+-\d+(?:\.v\d+)?\.{re.escape(extension)}")
+    actual = patron.fullmatch(os.path.basename(ruta))
+    if actual is None:
+        return
+    for nombre in os.listdir(directorio):
+        coincide = patron.fullmatch(nombre)
+        if coincide and coincide.group(1) == actual.group(1) and nombre != os.path.basename(ruta):
+            try:
+                os.remove(os.path.join(directorio, nombre))
+            except OSError:
+                pass
+
+def _escribir_cache_columnar(df, ruta):
+    """Guardar el DataFrame en Feather de forma atómica y borrar versiones viejas"""
+    import pyarrow as pa
+    import pyarrow.feather as feather
+
+    directorio = os.path.dirname(ruta)
+    os.makedirs(directorio, exist_ok=True)
+    # pid e hilo: dos vueltas cargadas en paralelo pueden escribir la misma caché a la vez
+    temporal = f"{ruta}.{os.getpid()}.{threading.get_ident()}.tmp"
+    # Sin compresión para poder mapear en memoria sin descomprimir
+    feather.write_feather(pa.Table.from_pandas(df, preserve_index=False), temporal, compression='uncompressed')
+    os.replace(temporal, ruta)
+    _borrar_versiones_viejas(ruta, 'feather')
+
+@instrumentado('lectura_actas')
+def leer_actas_con_cache(archivo):
+    """Leer actas desde la caché columnar si está vigente; si no, del CSV"""
+    try:
+        import pyarrow.feather as feather
+    except ImportError:
+        return leer_actas(archivo)
+
+    try:
+        ruta = _ruta_cache_columnar(archivo)
+    except OSError as e:
+        raise ErrorIngesta('lectura', archivo, e) from e
+
+    if os.path.exists(ruta):
+        try:
+            tabla = feather.read_table(ruta, memory_map=True)
+            return tabla.to_pandas(split_blocks=True)
+        except Exception:
+            pass  # Caché corrupta o incompatible: se regenera desde el CSV
+
+    df = leer_actas(archivo)
+    try:
+        _escribir_cache_columnar(df, ruta)
+    except Exception:
+        pass  # Sin permisos de escritura la caché es opcional
+    return df
+
+def archivos_de_fuente(fuente):
+    """Archivos CSV de una fuente: un CSV, un directorio de fragmentos o un patrón glob"""
+    if any(caracter in fuente for caracter in '*?['):
+        return sorted(glob.glob(fuente))
+    if os.path.isfile(fuente):
+        return [fuente]
+    # Sin 'primera_vuelta.csv' se buscan fragmentos en el directorio 'primera_vuelta/'
+    directorio = fuente if os.path.isdir(fuente) else os.path.splitext(fuente)[0]
+    if os.path.isdir(directorio):
+        return sorted(glob.glob(os.path.join(directorio, '*.csv')))
+    return []
+
+def _normalizar_nombre(texto):
+    """Minúsculas sin acentos ni separadores, para comparar nombres de archivo"""
+    sin_acentos = unicodedata.normalize('NFKD', texto).encode('ascii', 'ignore').decode('ascii')
+    return ' '.join(sin_acentos.lower().replace('_', ' ').replace('-', ' ').split())
+
+_DEPARTAMENTOS_NORMALIZADOS = {_normalizar_nombre(d): d for d in DEPARTAMENTOS_OFICIALES}
+
+def departamento_de_archivo(archivo):
+    """Departamento oficial que nombra un fragmento ('la_paz.csv', 'Potosi.csv'), o None"""
+    base = os.path.splitext(os.path.basename(archivo))[0]
+    return _DEPARTAMENTOS_NORMALIZADOS.get(_normalizar_nombre(base))
+
+def leer_fragmento(archivo):
+    """Leer un CSV de actas; si el archivo nombra un departamento, completa NombreDepartamento"""
+    df = leer_actas_con_cache(archivo)
+    departamento = departamento_de_archivo(archivo)
+    if departamento and ('NombreDepartamento' not in df.columns or df['NombreDepartamento'].isna().all()):
+        codigos = np.full(len(df), DEPARTAMENTOS_OFICIALES.index(departamento), dtype='int8')
+        df['NombreDepartamento'] = pd.Categorical.from_codes(codigos, categories=DEPARTAMENTOS_OFICIALES)
+    return df
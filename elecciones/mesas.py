@@ -0,0 +1,125 @@
+"""Índice de mesas ordenado para el explorador: filtros por rango y paginación en el servidor"""
+import numpy as np
+import pandas as pd
+
+from .agregacion import normalizar_codigo_mesa
+from .config import COLUMNA_MESA, MESAS_POR_PAGINA
+from .diagnostico import instrumentado
+
+@instrumentado('indice_mesas')
+def construir_indice_mesas(df, partidos):
+    """Tabla de mesas ordenada por departamento, recinto y mesa para consultas por rango"""
+    n = len(df)
+    presentes = [p for p in partidos if p in df.columns]
+    votos = df[presentes].to_numpy(dtype='int64') if presentes else np.zeros((n, 0), dtype='int64')
+    nulos = df['VotoNulo'].to_numpy(dtype='int64') if 'VotoNulo' in df.columns else np.zeros(n, dtype='int64')
+    blancos = df['VotoBlanco'].to_numpy(dtype='int64') if 'VotoBlanco' in df.columns else np.zeros(n, dtype='int64')
+    validos = df['VotoValido'].to_numpy(dtype='int64') if 'VotoValido' in df.columns else votos.sum(axis=1)
+    emitidos = validos + nulos + blancos
+
+    if 'Sigla' in df.columns:
+        ganador = df['Sigla'].astype(object).fillna('').astype(str).to_numpy()
+    elif presentes:
+        ganador = np.array(presentes)[votos.argmax(axis=1)]
+    else:
+        ganador = np.full(n, '', dtype=object)
+
+    # Categorías ordenadas: el orden de los códigos coincide con el orden alfabético
+    if 'NombreDepartamento' in df.columns:
+        departamento = df['NombreDepartamento'].astype(object).where(df['NombreDepartamento'].notna(), 'Sin departamento')
+    else:
+        departamento = pd.Series('Sin departamento', index=df.index)
+    departamento = pd.Categorical(departamento.astype(str))
+    if 'NombreRecinto' in df.columns:
+        recinto = pd.Categorical(df['NombreRecinto'].astype(object).fillna('').astype(str))
+    else:
+        recinto = pd.Categorical(np.full(n, ''))
+    mesa = df[COLUMNA_MESA].astype(str).to_numpy() if COLUMNA_MESA in df.columns else np.arange(n).astype(str)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        porc_nulos = np.where(emitidos > 0, nulos / emitidos * 100, 0.0)
+        porc_blancos = np.where(emitidos > 0, blancos / emitidos * 100, 0.0)
+
+    tabla = pd.DataFrame({'Departamento': departamento, 'Recinto': recinto, 'Mesa': mesa, 'Ganador': ganador})
+    for i, partido in enumerate(presentes):
+        tabla[partido] = votos[:, i]
+    tabla['VotoNulo'] = nulos
+    tabla['VotoBlanco'] = blancos
+    tabla['VotoValido'] = validos
+    tabla['% Nulos'] = porc_nulos.round(2)
+    tabla['% Blancos'] = porc_blancos.round(2)
+
+    orden = np.lexsort((normalizar_codigo_mesa(tabla['Mesa']), recinto.codes, departamento.codes))
+    tabla = tabla.iloc[orden].reset_index(drop=True)
+
+    # Rango [inicio, fin) de cada departamento dentro de la tabla ordenada
+    codigos_depto = tabla['Departamento'].cat.codes.to_numpy()
+    limites = np.searchsorted(codigos_depto, np.arange(len(departamento.categories) + 1))
+    rangos = {
+        nombre: (int(limites[i]), int(limites[i + 1]))
+        for i, nombre in enumerate(departamento.categories)
+    }
+    return {'tabla': tabla, 'rangos': rangos, 'codigos_recinto': tabla['Recinto'].cat.codes.to_numpy()}
+
+def recintos_de_departamento(indice, departamento):
+    """Recintos presentes en un departamento, en orden alfabético"""
+    inicio, fin = indice['rangos'].get(departamento, (0, 0))
+    codigos = np.unique(indice['codigos_recinto'][inicio:fin])
+    return list(indice['tabla']['Recinto'].cat.categories[codigos])
+
+def consultar_mesas(indice, departamento=None, recinto=None, ganadores=None, min_nulos=0.0, min_blancos=0.0,
+                    orden='Mesa', descendente=False, pagina=1, tamano_pagina=MESAS_POR_PAGINA):
+    """Filtrar, ordenar y paginar mesas en el servidor; solo se devuelve la página visible"""
+    tabla = indice['tabla']
+    inicio, fin = 0, len(tabla)
+
+    # Departamento y recinto se resuelven como rangos contiguos de la tabla ordenada
+    if departamento:
+        inicio, fin = indice['rangos'].get(departamento, (0, 0))
+        if recinto:
+            categorias = tabla['Recinto'].cat.categories
+            posicion = categorias.get_indexer([recinto])[0]
+            codigos = indice['codigos_recinto'][inicio:fin]
+            desde = np.searchsorted(codigos, posicion, side='left')
+            hasta = np.searchsorted(codigos, posicion, side='right')
+            inicio, fin = inicio + desde, inicio + hasta
+
+    seleccion = tabla.iloc[inicio:fin]
+    mascara = np.ones(len(seleccion), dtype=bool)
+    if ganadores:
+        mascara &= seleccion['Ganador'].isin(ganadores).to_numpy()
+    if min_nulos:
+        mascara &= seleccion['% Nulos'].to_numpy() >= min_nulos
+    if min_blancos:
+        mascara &= seleccion['% Blancos'].to_numpy() >= min_blancos
+    posiciones = np.flatnonzero(mascara)
+
+    total = len(posiciones)
+    resumen = {
+        'mesas': total,
+        'votos_validos': int(seleccion['VotoValido'].to_numpy()[posiciones].sum()),
+        'votos_nulos': int(seleccion['VotoNulo'].to_numpy()[posiciones].sum()),
+        'votos_blancos': int(seleccion['VotoBlanco'].to_numpy()[posiciones].sum()),
+        'ganadores': seleccion['Ganador'].iloc[posiciones].value_counts().to_dict()
+    }
+
+    # Ordenar solo las posiciones filtradas y recortar la página pedida
+    if orden != 'Mesa' and orden in seleccion.columns:
+        valores = seleccion[orden].to_numpy()[posiciones]
+        if isinstance(seleccion[orden].dtype, pd.CategoricalDtype):
+            valores = seleccion[orden].cat.codes.to_numpy()[posiciones]
+        posiciones = posiciones[np.argsort(valores, kind='stable')]
+    if descendente:
+        posiciones = posiciones[::-1]
+
+    paginas = max((total + tamano_pagina - 1) // tamano_pagina, 1)
+    pagina = min(max(pagina, 1), paginas)
+    visibles = posiciones[(pagina - 1) * tamano_pagina:pagina * tamano_pagina]
+
+    return {
+        'filas': seleccion.iloc[visibles].reset_index(drop=True),
+        'total': total,
+        'pagina': pagina,
+        'paginas': paginas,
+        'resumen': resumen
+    }
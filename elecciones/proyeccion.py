@@ -0,0 +1,148 @@
+"""Proyección del conteo de segunda vuelta por Monte Carlo estratificado por departamento"""
+import numpy as np
+import pandas as pd
+
+from .agregacion import codigos_departamento
+from .config import (
+    COLUMNA_MESA, CONFIANZA_PROYECCION, DEPARTAMENTOS_OFICIALES, SEMILLA_PROYECCION, SIMULACIONES_PROYECCION
+)
+from .cruce import _votos, cruzar_mesas, indice_por_clave
+from .diagnostico import instrumentado
+
+# Opciones simuladas por mesa; el ganador se decide entre las dos primeras
+OPCIONES_PROYECCION = ['PDC', 'LIBRE', 'Nulo/Blanco']
+
+def _votos_segunda(df):
+    """Matriz mesas x OPCIONES_PROYECCION de la segunda vuelta"""
+    return np.column_stack([_votos(df, 'PDC'), _votos(df, 'LIBRE'), _votos(df, 'VotoNulo') + _votos(df, 'VotoBlanco')])
+
+def _estratos(df, indices=None):
+    """Estrato de cada mesa: posición del departamento, o el último estrato si no tiene uno oficial"""
+    n_deptos = len(DEPARTAMENTOS_OFICIALES)
+    filas = len(df) if indices is None else len(indices)
+    if 'NombreDepartamento' not in df.columns:
+        return np.full(filas, n_deptos, dtype='int64')
+    departamentos = df['NombreDepartamento'] if indices is None else df['NombreDepartamento'].iloc[indices]
+    codigos = codigos_departamento(departamentos).astype('int64')
+    return np.where(codigos >= 0, codigos, n_deptos)
+
+def _mesas_pendientes(df_primera, df_segunda, n_estratos):
+    """Mesas de la primera vuelta (el padrón completo de mesas) que aún no llegaron, por estrato"""
+    if df_primera.empty or COLUMNA_MESA not in df_primera.columns or COLUMNA_MESA not in df_segunda.columns:
+        return np.zeros(n_estratos, dtype='int64')
+    pos_1, _ = cruzar_mesas(df_primera, df_segunda)
+    _, unicas = indice_por_clave(df_primera)
+    contadas = np.zeros(len(df_primera), dtype=bool)
+    contadas[pos_1] = True
+    faltantes = unicas[~contadas[unicas]]
+    return np.bincount(_estratos(df_primera, faltantes), minlength=n_estratos)
+
+def _momentos(votos, estratos, n_estratos):
+    """Cantidad, media y covarianza muestral de los votos de las mesas contadas de cada estrato"""
+    k = votos.shape[1]
+    cantidad = np.bincount(estratos, minlength=n_estratos).astype('float64')
+    sumas = np.column_stack([np.bincount(estratos, weights=votos[:, j], minlength=n_estratos) for j in range(k)])
+    cruzados = np.empty((n_estratos, k, k))
+    for j in range(k):
+        for l in range(j, k):
+            cruzados[:, j, l] = cruzados[:, l, j] = np.bincount(estratos, weights=votos[:, j] * votos[:, l], minlength=n_estratos)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        media = sumas / cantidad[:, None]
+        covarianza = (cruzados - cantidad[:, None, None] * media[:, :, None] * media[:, None, :]) / (cantidad[:, None, None] - 1)
+    return cantidad, np.nan_to_num(media), np.nan_to_num(covarianza)
+
+def _raiz_psd(covarianza):
+    """Raíz de matrices semidefinidas (por lotes); tolera columnas constantes donde Cholesky falla"""
+    valores, vectores = np.linalg.eigh(covarianza)
+    return vectores * np.sqrt(np.clip(valores, 0, None))[:, None, :]
+
+@instrumentado('proyeccion')
+def proyectar_resultados(df_primera, df_segunda, simulaciones=SIMULACIONES_PROYECCION,
+                         confianza=CONFIANZA_PROYECCION, semilla=SEMILLA_PROYECCION):
+    """Proyectar el resultado final de la segunda vuelta a partir de las mesas ya contadas
+
+    Para cada departamento, la suma de sus mesas pendientes se simula con la distribución
+    predictiva normal de las mesas contadas del mismo departamento: media r·μ y covarianza
+    r·(1 + r/n)·Σ, que suma la variación entre mesas y la incertidumbre de estimar μ con n
+    mesas. Los departamentos sin mesas contadas usan los momentos nacionales. Todas las
+    simulaciones se generan en un solo arreglo simulaciones x estratos x opciones.
+    """
+    vacio = {
+        'proyeccion': pd.DataFrame(), 'departamentos': pd.DataFrame(), 'prob_victoria': {},
+        'contadas': 0, 'pendientes': 0, 'avance': 0.0, 'simulaciones': 0, 'confianza': confianza
+    }
+    if df_segunda.empty:
+        return vacio
+
+    n_deptos = len(DEPARTAMENTOS_OFICIALES)
+    n_estratos = n_deptos + 1
+    votos = _votos_segunda(df_segunda).astype('float64')
+    estratos = _estratos(df_segunda)
+    pendientes = _mesas_pendientes(df_primera, df_segunda, n_estratos)
+    cantidad, media, covarianza = _momentos(votos, estratos, n_estratos)
+
+    # Estratos con menos de 2 mesas contadas toman media y dispersión nacionales
+    nacional_n = float(len(votos))
+    nacional_media = votos.mean(axis=0)
+    nacional_cov = np.cov(votos, rowvar=False) if len(votos) > 1 else np.zeros((votos.shape[1],) * 2)
+    sin_datos = cantidad < 2
+    media[sin_datos] = nacional_media
+    covarianza[sin_datos] = nacional_cov
+    referencia = np.where(sin_datos, nacional_n, cantidad)
+
+    r = pendientes.astype('float64')
+    escala = np.sqrt(r * (1 + r / np.maximum(referencia, 1)))
+    generador = np.random.default_rng(semilla)
+    ruido = generador.standard_normal((simulaciones, n_estratos, votos.shape[1]))
+    simulado = r[None, :, None] * media[None] + escala[None, :, None] * np.einsum('sek,ejk->sej', ruido, _raiz_psd(covarianza))
+    simulado = np.clip(simulado, 0, None)
+
+    contado_estrato = np.column_stack([np.bincount(estratos, weights=votos[:, j], minlength=n_estratos) for j in range(votos.shape[1])])
+    final_estrato = contado_estrato[None] + simulado
+    final = final_estrato.sum(axis=1)
+
+    alfa = (1 - confianza) / 2
+    with np.errstate(divide='ignore', invalid='ignore'):
+        validos = final[:, 0] + final[:, 1]
+        porcentaje_pdc = np.where(validos > 0, final[:, 0] / validos * 100, 50.0)
+    porcentajes = {'PDC': porcentaje_pdc, 'LIBRE': 100 - porcentaje_pdc}
+
+    proyeccion = pd.DataFrame({
+        'Contado': contado_estrato.sum(axis=0).round().astype('int64'),
+        'Proyectado': final.mean(axis=0).round().astype('int64'),
+        'Inferior': np.quantile(final, alfa, axis=0).round().astype('int64'),
+        'Superior': np.quantile(final, 1 - alfa, axis=0).round().astype('int64')
+    }, index=pd.Index(OPCIONES_PROYECCION, name='Opción'))
+    # Porcentajes sobre votos válidos: solo para los partidos
+    proyeccion['% Válidos'] = [round(float(porcentajes[o].mean()), 2) if o in porcentajes else np.nan for o in OPCIONES_PROYECCION]
+    proyeccion['% Inferior'] = [round(float(np.quantile(porcentajes[o], alfa)), 2) if o in porcentajes else np.nan for o in OPCIONES_PROYECCION]
+    proyeccion['% Superior'] = [round(float(np.quantile(porcentajes[o], 1 - alfa)), 2) if o in porcentajes else np.nan for o in OPCIONES_PROYECCION]
+
+    # Porcentaje proyectado de PDC por departamento con su intervalo
+    with np.errstate(divide='ignore', invalid='ignore'):
+        validos_estrato = final_estrato[:, :n_deptos, 0] + final_estrato[:, :n_deptos, 1]
+        pdc_estrato = np.where(validos_estrato > 0, final_estrato[:, :n_deptos, 0] / validos_estrato * 100, 0.0)
+    con_mesas = (cantidad[:n_deptos] + pendientes[:n_deptos]) > 0
+    departamentos = pd.DataFrame({
+        'Departamento': DEPARTAMENTOS_OFICIALES,
+        'Contadas': cantidad[:n_deptos].astype('int64'),
+        'Pendientes': pendientes[:n_deptos],
+        'PDC (%)': pdc_estrato.mean(axis=0).round(2),
+        'PDC Inferior (%)': np.quantile(pdc_estrato, alfa, axis=0).round(2),
+        'PDC Superior (%)': np.quantile(pdc_estrato, 1 - alfa, axis=0).round(2)
+    })[con_mesas].reset_index(drop=True)
+    departamentos['LIBRE (%)'] = (100 - departamentos['PDC (%)']).round(2)
+
+    victoria_pdc = float((final[:, 0] > final[:, 1]).mean())
+    contadas = int(len(votos))
+    total_pendientes = int(pendientes.sum())
+    return {
+        'proyeccion': proyeccion,
+        'departamentos': departamentos,
+        'prob_victoria': {'PDC': victoria_pdc, 'LIBRE': 1 - victoria_pdc},
+        'contadas': contadas,
+        'pendientes': total_pendientes,
+        'avance': contadas / (contadas + total_pendientes) * 100,
+        'simulaciones': simulaciones,
+        'confianza': confianza
+    }
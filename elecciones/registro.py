@@ -0,0 +1,72 @@
+"""Registro de agregados y figuras: de qué vueltas depende cada uno y cómo se calcula"""
+import functools
+
+from .agregacion import (
+    _cambios_entre_vueltas, _cobertura_primera, _patrones_departamentos, _tabla_departamentos, actas_por_mesa, contar_mesas
+)
+from .auditoria import auditar_actas
+from .config import PARTIDOS_PRIMERA, PARTIDOS_SEGUNDA
+from .cruce import calcular_variaciones
+from .figuras import (
+    _figura_comparativo, _figura_evolucion, _figura_mapa, _figura_mapa_nivel, _figura_patrones, _figura_pie,
+    _figura_progreso, _figura_proyeccion, _figura_transferencias, _figura_variaciones
+)
+from .historial import progreso_conteo
+from .mesas import construir_indice_mesas
+from .proyeccion import proyectar_resultados
+from .transferencia import estimar_transferencias
+
+def _mesa_a_mesa(calcular):
+    """Cálculo sobre las actas mesa a mesa: las arma si llegaron por fragmentos; por bloques no hay mesas y devuelve None"""
+    @functools.wraps(calcular)
+    def envuelto(vueltas, **parametros):
+        por_mesa = {}
+        for vuelta, (resultados, actas, departamentos) in vueltas.items():
+            df = actas_por_mesa(actas)
+            if df is None:
+                return None
+            por_mesa[vuelta] = (resultados, df, departamentos)
+        return calcular(por_mesa, **parametros)
+    return envuelto
+
+# Agregados disponibles para la interfaz y el precálculo: vueltas de las que dependen y cómo se calculan
+# (los que necesitan las mesas devuelven None en modo por bloques)
+AGREGADOS = {
+    'resultados_primera': (['primera'], lambda v: v['primera'][0]),
+    'resultados_segunda': (['segunda'], lambda v: v['segunda'][0]),
+    'deptos_primera': (['primera'], lambda v: v['primera'][2]),
+    'deptos_segunda': (['segunda'], lambda v: v['segunda'][2]),
+    'total_mesas': (['primera', 'segunda'], lambda v: contar_mesas(v['primera'][1]) + contar_mesas(v['segunda'][1])),
+    'tabla_departamentos': (['segunda'], _tabla_departamentos),
+    'patrones_departamentos': (['segunda'], _patrones_departamentos),
+    'cambios': (['primera', 'segunda'], _cambios_entre_vueltas),
+    'cobertura_primera': (['primera'], _cobertura_primera),
+    'indice_mesas_primera': (['primera'], _mesa_a_mesa(lambda v: construir_indice_mesas(v['primera'][1], PARTIDOS_PRIMERA))),
+    'indice_mesas_segunda': (['segunda'], _mesa_a_mesa(lambda v: construir_indice_mesas(v['segunda'][1], PARTIDOS_SEGUNDA))),
+    'auditoria_primera': (['primera'], _mesa_a_mesa(lambda v: auditar_actas(v['primera'][1], PARTIDOS_PRIMERA))),
+    'auditoria_segunda': (['segunda'], _mesa_a_mesa(lambda v: auditar_actas(v['segunda'][1], PARTIDOS_SEGUNDA))),
+    'transferencias': (['primera', 'segunda'], _mesa_a_mesa(lambda v: estimar_transferencias(v['primera'][1], v['segunda'][1]))),
+    'variaciones': (['primera', 'segunda'], _mesa_a_mesa(lambda v: calcular_variaciones(v['primera'][1], v['segunda'][1]))),
+    'proyeccion': (['primera', 'segunda'], _mesa_a_mesa(lambda v: proyectar_resultados(v['primera'][1], v['segunda'][1]))),
+    # El historial cambia solo cuando se registra un snapshot nuevo, es decir, cuando cambian las firmas
+    'historial_primera': (['primera', 'segunda'], lambda v: progreso_conteo('primera')),
+    'historial_segunda': (['primera', 'segunda'], lambda v: progreso_conteo('segunda'))
+}
+
+# Figuras disponibles: vueltas de las que dependen, constructor y parámetros
+FIGURAS = {
+    'pie_primera': (['primera'], _figura_pie, (('vuelta', 'primera'), ('titulo', "Distribución de Votos - Primera Vuelta"))),
+    'pie_segunda': (['segunda'], _figura_pie, (('vuelta', 'segunda'), ('titulo', "Distribución de Votos - Segunda Vuelta"))),
+    'mapa_segunda': (['segunda'], _figura_mapa, (('vuelta', 'segunda'), ('titulo', "Resultados por Departamento - Segunda Vuelta"))),
+    'mapa_nivel': (['segunda'], _figura_mapa_nivel, (('nivel', 'provincia'), ('departamento', None), ('titulo', "Resultados por Provincia - Segunda Vuelta"))),
+    'comparativo': (['primera', 'segunda'], _figura_comparativo, ()),
+    'patrones': (['segunda'], _figura_patrones, ()),
+    'evolucion': (['primera', 'segunda'], _figura_evolucion, ()),
+    'transferencias_nacional': (['primera', 'segunda'], _mesa_a_mesa(_figura_transferencias), ()),
+    'variaciones_departamentos': (['primera', 'segunda'], _mesa_a_mesa(_figura_variaciones), ()),
+    'proyeccion_barras': (['primera', 'segunda'], _mesa_a_mesa(_figura_proyeccion), ()),
+    'progreso_conteo': (['primera', 'segunda'], _figura_progreso, (('vuelta', 'segunda'), ('horas', None)))
+}
+
+# Figuras que dibujan la geometría local: su caché también depende de los GeoJSON
+FIGURAS_CON_GEOMETRIA = {'mapa_segunda', 'mapa_nivel'}
@@ -0,0 +1,108 @@
+"""Transferencia de votos entre vueltas por regresión ecológica a nivel de mesa"""
+import numpy as np
+import pandas as pd
+
+from .agregacion import codigos_departamento
+from .config import (
+    COLUMNA_MESA, DEPARTAMENTOS_OFICIALES, PARTIDOS_PRIMERA, PARTIDOS_SEGUNDA, REGULARIZACION_TRANSFERENCIA
+)
+from .cruce import _votos, cruzar_mesas
+from .diagnostico import instrumentado
+
+def _proporciones(df, partidos):
+    """Votos por opción (partidos y Nulo/Blanco) y votos emitidos de cada mesa"""
+    opciones = np.column_stack([_votos(df, p) for p in partidos] + [_votos(df, 'VotoNulo') + _votos(df, 'VotoBlanco')])
+    return opciones, opciones.sum(axis=1)
+
+@instrumentado('transferencias')
+def estimar_transferencias(df_primera, df_segunda, partidos=PARTIDOS_PRIMERA, destinos=PARTIDOS_SEGUNDA):
+    """Matriz de transferencia origen (1ra vuelta) -> destino (2da vuelta) nacional y por departamento
+
+    Regresión de Goodman ponderada por votos emitidos: la proporción de cada destino en una mesa
+    se explica por las proporciones de origen de esa misma mesa. Las ecuaciones normales de los 9
+    departamentos se resuelven juntas, con una contracción hacia la estimación nacional, y cada
+    fila se recorta a [0, 1] y se normaliza para que sume 100%.
+    """
+    origenes = partidos + ['Nulo/Blanco']
+    columnas_destino = destinos + ['Nulo/Blanco']
+    vacio = {'nacional': pd.DataFrame(), 'departamentos': pd.DataFrame(), 'flujos': pd.DataFrame(), 'mesas': 0, 'cobertura': 0.0}
+    if df_primera.empty or df_segunda.empty or COLUMNA_MESA not in df_primera.columns or COLUMNA_MESA not in df_segunda.columns:
+        return vacio
+
+    pos_1, pos_2 = cruzar_mesas(df_primera, df_segunda)
+    votos_1, emitidos_1 = _proporciones(df_primera.iloc[pos_1], partidos)
+    votos_2, emitidos_2 = _proporciones(df_segunda.iloc[pos_2], destinos)
+    usar = (emitidos_1 > 0) & (emitidos_2 > 0)
+    if not usar.any():
+        return vacio
+
+    x = votos_1[usar] / emitidos_1[usar, None]
+    y = votos_2[usar] / emitidos_2[usar, None]
+    peso = emitidos_1[usar].astype('float64')
+
+    # Departamento de la mesa: el de la segunda vuelta si lo trae, si no el de la primera
+    if 'NombreDepartamento' in df_segunda.columns:
+        depto = codigos_departamento(df_segunda['NombreDepartamento'].iloc[pos_2])[usar]
+    elif 'NombreDepartamento' in df_primera.columns:
+        depto = codigos_departamento(df_primera['NombreDepartamento'].iloc[pos_1])[usar]
+    else:
+        depto = np.full(usar.sum(), -1, dtype='int8')
+
+    # Ecuaciones normales X'WX y X'WY por departamento; la última posición del lote es la nacional
+    n_deptos = len(DEPARTAMENTOS_OFICIALES)
+    k, m = x.shape[1], y.shape[1]
+    xtx = np.zeros((n_deptos + 1, k, k))
+    xty = np.zeros((n_deptos + 1, k, m))
+    orden = np.argsort(depto, kind='stable')
+    limites = np.searchsorted(depto[orden], np.arange(-1, n_deptos + 1))
+    for d in range(n_deptos):
+        filas = orden[limites[d + 1]:limites[d + 2]]
+        xw = x[filas] * peso[filas, None]
+        xtx[d] = xw.T @ x[filas]
+        xty[d] = xw.T @ y[filas]
+    xw = x * peso[:, None]
+    xtx[n_deptos] = xw.T @ x
+    xty[n_deptos] = xw.T @ y
+
+    # Nacional primero, solo con un mínimo de estabilidad numérica (contraerla hacia cero la sesgaría);
+    # luego los departamentos contraídos hacia ella (ridge con centro en la nacional)
+    escala = np.trace(xtx, axis1=1, axis2=2) / k
+    lam = REGULARIZACION_TRANSFERENCIA * escala + 1e-9
+    identidad = np.eye(k)
+    beta_nacional = np.linalg.solve(xtx[n_deptos] + (1e-6 * escala[n_deptos] + 1e-9) * identidad, xty[n_deptos])
+    beta = np.linalg.solve(
+        xtx[:n_deptos] + lam[:n_deptos, None, None] * identidad,
+        xty[:n_deptos] + lam[:n_deptos, None, None] * beta_nacional
+    )
+    beta = np.concatenate([beta, beta_nacional[None]], axis=0)
+
+    beta = np.clip(beta, 0, 1)
+    sumas = beta.sum(axis=2, keepdims=True)
+    beta = np.divide(beta, sumas, out=np.full_like(beta, 1 / m), where=sumas > 0) * 100
+
+    nacional = pd.DataFrame(beta[n_deptos], index=pd.Index(origenes, name='Origen'), columns=columnas_destino).round(1)
+
+    mesas_por_depto = np.bincount(depto[depto >= 0], minlength=n_deptos)
+    con_mesas = np.flatnonzero(mesas_por_depto > 0)
+    departamentos = pd.concat([
+        pd.DataFrame(beta[d], index=pd.Index(origenes, name='Origen'), columns=columnas_destino)
+        .round(1).reset_index().assign(Departamento=DEPARTAMENTOS_OFICIALES[d], Mesas=int(mesas_por_depto[d]))
+        for d in con_mesas
+    ], ignore_index=True) if len(con_mesas) else pd.DataFrame()
+    if not departamentos.empty:
+        departamentos = departamentos[['Departamento', 'Mesas', 'Origen'] + columnas_destino]
+
+    # Votos estimados que cada origen aportó a cada destino en las mesas emparejadas
+    votos_origen = votos_1[usar].sum(axis=0)
+    flujos = pd.DataFrame(
+        (votos_origen[:, None] * beta[n_deptos] / 100).round().astype('int64'),
+        index=pd.Index(origenes, name='Origen'), columns=columnas_destino
+    )
+
+    return {
+        'nacional': nacional,
+        'departamentos': departamentos,
+        'flujos': flujos,
+        'mesas': int(usar.sum()),
+        'cobertura': float(usar.sum() / len(df_segunda) * 100)
+    }
@@ -0,0 +1,8 @@
+"""Directorio de trabajo aislado para las pruebas"""
+import pytest
+
+@pytest.fixture
+def directorio(tmp_path, monkeypatch):
+    """Directorio de trabajo vacío: los CSV, cachés e historial se leen y escriben ahí"""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
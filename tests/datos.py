@@ -0,0 +1,38 @@
+"""Actas sintéticas para las pruebas"""
+import numpy as np
+import pandas as pd
+
+from elecciones.config import COLUMNA_MESA, DEPARTAMENTOS_OFICIALES, PARTIDOS_PRIMERA
+
+def actas_segunda(mesas=40, semilla=0):
+    """Actas de segunda vuelta con departamento, cuatro mesas por recinto"""
+    generador = np.random.default_rng(semilla)
+    pdc = generador.integers(0, 200, mesas)
+    libre = generador.integers(0, 200, mesas)
+    return pd.DataFrame({
+        COLUMNA_MESA: [f"{100 + i // 4}.{1000 + i}" for i in range(mesas)],
+        'NombreDepartamento': [DEPARTAMENTOS_OFICIALES[(i // 4) % len(DEPARTAMENTOS_OFICIALES)] for i in range(mesas)],
+        'NombreRecinto': [f"Recinto {i // 4}" for i in range(mesas)],
+        'PDC': pdc,
+        'LIBRE': libre,
+        'VotoNulo': generador.integers(0, 20, mesas),
+        'VotoBlanco': generador.integers(0, 20, mesas),
+        'VotoValido': pdc + libre,
+        'Sigla': np.where(pdc > libre, 'PDC', 'LIBRE')
+    })
+
+def actas_primera(mesas=40, semilla=1):
+    """Actas de primera vuelta sin departamento: se asigna con el índice geográfico"""
+    generador = np.random.default_rng(semilla)
+    votos = generador.integers(0, 100, (mesas, len(PARTIDOS_PRIMERA)))
+    actas = pd.DataFrame(votos, columns=PARTIDOS_PRIMERA)
+    actas.insert(0, COLUMNA_MESA, [f"{100 + i // 4}.{1000 + i}" for i in range(mesas)])
+    actas.insert(1, 'NombreRecinto', [f"Recinto {i // 4}" for i in range(mesas)])
+    # Sin código válido: el departamento sale del nombre del recinto o queda sin asignar
+    actas.loc[mesas - 2, COLUMNA_MESA] = 'sin-codigo'
+    actas.loc[mesas - 1, [COLUMNA_MESA, 'NombreRecinto']] = ['sin-codigo', 'Recinto desconocido']
+    actas['VotoNulo'] = generador.integers(0, 20, mesas)
+    actas['VotoBlanco'] = generador.integers(0, 20, mesas)
+    actas['VotoValido'] = votos.sum(axis=1)
+    actas['Sigla'] = np.array(PARTIDOS_PRIMERA)[votos.argmax(axis=1)]
+    return actas
@@ -0,0 +1,65 @@
+"""Agregación por nivel e índice geográfico mesa -> departamento"""
+import numpy as np
+import pandas as pd
+
+from datos import actas_segunda
+from elecciones.agregacion import agregar_por_nivel, asignar_departamentos, construir_indice_geografico
+from elecciones.config import COLUMNA_MESA, DEPARTAMENTOS_OFICIALES, PARTIDOS_SEGUNDA
+
+def test_agregar_por_nivel_suma_los_votos_de_cada_departamento():
+    actas = actas_segunda()
+    actas['NombreDepartamento'] = actas['NombreDepartamento'].astype('category')
+
+    tabla = agregar_por_nivel(actas, 'departamento', PARTIDOS_SEGUNDA + ['MAS-IPSP'])
+
+    esperado = actas.groupby('NombreDepartamento', observed=True)[PARTIDOS_SEGUNDA].sum()
+    assert list(tabla.index) == DEPARTAMENTOS_OFICIALES
+    assert tabla.index.name == 'Departamento'
+    assert (tabla.dtypes == 'int64').all()
+    for departamento, votos in esperado.iterrows():
+        assert tabla.loc[departamento, PARTIDOS_SEGUNDA].tolist() == votos.tolist()
+    assert (tabla.drop(index=esperado.index.astype(str)) == 0).all().all()
+    # Partidos ausentes del CSV en cero y totales iguales a los nacionales
+    assert (tabla['MAS-IPSP'] == 0).all()
+    assert tabla[PARTIDOS_SEGUNDA].sum().tolist() == actas[PARTIDOS_SEGUNDA].sum().tolist()
+
+def test_agregar_por_nivel_sin_columna_del_nivel():
+    tabla = agregar_por_nivel(actas_segunda(), 'provincia', PARTIDOS_SEGUNDA)
+
+    assert tabla.empty
+    assert list(tabla.columns) == PARTIDOS_SEGUNDA
+    assert tabla.index.name == 'Provincia'
+
+def test_indice_geografico_excluye_la_clave_centinela():
+    fuente = pd.DataFrame({
+        COLUMNA_MESA: ['100.1', 'sin-codigo', None, '101.2'],
+        'NombreDepartamento': ['La Paz', 'Oruro', 'Potosí', 'Tarija'],
+        'NombreRecinto': ['Recinto A', 'Recinto B', 'Recinto C', 'Recinto D']
+    })
+
+    indice = construir_indice_geografico([fuente])
+
+    assert -1 not in indice['claves']
+    assert len(indice['claves']) == 2
+    assert np.all(np.diff(indice['claves']) > 0)
+
+    # Una mesa sin código válido no hereda el departamento de otra mesa sin código
+    actas = pd.DataFrame({COLUMNA_MESA: ['100.1', 'otro-invalido', '101.2'], 'NombreRecinto': ['X', 'Y', 'Z']})
+    asignadas = asignar_departamentos(actas, indice)
+    assert asignadas['NombreDepartamento'].tolist()[0] == 'La Paz'
+    assert pd.isna(asignadas['NombreDepartamento'].iloc[1])
+    assert asignadas['NombreDepartamento'].tolist()[2] == 'Tarija'
+
+def test_indice_geografico_usa_el_recinto_de_mesas_sin_codigo():
+    fuente = pd.DataFrame({
+        COLUMNA_MESA: ['sin-codigo'],
+        'NombreDepartamento': ['Beni'],
+        'NombreRecinto': ['Recinto único']
+    })
+
+    indice = construir_indice_geografico([fuente])
+    actas = pd.DataFrame({COLUMNA_MESA: ['999.1'], 'NombreRecinto': ['Recinto único']})
+    asignadas = asignar_departamentos(actas, indice)
+
+    assert len(indice['claves']) == 0
+    assert asignadas['NombreDepartamento'].tolist() == ['Beni']
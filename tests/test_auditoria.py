@@ -0,0 +1,52 @@
+"""Auditoría de actas: cada alerta marca la mesa que la provoca"""
+import numpy as np
+import pandas as pd
+
+from elecciones.auditoria import auditar_actas
+from elecciones.config import COLUMNA_MESA
+
+def _actas():
+    """Veinte mesas parejas de La Paz, con una mesa distinta para cada alerta"""
+    mesas = 20
+    actas = pd.DataFrame({
+        COLUMNA_MESA: [f'1.{i}' for i in range(mesas)],
+        'NombreRecinto': [f'Recinto {i // 5}' for i in range(mesas)],
+        'NombreDepartamento': 'La Paz',
+        'PDC': 100,
+        'LIBRE': 60,
+        'VotoNulo': 4 + np.arange(mesas) % 3,
+        'VotoBlanco': 3,
+        'Sigla': 'PDC'
+    })
+    actas['VotoValido'] = actas['PDC'] + actas['LIBRE']
+    actas.loc[0, 'VotoValido'] += 7
+    actas.loc[6, 'Sigla'] = 'LIBRE'
+    actas.loc[11, 'VotoNulo'] = 80
+    actas.loc[17, ['PDC', 'LIBRE', 'VotoValido']] = [900, 700, 1600]
+    return actas
+
+def test_auditoria_marca_cada_mesa_con_su_alerta():
+    auditoria = auditar_actas(_actas(), ['PDC', 'LIBRE'])
+
+    assert auditoria['resumen'] == {
+        'mesas': 20, 'suma': 1, 'sigla': 1, 'nulos_blancos': 1, 'emitidos': 1, 'marcadas': 4
+    }
+    mesas = auditoria['mesas'].set_index('Mesa')
+    assert sorted(mesas.index) == ['1.0', '1.11', '1.17', '1.6']
+    assert mesas.loc['1.0', 'Suma ≠ Válidos'] and mesas.loc['1.0', 'VotoValido'] == 167
+    assert mesas.loc['1.6', 'Sigla ≠ Ganador'] and mesas.loc['1.6', 'Ganador Real'] == 'PDC'
+    assert mesas.loc['1.11', 'Nulos/Blancos Atípicos'] and mesas.loc['1.11', '% Nulos'] == 32.9
+    assert mesas.loc['1.17', 'Votos Emitidos Atípicos'] and mesas.loc['1.17', 'Z Emitidos'] == 4.24
+    assert (mesas['Alertas'] == 1).all()
+    assert (mesas['Departamento'] == 'La Paz').all()
+
+def test_pruebas_de_digitos_nacional_y_por_departamento():
+    digitos = auditar_actas(_actas(), ['PDC', 'LIBRE'])['digitos']
+
+    # Solo La Paz tiene mesas: los demás departamentos no aparecen
+    assert digitos['Grupo'].tolist() == ['Nacional', 'Nacional', 'La Paz', 'La Paz']
+    ultimo = digitos[digitos['Prueba'] == 'Último dígito']
+    # Todos los conteos terminan en 0: 40 conteos concentrados en un dígito
+    assert ultimo['Conteos'].tolist() == [40, 40]
+    assert ultimo['Chi²'].tolist() == [360.0, 360.0]
+    assert digitos['Sospechoso'].all()
@@ -0,0 +1,62 @@
+"""Carga por bloques: los mismos totales que la carga completa en memoria"""
+import pandas as pd
+import pytest
+
+from datos import actas_primera, actas_segunda
+from elecciones.agregacion import agregar_por_nivel, contar_mesas, es_agregado
+from elecciones.bloques import agregar_por_bloques, cargar_vuelta_por_bloques, leer_mesas_en_disco
+from elecciones.carga import cargar_vuelta
+from elecciones.config import PARTIDOS_PRIMERA, PARTIDOS_SEGUNDA
+
+@pytest.fixture
+def vueltas_en_disco(directorio):
+    actas_primera().to_csv(directorio / 'primera_vuelta.csv', index=False)
+    actas_segunda().to_csv(directorio / 'segunda_vuelta.csv', index=False)
+    return directorio
+
+@pytest.mark.parametrize('vuelta, partidos', [('primera', PARTIDOS_PRIMERA), ('segunda', PARTIDOS_SEGUNDA)])
+def test_bloques_y_memoria_dan_los_mismos_totales(vueltas_en_disco, vuelta, partidos):
+    resultados, actas, departamentos = cargar_vuelta(vuelta, por_bloques=False)
+    # Bloques de 7 filas: ningún bloque coincide con un recinto ni con un departamento
+    resultados_bloques, agregado, departamentos_bloques = cargar_vuelta_por_bloques(vuelta, filas=7)
+
+    assert es_agregado(agregado) and not es_agregado(actas)
+    assert resultados_bloques == resultados
+    assert list(resultados_bloques) == list(resultados)
+    pd.testing.assert_frame_equal(departamentos_bloques, departamentos)
+    assert contar_mesas(agregado) == contar_mesas(actas) == len(actas)
+    for nivel in ['departamento', 'provincia', 'recinto']:
+        # En memoria los recintos quedan como índice categórico; por bloques, como texto
+        pd.testing.assert_frame_equal(
+            agregar_por_nivel(agregado, nivel, partidos), agregar_por_nivel(actas, nivel, partidos),
+            check_index_type=False, check_categorical=False
+        )
+
+def test_indice_de_mesas_en_disco_filtra_por_departamento(vueltas_en_disco):
+    _, actas, _ = cargar_vuelta('segunda', por_bloques=False)
+    _, agregado, _ = cargar_vuelta_por_bloques('segunda', filas=7)
+
+    mesas = leer_mesas_en_disco(agregado['indice_mesas'], departamento='La Paz')
+
+    assert len(mesas) == (actas['NombreDepartamento'] == 'La Paz').sum()
+    assert mesas['PDC'].sum() == actas.loc[actas['NombreDepartamento'] == 'La Paz', 'PDC'].sum()
+
+def test_bytes_invalidos_a_mitad_del_archivo_releen_todo_en_latin1(directorio):
+    actas = actas_segunda(mesas=12_000)
+    actas.loc[0, 'NombreRecinto'] = 'Recinto Ñandú'
+    actas.loc[len(actas) - 1, 'NombreRecinto'] = 'Recinto Unión'
+    # Prefijo UTF-8 válido y un acta en latin-1 después de varios bloques ya entregados
+    with open(directorio / 'segunda_vuelta.csv', 'wb') as f:
+        f.write(actas.iloc[:-1].to_csv(index=False).encode('utf-8'))
+        f.write(actas.iloc[-1:].to_csv(index=False, header=False).encode('latin-1'))
+
+    resultados, actas_memoria, departamentos = cargar_vuelta('segunda', por_bloques=False)
+    # Sin índice en disco: en latin-1 el encabezado UTF-8 ya no trae la columna de código de mesa
+    agregado = agregar_por_bloques('segunda_vuelta.csv', PARTIDOS_SEGUNDA, filas=500, indice_mesas=False)
+
+    assert agregado['totales'] == resultados
+    pd.testing.assert_frame_equal(agregado['departamentos'], departamentos)
+    assert contar_mesas(agregado) == len(actas_memoria) == len(actas)
+    recintos = agregar_por_nivel(agregado, 'recinto', PARTIDOS_SEGUNDA)
+    assert 'Recinto Unión' in recintos.index and 'Recinto Ã\x91andÃº' in recintos.index
+    assert recintos.to_numpy().sum() == sum(resultados.values())
@@ -0,0 +1,70 @@
+"""Cruce de mesas entre vueltas y variaciones recalculadas sobre los votos sumados"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from elecciones.config import COLUMNA_MESA
+from elecciones.cruce import calcular_variaciones, cruzar_mesas, ranking_variaciones
+
+def _primera():
+    return pd.DataFrame({
+        COLUMNA_MESA: ['1.1', '1.2', 'sin-codigo', '2.1', '1.2'],
+        'NombreRecinto': ['Recinto A', 'Recinto A', 'Recinto C', 'Recinto B', 'Recinto A'],
+        'NombreDepartamento': 'Potosí',
+        'PDC': [40, 50, 70, 10, 99],
+        'LIBRE': [50, 50, 0, 90, 99],
+        'VotoNulo': [10, 0, 0, 0, 0],
+        'VotoBlanco': 0
+    }).assign(VotoValido=lambda df: df['PDC'] + df['LIBRE'])
+
+def _segunda():
+    return pd.DataFrame({
+        COLUMNA_MESA: ['2.1', '9.9', '1.1', '1.2'],
+        'NombreRecinto': ['Recinto B', 'Recinto Z', 'Recinto A', 'Recinto A'],
+        'NombreDepartamento': ['Oruro', 'Oruro', 'La Paz', 'La Paz'],
+        'PDC': [30, 5, 60, 50],
+        'LIBRE': [70, 5, 30, 100],
+        'VotoNulo': [0, 0, 10, 50],
+        'VotoBlanco': 0
+    }).assign(VotoValido=lambda df: df['PDC'] + df['LIBRE'])
+
+def test_cruzar_mesas_en_el_orden_de_la_primera():
+    pos_1, pos_2 = cruzar_mesas(_primera(), _segunda())
+
+    # Sin la mesa sin código, sin el duplicado de 1.2 y sin la mesa 9.9 que solo está en segunda
+    assert pos_1.tolist() == [0, 1, 3]
+    assert pos_2.tolist() == [2, 3, 0]
+
+def test_variaciones_por_mesa_recinto_y_departamento():
+    primera, segunda = _primera(), _segunda()
+
+    variaciones = calcular_variaciones(primera, segunda)
+
+    assert variaciones['emparejadas'] == 3
+    assert variaciones['cobertura'] == 75.0
+    mesas = variaciones['mesas'].set_index('Mesa')
+    assert mesas.loc['1.1', ['Δ PDC (pp)', 'Δ LIBRE (pp)', 'Swing (pp)']].tolist() == [20.0, -20.0, 20.0]
+    assert mesas.loc['1.2', ['Δ PDC (pp)', 'Swing (pp)', 'Δ Participación (%)', 'Δ Nulos (pp)']].tolist() == [-25.0, -12.5, 100.0, 25.0]
+    assert mesas.loc['2.1', 'Ganancia PDC'] == 20
+    # La ubicación sale de la segunda vuelta
+    assert mesas['Departamento'].astype(str).to_dict() == {'2.1': 'Oruro', '1.1': 'La Paz', '1.2': 'La Paz'}
+
+    # El recinto A suma sus dos mesas antes de calcular porcentajes (no promedia 20 y -12.5)
+    recinto = variaciones['recintos'].set_index('Recinto').loc['Recinto A']
+    assert recinto['Mesas'] == 2
+    assert (recinto['PDC 1ra'], recinto['PDC 2da'], recinto['Emitidos 2da']) == (90, 110, 300)
+    assert recinto['Δ PDC (pp)'] == pytest.approx(110 / 3 - 45, abs=0.01)
+    assert recinto['Swing (pp)'] == pytest.approx(((110 / 3 - 45) - (130 / 3 - 50)) / 2, abs=0.01)
+    departamentos = variaciones['departamentos'].set_index('Departamento')
+    assert departamentos['Mesas'].to_dict() == {'La Paz': 2, 'Oruro': 1}
+
+    # Una sola vez por snapshot: el mismo par de DataFrames devuelve el mismo resultado
+    assert calcular_variaciones(primera, segunda) is variaciones
+
+def test_ranking_por_direccion_y_votos_minimos():
+    mesas = calcular_variaciones(_primera(), _segunda())['mesas']
+
+    assert ranking_variaciones(mesas, direccion='negativo', cantidad=1)['Mesa'].tolist() == ['1.2']
+    assert ranking_variaciones(mesas, metrica='Δ Nulos (pp)', cantidad=2)['Mesa'].tolist()[0] == '1.2'
+    assert ranking_variaciones(mesas, min_emitidos=150).empty
+    assert np.all(np.abs(ranking_variaciones(mesas, cantidad=3)['Swing (pp)']).diff().dropna() <= 0)
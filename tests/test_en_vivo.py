@@ -0,0 +1,80 @@
+"""Conteo en vivo: lectura incremental idempotente y versión monótona"""
+import pandas as pd
+
+from datos import actas_segunda
+from elecciones.config import COLUMNA_MESA, DEPARTAMENTOS_OFICIALES, PARTIDOS_SEGUNDA
+from elecciones.en_vivo import cargar_datos_en_vivo, version_en_vivo
+
+def _escribir(ruta, actas, modo='w'):
+    actas.to_csv(ruta, index=False, header=modo == 'w', mode=modo)
+
+def _esperado(actas):
+    """Totales de una carga completa: cada mesa cuenta una vez, con su última acta"""
+    vigentes = actas.drop_duplicates(COLUMNA_MESA, keep='last')
+    resultados = {p: int(vigentes[p].sum()) for p in PARTIDOS_SEGUNDA}
+    departamentos = vigentes.groupby('NombreDepartamento')[PARTIDOS_SEGUNDA].sum()
+    departamentos = departamentos.reindex(DEPARTAMENTOS_OFICIALES, fill_value=0)
+    return resultados, departamentos, len(vigentes)
+
+def _comprobar(archivo, actas):
+    version, (resultados, vigentes, departamentos) = cargar_datos_en_vivo(archivo, PARTIDOS_SEGUNDA)
+    assert version == version_en_vivo(archivo)
+    esperados, departamentos_esperados, mesas = _esperado(actas)
+    assert resultados == esperados
+    assert departamentos.to_numpy().tolist() == departamentos_esperados.to_numpy().tolist()
+    assert len(vigentes) == mesas
+    assert vigentes[COLUMNA_MESA].is_unique
+
+def test_releer_sin_cambios_no_altera_totales_ni_version(directorio):
+    archivo = str(directorio / 'segunda_vuelta.csv')
+    actas = actas_segunda()
+    _escribir(archivo, actas)
+
+    _comprobar(archivo, actas)
+    version = version_en_vivo(archivo)
+    _comprobar(archivo, actas)
+
+    assert version_en_vivo(archivo) == version
+
+def test_actas_repetidas_y_corregidas_reemplazan_su_aporte(directorio):
+    archivo = str(directorio / 'segunda_vuelta.csv')
+    actas = actas_segunda()
+    _escribir(archivo, actas.iloc[:30])
+    _comprobar(archivo, actas.iloc[:30])
+    version = version_en_vivo(archivo)
+
+    # Las mismas actas de nuevo no cuentan dos veces
+    _escribir(archivo, actas.iloc[:10], modo='a')
+    _comprobar(archivo, pd.concat([actas.iloc[:30], actas.iloc[:10]]))
+
+    # Correcciones de mesas ya contadas (incluso de departamento) junto con mesas nuevas
+    corregidas = actas.iloc[:5].assign(PDC=7, LIBRE=3, NombreDepartamento='Pando')
+    lote = pd.concat([corregidas, actas.iloc[30:]])
+    _escribir(archivo, lote, modo='a')
+    todas = pd.concat([actas.iloc[:30], actas.iloc[:10], lote])
+    _comprobar(archivo, todas)
+
+    assert version_en_vivo(archivo) > version
+
+def test_archivo_truncado_se_relee_con_version_mayor(directorio):
+    archivo = str(directorio / 'segunda_vuelta.csv')
+    actas = actas_segunda()
+    _escribir(archivo, actas.iloc[:20])
+    _comprobar(archivo, actas.iloc[:20])
+    _escribir(archivo, actas.iloc[20:], modo='a')
+    _comprobar(archivo, actas)
+    versiones = [version_en_vivo(archivo)]
+
+    # Reescrito más corto: se reinicia desde cero, pero la versión sigue creciendo
+    _escribir(archivo, actas.iloc[:8])
+    _comprobar(archivo, actas.iloc[:8])
+    versiones.append(version_en_vivo(archivo))
+
+    # Solo el encabezado: sin actas y todavía con una versión nueva
+    _escribir(archivo, actas.iloc[:0])
+    version, (resultados, vigentes, _) = cargar_datos_en_vivo(archivo, PARTIDOS_SEGUNDA)
+    versiones.append(version)
+
+    assert vigentes.empty
+    assert not any(resultados.values())
+    assert versiones == sorted(set(versiones))
@@ -0,0 +1,31 @@
+"""Mapa departamental sin red: geometría incluida y burbujas de respaldo"""
+import pandas as pd
+
+from elecciones import geometria
+from elecciones.config import DEPARTAMENTOS_OFICIALES
+from elecciones.figuras import crear_mapa_departamental
+
+def _votos():
+    # PDC gana en los departamentos de índice par
+    return pd.DataFrame({
+        'PDC': [100 if i % 2 == 0 else 10 for i in range(len(DEPARTAMENTOS_OFICIALES))],
+        'LIBRE': [10 if i % 2 == 0 else 100 for i in range(len(DEPARTAMENTOS_OFICIALES))]
+    }, index=DEPARTAMENTOS_OFICIALES)
+
+def test_mapa_departamental_usa_la_geometria_incluida(directorio):
+    fig = crear_mapa_departamental(_votos(), "Mapa")
+
+    rellenos = [traza for traza in fig.data if traza.fill == 'toself']
+    assert {traza.name for traza in rellenos} == {'PDC', 'LIBRE'}
+    assert not any(traza.type.endswith('mapbox') for traza in fig.data)
+    assert fig.layout.mapbox.style is None
+
+def test_mapa_departamental_sin_geometria_dibuja_burbujas_sin_red(directorio, monkeypatch):
+    monkeypatch.setattr(geometria, 'DIRECTORIO_GEOMETRIA_INCLUIDA', str(directorio / 'sin_geometria'))
+
+    fig = crear_mapa_departamental(_votos(), "Mapa")
+
+    assert [traza.type for traza in fig.data] == ['scatter', 'scatter']
+    assert sorted(len(traza.x) for traza in fig.data) == [4, 5]
+    assert fig.layout.xaxis.visible is False
+    assert fig.layout.mapbox.style is None
@@ -0,0 +1,47 @@
+"""Carga por fragmentos: agregados parciales combinados y actas por mesa armadas al pedirlas"""
+import pandas as pd
+import pytest
+
+from datos import actas_primera, actas_segunda
+from elecciones import carga
+from elecciones.agregacion import _cobertura_primera, actas_por_mesa, agregar_por_nivel, contar_mesas, es_agregado
+from elecciones.carga import cargar_vuelta
+from elecciones.config import PARTIDOS_PRIMERA
+
+@pytest.fixture
+def vueltas_fragmentadas(directorio, monkeypatch):
+    # En serie: el pool de procesos no cambia lo que se combina
+    monkeypatch.setattr(carga, 'MAX_PROCESOS_INGESTA', 1)
+    actas_segunda().to_csv(directorio / 'segunda_vuelta.csv', index=False)
+    actas = actas_primera()
+    (directorio / 'primera_vuelta').mkdir()
+    for i, (inicio, fin) in enumerate([(0, 13), (13, 27), (27, len(actas))]):
+        actas.iloc[inicio:fin].to_csv(directorio / 'primera_vuelta' / f'parte_{i}.csv', index=False)
+    return directorio
+
+def test_fragmentos_dan_los_mismos_agregados_que_un_solo_csv(vueltas_fragmentadas):
+    resultados, agregado, departamentos = cargar_vuelta('primera', por_bloques=False)
+    actas_primera().to_csv(vueltas_fragmentadas / 'primera_vuelta.csv', index=False)
+    resultados_csv, actas, departamentos_csv = cargar_vuelta('primera', por_bloques=False)
+
+    assert es_agregado(agregado) and not es_agregado(actas)
+    assert resultados == resultados_csv
+    pd.testing.assert_frame_equal(departamentos, departamentos_csv)
+    assert contar_mesas(agregado) == len(actas) == 40
+    # Las mesas sin departamento se cruzaron con el índice dentro de cada fragmento
+    assert _cobertura_primera({'primera': (resultados, agregado, departamentos)}) == 97.5
+    pd.testing.assert_frame_equal(
+        agregar_por_nivel(agregado, 'recinto', PARTIDOS_PRIMERA), agregar_por_nivel(actas, 'recinto', PARTIDOS_PRIMERA),
+        check_index_type=False, check_categorical=False
+    )
+
+def test_actas_por_mesa_se_arman_una_vez_al_pedirlas(vueltas_fragmentadas):
+    _, agregado, _ = cargar_vuelta('primera', por_bloques=False)
+    assert agregado.get('por_mesa') is None
+
+    mesas = actas_por_mesa(agregado)
+
+    assert actas_por_mesa(agregado) is mesas
+    assert len(mesas) == 40
+    assert mesas[PARTIDOS_PRIMERA].sum().tolist() == actas_primera()[PARTIDOS_PRIMERA].sum().tolist()
+    assert mesas['NombreDepartamento'].notna().sum() == 39
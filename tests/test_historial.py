@@ -0,0 +1,74 @@
+"""Historial de snapshots: totales reconstruidos desde las diferencias"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from elecciones import historial
+from elecciones.config import DEPARTAMENTOS_OFICIALES, PARTIDOS_SEGUNDA
+from elecciones.historial import consultar_historial, registrar_snapshot
+
+INICIO = pd.Timestamp('2025-10-19 20:00', tz='UTC')
+
+def _snapshot(generador, mesas):
+    """Totales por departamento al azar; los nacionales son su suma"""
+    departamentos = pd.DataFrame(
+        generador.integers(0, 50_000, (len(DEPARTAMENTOS_OFICIALES), len(PARTIDOS_SEGUNDA))),
+        index=DEPARTAMENTOS_OFICIALES, columns=PARTIDOS_SEGUNDA
+    )
+    resultados = {p: int(departamentos[p].sum()) for p in PARTIDOS_SEGUNDA}
+    return resultados, pd.DataFrame(index=range(mesas)), departamentos
+
+def _fecha(i):
+    """Fecha del snapshot i: un minuto entre snapshots"""
+    return INICIO + pd.Timedelta(minutes=i)
+
+def _firma(i):
+    """Firma con la fecha de modificación del snapshot i"""
+    return (('segunda_vuelta.csv', _fecha(i).value, i),)
+
+def _nacionales(snapshots):
+    """Votos nacionales de cada snapshot, en el orden de PARTIDOS_SEGUNDA"""
+    return [[resultados[p] for p in PARTIDOS_SEGUNDA] for resultados, _, _ in snapshots]
+
+@pytest.fixture
+def snapshots(directorio, monkeypatch):
+    # Filas clave cada 3 snapshots: las consultas cruzan varias
+    monkeypatch.setattr(historial, 'INTERVALO_CLAVES_HISTORIAL', 3)
+    generador = np.random.default_rng(0)
+    # Los totales también bajan entre snapshots (correcciones): las diferencias negativas se reconstruyen igual
+    datos = [_snapshot(generador, mesas) for mesas in [10, 20, 30, 30, 45, 50, 60, 70, 75, 80, 90]]
+    for i, snapshot in enumerate(datos):
+        assert registrar_snapshot('segunda', _firma(i), snapshot)
+    return datos
+
+def test_consulta_completa_reconstruye_cada_snapshot(snapshots):
+    tabla = consultar_historial('segunda')
+
+    assert len(tabla) == len(snapshots)
+    assert tabla['Mesas'].tolist() == [len(df) for _, df, _ in snapshots]
+    assert tabla[PARTIDOS_SEGUNDA].to_numpy().tolist() == _nacionales(snapshots)
+    assert tabla.index.is_monotonic_increasing
+
+@pytest.mark.parametrize('desde, hasta', [(0, 10), (4, 7), (2, 2), (5, 9)])
+def test_consulta_por_rango_desde_una_fila_intermedia(snapshots, desde, hasta):
+    tabla = consultar_historial('segunda', desde=_fecha(desde), hasta=_fecha(hasta), departamento='Oruro')
+
+    esperado = [d.loc['Oruro', PARTIDOS_SEGUNDA].tolist() for _, _, d in snapshots[desde:hasta + 1]]
+    assert tabla[PARTIDOS_SEGUNDA].to_numpy().tolist() == esperado
+    assert tabla['Mesas'].tolist() == [len(df) for _, df, _ in snapshots[desde:hasta + 1]]
+
+def test_snapshot_repetido_no_agrega_filas(snapshots):
+    assert not registrar_snapshot('segunda', _firma(len(snapshots) - 1), snapshots[-1])
+    # Otra firma con los mismos totales y mesas tampoco
+    assert not registrar_snapshot('segunda', _firma(len(snapshots)), snapshots[-1])
+
+    assert len(consultar_historial('segunda')) == len(snapshots)
+
+def test_historial_reabierto_desde_disco(snapshots):
+    historial._HISTORIAL['estados'].clear()
+
+    assert registrar_snapshot('segunda', _firma(len(snapshots)), _snapshot(np.random.default_rng(1), 95))
+    tabla = consultar_historial('segunda')
+
+    assert len(tabla) == len(snapshots) + 1
+    assert tabla[PARTIDOS_SEGUNDA].iloc[:-1].to_numpy().tolist() == _nacionales(snapshots)
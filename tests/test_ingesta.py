@@ -0,0 +1,102 @@
+"""Lectura de CSV de actas: codificación, tipos de los votos, decodificación y cachés columnares"""
+import codecs
+import os
+
+import pandas as pd
+import pytest
+
+from elecciones import ingesta
+from elecciones.ingesta import (
+    ErrorIngesta, _aplicar_tipos, _borrar_versiones_viejas, _ruta_cache_columnar, detectar_codificacion, leer_actas
+)
+
+ENCABEZADO = 'CódigoMesa,NombreRecinto,PDC\n'
+
+@pytest.mark.parametrize('contenido, esperada', [
+    (ENCABEZADO.encode('utf-8-sig'), 'utf-8-sig'),
+    (ENCABEZADO.encode('utf-16'), 'utf-16'),
+    (ENCABEZADO.encode('utf-8'), 'utf-8'),
+    # Un prefijo solo ASCII se lee como UTF-8, su superconjunto
+    (b'CodigoMesa,PDC\n1.1,3\n', 'utf-8'),
+])
+def test_detectar_codificacion_por_bom_o_utf8_valido(directorio, contenido, esperada):
+    (directorio / 'actas.csv').write_bytes(contenido)
+
+    assert detectar_codificacion('actas.csv') == esperada
+
+def test_detectar_codificacion_de_un_csv_latin1(directorio):
+    filas = ''.join(f'{i}.1,Unión Señor {i},3\n' for i in range(200))
+    (directorio / 'actas.csv').write_bytes((ENCABEZADO + filas).encode('latin-1'))
+
+    assert codecs.lookup(detectar_codificacion('actas.csv')).name in {'iso8859-1', 'cp1252'}
+
+def test_cache_de_codificaciones_guarda_una_entrada_por_archivo(directorio):
+    ingesta._cache_codificaciones.clear()
+    archivo = directorio / 'actas.csv'
+    archivo.write_bytes(ENCABEZADO.encode('utf-8'))
+    assert detectar_codificacion('actas.csv') == 'utf-8'
+
+    # Reescrito con otro tamaño y codificación: se vuelve a detectar y reemplaza la entrada anterior
+    archivo.write_bytes(ENCABEZADO.encode('utf-8-sig') + b'1.1,Recinto,3\n')
+    assert detectar_codificacion('actas.csv') == 'utf-8-sig'
+    assert list(ingesta._cache_codificaciones) == [str(archivo)]
+
+def test_aplicar_tipos_cuenta_las_celdas_vacias_como_cero():
+    df = _aplicar_tipos(pd.DataFrame({'PDC': ['3', None, ' ', '12'], 'LIBRE': [1.0, 2.0, None, 4.0]}))
+
+    assert df['PDC'].tolist() == [3, 0, 0, 12]
+    assert df['LIBRE'].tolist() == [1, 2, 0, 4]
+    assert (df.dtypes == 'int32').all()
+
+@pytest.mark.parametrize('invalido', ['abc', '-1', '2.5', str(2 ** 31)])
+def test_aplicar_tipos_rechaza_votos_corruptos(invalido):
+    df = pd.DataFrame({'PDC': ['3', invalido, '7', invalido]})
+
+    with pytest.raises(ValueError, match=r"2 celdas de 'PDC' no son votos válidos \(filas \[1, 3\]"):
+        _aplicar_tipos(df)
+
+def test_leer_actas_rechaza_votos_corruptos_en_la_etapa_de_tipos(directorio):
+    (directorio / 'actas.csv').write_text('CódigoMesa,PDC\n1.1,3\n1.2,tres\n')
+
+    with pytest.raises(ErrorIngesta) as error:
+        leer_actas('actas.csv')
+
+    assert error.value.etapa == 'tipos'
+
+@pytest.mark.parametrize('motor', ['c', 'pyarrow'])
+def test_leer_actas_vuelve_a_latin1_si_falla_mas_alla_del_prefijo(directorio, motor):
+    filas = ''.join(f'{i}.1,Recinto {i},{i % 50}\n' for i in range(20_000))
+    with open('actas.csv', 'wb') as f:
+        f.write(f'CodigoMesa,NombreRecinto,PDC\n{filas}'.encode('utf-8'))
+        f.write('99.1,Unión,3\n'.encode('latin-1'))
+
+    df = leer_actas('actas.csv', motor)
+
+    assert len(df) == 20_001
+    assert df['NombreRecinto'].iloc[-1] == 'Unión'
+    assert df['PDC'].sum() == sum(i % 50 for i in range(20_000)) + 3
+
+def test_cache_columnar_lleva_la_version_del_parseo(directorio, monkeypatch):
+    (directorio / 'actas.csv').write_text('CódigoMesa,PDC\n1.1,3\n')
+    ruta = _ruta_cache_columnar('actas.csv')
+    assert ruta.endswith(f'.v{ingesta._VERSION_PARSEO}.feather')
+
+    # Otra versión del parseo no reutiliza la caché escrita con los tipos anteriores
+    monkeypatch.setattr(ingesta, '_VERSION_PARSEO', ingesta._VERSION_PARSEO + 1)
+    assert _ruta_cache_columnar('actas.csv') != ruta
+
+def test_borrar_versiones_viejas_respeta_bases_con_puntos(directorio):
+    cache = directorio / 'cache'
+    cache.mkdir()
+    nombres = [
+        'actas.10-1.v1.feather', 'actas.10-1.feather',  # versiones viejas de 'actas.csv'
+        'actas.2025.10-1.v1.feather', 'actas.12-9.v1.mesas.arrow', 'otras.10-1.v1.feather'
+    ]
+    for nombre in nombres + ['actas.12-9.v1.feather']:
+        (cache / nombre).touch()
+
+    _borrar_versiones_viejas(str(cache / 'actas.12-9.v1.feather'), 'feather')
+
+    assert sorted(os.listdir(cache)) == [
+        'actas.12-9.v1.feather', 'actas.12-9.v1.mesas.arrow', 'actas.2025.10-1.v1.feather', 'otras.10-1.v1.feather'
+    ]
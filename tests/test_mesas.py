@@ -0,0 +1,49 @@
+"""Explorador de mesas: rangos por departamento y recinto, filtros y paginación en el servidor"""
+from datos import actas_segunda
+from elecciones.config import COLUMNA_MESA, PARTIDOS_SEGUNDA
+from elecciones.mesas import construir_indice_mesas, consultar_mesas, recintos_de_departamento
+
+def test_departamento_y_recinto_como_rangos_ordenados():
+    indice = construir_indice_mesas(actas_segunda(), PARTIDOS_SEGUNDA)
+
+    # Beni tiene los recintos 0 y 9: cuatro mesas cada uno
+    assert recintos_de_departamento(indice, 'Beni') == ['Recinto 0', 'Recinto 9']
+    beni = consultar_mesas(indice, departamento='Beni', tamano_pagina=100)
+    assert beni['total'] == 8
+    assert beni['filas']['Mesa'].tolist() == [f'100.{1000 + i}' for i in range(4)] + [f'109.{1036 + i}' for i in range(4)]
+
+    recinto = consultar_mesas(indice, departamento='Beni', recinto='Recinto 9')
+    assert recinto['filas']['Mesa'].tolist() == [f'109.{1036 + i}' for i in range(4)]
+    assert consultar_mesas(indice, departamento='Beni', recinto='Recinto 5')['total'] == 0
+
+def test_filtros_y_resumen_sobre_todas_las_mesas_filtradas():
+    actas = actas_segunda()
+    actas.loc[[3, 17, 30], 'VotoNulo'] = 500
+    indice = construir_indice_mesas(actas, PARTIDOS_SEGUNDA)
+
+    consulta = consultar_mesas(indice, ganadores=['LIBRE'], min_nulos=50, tamano_pagina=2)
+
+    esperadas = actas[(actas['Sigla'] == 'LIBRE') & (actas['VotoNulo'] == 500)]
+    assert consulta['total'] == len(esperadas)
+    assert consulta['resumen']['votos_nulos'] == 500 * len(esperadas)
+    assert consulta['resumen']['votos_validos'] == esperadas['VotoValido'].sum()
+    assert consulta['filas']['Mesa'].tolist() == esperadas[COLUMNA_MESA].tolist() == ['104.1017']
+
+    todas = consultar_mesas(indice)['resumen']
+    assert todas['mesas'] == 40
+    assert todas['ganadores'] == actas['Sigla'].value_counts().to_dict()
+
+def test_orden_y_paginacion():
+    actas = actas_segunda()
+    indice = construir_indice_mesas(actas, PARTIDOS_SEGUNDA)
+    esperado = actas.sort_values('PDC', ascending=False, kind='stable')['PDC'].tolist()
+
+    paginas = [consultar_mesas(indice, orden='PDC', descendente=True, pagina=p, tamano_pagina=15) for p in (1, 2, 3)]
+
+    assert [p['paginas'] for p in paginas] == [3, 3, 3]
+    assert [len(p['filas']) for p in paginas] == [15, 15, 10]
+    assert sum((p['filas']['PDC'].tolist() for p in paginas), []) == esperado
+    # Una página fuera de rango se recorta a la última
+    ultima = consultar_mesas(indice, orden='PDC', descendente=True, pagina=99, tamano_pagina=15)
+    assert ultima['pagina'] == 3
+    assert set(ultima['filas']['Mesa']) <= set(actas[COLUMNA_MESA])
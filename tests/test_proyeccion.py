@@ -0,0 +1,55 @@
+"""Proyección de la segunda vuelta: mesas pendientes simuladas con los momentos de su departamento"""
+import numpy as np
+import pytest
+
+from datos import actas_segunda
+from elecciones.config import DEPARTAMENTOS_OFICIALES
+from elecciones.proyeccion import proyectar_resultados
+
+def _vueltas():
+    """Todas las mesas de un departamento votan igual; falta llegar una mesa de cada recinto"""
+    primera = actas_segunda()
+    posicion = primera['NombreDepartamento'].map(DEPARTAMENTOS_OFICIALES.index)
+    primera['PDC'] = 100 + 10 * posicion
+    primera['LIBRE'] = 80
+    primera['VotoNulo'] = 5
+    primera['VotoBlanco'] = 5
+    segunda = primera[np.arange(len(primera)) % 4 != 3].reset_index(drop=True)
+    return primera, segunda
+
+def test_sin_dispersion_la_proyeccion_completa_las_mesas_pendientes():
+    primera, segunda = _vueltas()
+
+    proyeccion = proyectar_resultados(primera, segunda, simulaciones=200)
+
+    assert (proyeccion['contadas'], proyeccion['pendientes'], proyeccion['avance']) == (30, 10, 75.0)
+    tabla = proyeccion['proyeccion']
+    assert tabla.loc['PDC', 'Contado'] == segunda['PDC'].sum()
+    # Cada mesa pendiente aporta exactamente los votos de las mesas de su departamento
+    assert tabla['Proyectado'].tolist() == [primera['PDC'].sum(), primera['LIBRE'].sum(), 400]
+    assert (tabla['Inferior'] == tabla['Proyectado']).all() and (tabla['Superior'] == tabla['Proyectado']).all()
+    assert tabla.loc['PDC', '% Válidos'] == pytest.approx(primera['PDC'].sum() / (primera['PDC'].sum() + 3200) * 100, abs=0.01)
+    assert proyeccion['prob_victoria'] == {'PDC': 1.0, 'LIBRE': 0.0}
+
+    departamentos = proyeccion['departamentos'].set_index('Departamento')
+    assert departamentos['Contadas'].sum() == 30 and departamentos['Pendientes'].sum() == 10
+    assert departamentos.loc['Beni', 'PDC (%)'] == pytest.approx(100 / 180 * 100, abs=0.01)
+    assert departamentos.loc['Tarija', 'PDC (%)'] == pytest.approx(180 / 260 * 100, abs=0.01)
+
+def test_con_todas_las_mesas_contadas_no_hay_incertidumbre():
+    primera, _ = _vueltas()
+    primera['PDC'] = np.random.default_rng(0).integers(0, 200, len(primera))
+
+    proyeccion = proyectar_resultados(primera, primera, simulaciones=200)
+
+    tabla = proyeccion['proyeccion']
+    assert proyeccion['pendientes'] == 0 and proyeccion['avance'] == 100.0
+    assert (tabla['Proyectado'] == tabla['Contado']).all()
+    assert (tabla['Inferior'] == tabla['Superior']).all()
+
+def test_segunda_vuelta_sin_actas():
+    primera, segunda = _vueltas()
+
+    proyeccion = proyectar_resultados(primera, segunda.iloc[:0])
+
+    assert proyeccion['proyeccion'].empty and proyeccion['contadas'] == 0
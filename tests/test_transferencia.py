@@ -0,0 +1,69 @@
+"""Transferencia de votos: la regresión recupera una matriz conocida"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from elecciones.config import COLUMNA_MESA, DEPARTAMENTOS_OFICIALES
+from elecciones.transferencia import estimar_transferencias
+
+# Origen -> destino en %: A va sobre todo a PDC, B a LIBRE y los nulos/blancos se mantienen
+MATRIZ = np.array([[80, 20, 0], [10, 90, 0], [0, 0, 100]], dtype='float64')
+
+def _vueltas(mesas=120, semilla=0):
+    """Mesas con proporciones de origen distintas; la segunda vuelta aplica MATRIZ a cada mesa"""
+    generador = np.random.default_rng(semilla)
+    origen = generador.dirichlet([4, 4, 1], mesas) * generador.integers(2_000, 4_000, mesas)[:, None]
+    destino = origen @ MATRIZ / 100
+    codigos = [f'{100 + i}.1' for i in range(mesas)]
+    primera = pd.DataFrame({
+        COLUMNA_MESA: codigos,
+        'A': origen[:, 0].round().astype('int64'),
+        'B': origen[:, 1].round().astype('int64'),
+        'VotoNulo': origen[:, 2].round().astype('int64'),
+        'VotoBlanco': 0
+    })
+    segunda = pd.DataFrame({
+        COLUMNA_MESA: codigos,
+        'NombreDepartamento': [DEPARTAMENTOS_OFICIALES[i % 2] for i in range(mesas)],
+        'PDC': destino[:, 0].round().astype('int64'),
+        'LIBRE': destino[:, 1].round().astype('int64'),
+        'VotoNulo': 0,
+        'VotoBlanco': destino[:, 2].round().astype('int64')
+    })
+    # Una mesa de segunda vuelta sin pareja en la primera
+    segunda.loc[mesas] = ['999.9', DEPARTAMENTOS_OFICIALES[0], 10, 10, 0, 0]
+    return primera, segunda
+
+def test_recupera_la_matriz_de_transferencia():
+    primera, segunda = _vueltas()
+
+    transferencia = estimar_transferencias(primera, segunda, partidos=['A', 'B'])
+
+    nacional = transferencia['nacional']
+    assert list(nacional.index) == ['A', 'B', 'Nulo/Blanco']
+    assert list(nacional.columns) == ['PDC', 'LIBRE', 'Nulo/Blanco']
+    np.testing.assert_allclose(nacional.to_numpy(), MATRIZ, atol=1)
+    np.testing.assert_allclose(nacional.sum(axis=1), 100, atol=0.2)
+    assert transferencia['mesas'] == 120
+    assert transferencia['cobertura'] == pytest.approx(120 / 121 * 100)
+
+    # Cada departamento con mesas tiene su propia matriz, cercana a la misma transferencia
+    departamentos = transferencia['departamentos']
+    assert departamentos.groupby('Departamento')['Mesas'].first().to_dict() == {
+        DEPARTAMENTOS_OFICIALES[0]: 60, DEPARTAMENTOS_OFICIALES[1]: 60
+    }
+    for _, matriz in departamentos.groupby('Departamento'):
+        np.testing.assert_allclose(matriz[['PDC', 'LIBRE', 'Nulo/Blanco']].to_numpy(), MATRIZ, atol=1)
+
+    # Los flujos reparten los votos de origen según la matriz nacional
+    flujos = transferencia['flujos']
+    assert flujos.loc['A', 'PDC'] == pytest.approx(primera['A'].sum() * 0.8, rel=0.02)
+    assert flujos.loc['B', 'LIBRE'] == pytest.approx(primera['B'].sum() * 0.9, rel=0.02)
+
+def test_sin_mesas_en_comun_no_hay_estimacion():
+    primera, segunda = _vueltas()
+    segunda[COLUMNA_MESA] = segunda[COLUMNA_MESA].str.replace('.1', '.2', regex=False)
+
+    transferencia = estimar_transferencias(primera, segunda, partidos=['A', 'B'])
+
+    assert transferencia['mesas'] == 0 and transferencia['nacional'].empty